@@ -20,8 +20,11 @@ import importlib
 import math
 import os
 import sys
+import time
 from typing import Any, Callable, List, Type, Union
 
+_import_start_time = time.perf_counter()
+
 # Local files
 ADDON_DIR = os.path.dirname(os.path.realpath(__file__))
 if not ADDON_DIR in sys.path:
@@ -39,41 +42,50 @@ module_defs = [
     "preferences",
     "ui_lists",
     "ui_panels",
-    ("util", ["Bounds", "Camera", "FileSystemUtil", "ImageMagick", "Register", "SceneSnapshot", "StringUtil", "TerminalOutput", "UIUtil"])
+    ("util", ["Bounds", "BoundsCache", "BoundsWorkers", "Camera", "CameraPlan", "FileSystemUtil", "ImageMagick", "ImageOps", "JobSpec", "PngEncoder", "Register", "SceneSnapshot", "SheetLayout", "Silhouette", "StringUtil", "TerminalOutput", "TextureCompression", "UIUtil"])
 ]
 
+# Normally only the modules needed to register the addon are imported here; they import everything else as they need it, and the
+# job machinery is only imported once it's used (see utils.lazy_import). Reloading every module is only done when developing the addon
+startup_modules = { "utils", "property_groups", "operators", "render_operator", "preferences", "ui_lists", "ui_panels", "Register" }
+
+# Preferences aren't registered yet, so the saved values are read from the file directly
+_prefs_module = importlib.import_module(".preferences", __name__)
+_prefs_module.SpritesheetAddonPreferences.load_prefs_file()
+_reload_modules: bool = _prefs_module.SpritesheetAddonPreferences.saved_value("reloadModulesOnEnable", False)
+
 _locals = locals()
 _modules = []
 for module_def in module_defs:
     if isinstance(module_def, str):
-        print(f"[SpritesheetRenderer] Loading module {module_def}")
+        module_names = [(module_def, module_def)]
+    elif isinstance(module_def, tuple):
+        # Don't add the parent module into locals, only submodules
+        module_names = [(submod_name, module_def[0] + "." + submod_name) for submod_name in module_def[1]]
 
-        module = importlib.import_module("." + module_def, __name__)
-        importlib.reload(module)
+    for local_name, module_path in module_names:
+        if not _reload_modules and local_name not in startup_modules:
+            continue
 
-        _locals[module_def] = module
-        _modules.append(module)
-    elif isinstance(module_def, tuple):
-        module_name = module_def[0]
-        submods = module_def[1]
+        module = importlib.import_module("." + module_path, __name__)
 
-        # Don't add the parent module into locals, only submodules
-        for submod_name in submods:
-            print(f"[SpritesheetRenderer] Loading module {module_name}.{submod_name}")
+        if _reload_modules:
+            print(f"[SpritesheetRenderer] Loading module {module_path}")
+            importlib.reload(module)
 
-            submodule = importlib.import_module("." + module_name + "." + submod_name, __name__)
-            importlib.reload(submodule)
+        _locals[local_name] = module
+        _modules.append(module)
 
-            _locals[submod_name] = submodule
-            _modules.append(submodule)
+if _reload_modules:
+    print("[SpritesheetRenderer] Internal modules loaded; reloading all to pick up latest versions")
 
-print("[SpritesheetRenderer] Internal modules loaded; reloading all to pick up latest versions")
+    # Reload everything again just to be sure the latest changes are picked up
+    for mod in _modules:
+        importlib.reload(mod)
 
-# Reload everything again just to be sure the latest changes are picked up
-for mod in _modules:
-    importlib.reload(mod)
+    print("[SpritesheetRenderer] All internal modules reloaded")
 
-print("[SpritesheetRenderer] All internal modules reloaded")
+_import_time = time.perf_counter() - _import_start_time
 
 # This operator is in the main file so it has the correct module path
 class SPRITESHEET_OT_ShowAddonPrefsOperator(bpy.types.Operator):
@@ -96,11 +108,6 @@ def check_animation_state():
 
     return 1.0 # check every second for responsiveness, since this is cheap
 
-def find_image_magick_exe():
-    # Only look for the exe if the path isn't already set
-    if not preferences.PrefsAccess.image_magick_path:
-        bpy.ops.spritesheet.prefs_locate_imagemagick()
-
 @persistent
 def initialize_collections(_unused: None):
     """Initializes certain CollectionProperty objects that otherwise would be empty."""
@@ -120,9 +127,6 @@ def initialize_collections(_unused: None):
         bpy.ops.spritesheet.add_animation_set()
         props.animation_options.control_animations = control_animations
 
-    for i in range(0, len(props.animation_options.animation_sets)):
-        ui_panels.SPRITESHEET_PT_AnimationSetPanel.create_sub_panel(i)
-
     ### Initialize material sets
 
     if len(props.material_options.material_sets) == 0:
@@ -132,8 +136,14 @@ def initialize_collections(_unused: None):
         bpy.ops.spritesheet.add_material_set()
         props.material_options.control_materials = control_materials
 
-    for i in range(0, len(props.material_options.material_sets)):
-        ui_panels.SPRITESHEET_PT_MaterialSetPanel.create_sub_panel(i)
+@persistent
+def invalidate_render_validation(*_args):
+    # Handlers pass different arguments depending on the handler type and Blender version, none of which are needed here
+    render_operator.SPRITESHEET_OT_RenderSpritesheetOperator.invalidate_validation()
+
+@persistent
+def on_depsgraph_update(_scene: bpy.types.Scene, depsgraph: bpy.types.Depsgraph):
+    render_operator.SPRITESHEET_OT_RenderSpritesheetOperator.on_depsgraph_update(depsgraph)
 
 @persistent
 def reset_reporting_props(_unused: None):
@@ -171,6 +181,7 @@ classes: List[Union[Type[bpy.types.Panel], Type[bpy.types.UIList], Type[bpy.type
     operators.SPRITESHEET_OT_AddMaterialSetOperator,
     operators.SPRITESHEET_OT_AddRotationTargetOperator,
     operators.SPRITESHEET_OT_AssignMaterialSetOperator,
+    operators.SPRITESHEET_OT_ClearBoundsCacheOperator,
     operators.SPRITESHEET_OT_ConfigureRenderCameraOperator,
     operators.SPRITESHEET_OT_LocateImageMagickOperator,
     operators.SPRITESHEET_OT_ModifyAnimationSetOperator,
@@ -191,7 +202,9 @@ classes: List[Union[Type[bpy.types.Panel], Type[bpy.types.UIList], Type[bpy.type
 
     # UI property lists
     ui_lists.SPRITESHEET_UL_AnimationActionPropertyList,
+    ui_lists.SPRITESHEET_UL_AnimationSetPropertyList,
     ui_lists.SPRITESHEET_UL_CameraTargetPropertyList,
+    ui_lists.SPRITESHEET_UL_MaterialSetPropertyList,
     ui_lists.SPRITESHEET_UL_MaterialSetTargetPropertyList,
     ui_lists.SPRITESHEET_UL_RotationTargetPropertyList,
 
@@ -199,13 +212,17 @@ classes: List[Union[Type[bpy.types.Panel], Type[bpy.types.UIList], Type[bpy.type
     ui_panels.SPRITESHEET_PT_AddonPanel,
     ui_panels.SPRITESHEET_PT_OutputPropertiesPanel,
     ui_panels.SPRITESHEET_PT_AnimationsPanel,
+    ui_panels.SPRITESHEET_PT_AnimationSetPanel, # must come after its parent panel
     ui_panels.SPRITESHEET_PT_CameraPanel,
     ui_panels.SPRITESHEET_PT_MaterialsPanel,
+    ui_panels.SPRITESHEET_PT_MaterialSetPanel, # must come after its parent panel
     ui_panels.SPRITESHEET_PT_RotationOptionsPanel,
     ui_panels.SPRITESHEET_PT_JobManagementPanel
 ]
 
 def register():
+    register_start_time = time.perf_counter()
+
     for cls in classes:
         Register.register_class(cls)
 
@@ -214,13 +231,20 @@ def register():
 
     # Most handlers need to happen when the addon is enabled and also when a new .blend file is opened
     start_timer(check_animation_state, first_interval = .1, is_persistent = True)
-    start_timer(find_image_magick_exe, first_interval = .1)
     start_timer(initialize_collections, make_partial = True)
     start_timer(reset_reporting_props, make_partial = True)
 
     bpy.app.handlers.load_post.append(initialize_collections)
     bpy.app.handlers.load_post.append(reset_reporting_props)
 
+    # The render operator caches its validation between redraws, until something it depends on changes
+    bpy.app.handlers.depsgraph_update_post.append(on_depsgraph_update)
+    bpy.app.handlers.load_post.append(invalidate_render_validation)
+    bpy.app.handlers.redo_post.append(invalidate_render_validation)
+    bpy.app.handlers.undo_post.append(invalidate_render_validation)
+
+    preferences.SpritesheetAddonPreferences.startupTime = _import_time + (time.perf_counter() - register_start_time)
+
 def unregister():
     for timer in timers:
         if bpy.app.timers.is_registered(timer):
@@ -229,11 +253,14 @@ def unregister():
     bpy.app.handlers.load_post.remove(initialize_collections)
     bpy.app.handlers.load_post.remove(reset_reporting_props)
 
+    bpy.app.handlers.depsgraph_update_post.remove(on_depsgraph_update)
+    bpy.app.handlers.load_post.remove(invalidate_render_validation)
+    bpy.app.handlers.redo_post.remove(invalidate_render_validation)
+    bpy.app.handlers.undo_post.remove(invalidate_render_validation)
+
     del bpy.types.Scene.ReportingPropertyGroup
     del bpy.types.Scene.SpritesheetPropertyGroup
 
-    UIUtil.unregister_subpanels()
-
     for cls in reversed(classes):
         Register.unregister_class(cls)
 
@@ -1,11 +1,28 @@
 import bpy
+import time
+from typing import Generator, Optional, Tuple
 
 from . import preferences
 from . import property_groups
-from . import ui_panels
-from .util import Camera as CameraUtil, FileSystemUtil, ImageMagick, SceneSnapshot, UIUtil
+from . import render_operator
+from .util import BoundsCache, FileSystemUtil, SceneSnapshot, StringUtil, UIUtil
 from . import utils
 
+# Not needed until one of these operators runs; see utils.lazy_import
+CameraUtil = utils.lazy_import(".util.Camera", __package__)
+ImageMagick = utils.lazy_import(".util.ImageMagick", __package__)
+
+class SPRITESHEET_OT_ClearBoundsCacheOperator(bpy.types.Operator):
+    """Deletes all of the target bounds which have been saved to disk, so that every frame is evaluated again the next time the camera is optimized"""
+    bl_idname = "spritesheet.clear_bounds_cache"
+    bl_label = "Clear Bounds Cache"
+
+    def execute(self, _context):
+        num_removed = BoundsCache.clear()
+        self.report({"INFO"}, f"Removed {num_removed} cached bounds file(s)")
+
+        return {"FINISHED"}
+
 class SPRITESHEET_OT_ConfigureRenderCameraOperator(bpy.types.Operator):
     bl_idname = "spritesheet.configure_render_camera"
     bl_label = "Configure Render Camera"
@@ -48,11 +65,14 @@ class SPRITESHEET_OT_OpenDirectoryOperator(bpy.types.Operator):
 class SPRITESHEET_OT_OptimizeCameraOperator(bpy.types.Operator):
     """Sets the Render Camera the same way it will be set while rendering the spritesheet, to help preview camera options.
 
-This may have to iterate many frames of animation data, so this can take a long time if your scene is expensive to animate (e.g. modifiers such as subdivision surface)."""
+This may have to iterate many frames of animation data, so this can take a long time if your scene is expensive to animate (e.g. modifiers such as subdivision surface). Progress is shown in the status bar, and pressing Esc cancels without changing the camera."""
     bl_idname = "spritesheet.optimize_camera"
     bl_label = "Optimize Camera for Spritesheet"
     bl_options = {'REGISTER', 'UNDO'}
 
+    # How long to spend stepping through frames before letting the UI update, in seconds
+    _step_time_budget = 0.1
+
     def get_animation_set_options(self, context: bpy.types.Context):
         props = context.scene.SpritesheetPropertyGroup
 
@@ -107,26 +127,143 @@ This may have to iterate many frames of animation data, so this can take a long
 
         self.control_mode = props.camera_options.camera_control_mode
 
-        return self.execute(context)
+        if self.control_mode == "move_each_frame":
+            # Only a single frame is evaluated, so there's nothing to step through
+            return self.execute(context)
+
+        self._snapshot = SceneSnapshot.SceneSnapshot(context)
+
+        # Until the modal handler is running, nothing else will restore the snapshot, and an unrestored snapshot journals every change made afterwards
+        try:
+            self._steps = self._optimization_steps(context)
+
+            if self._steps is None:
+                self._snapshot.restore_from_snapshot(context)
+                return {'CANCELLED'}
+
+            # Viewport shading and the number of visible objects make a big difference in how long it takes to step through frames, but
+            # changes to them don't take effect until the viewport redraws, which is why this has to be a modal operator
+            self._enter_cheap_evaluation_state(context)
+        except:
+            self._snapshot.restore_from_snapshot(context)
+            raise
+
+        self._start_time = time.perf_counter()
+
+        wm = context.window_manager
+        self._timer = wm.event_timer_add(0.01, window = context.window)
+        wm.modal_handler_add(self)
+        wm.progress_begin(0, 1)
+
+        return {'RUNNING_MODAL'}
+
+    def modal(self, context, event):
+        if event.type in {"ESC"}:
+            self._finish(context)
+            self.report({'INFO'}, "Camera optimization cancelled; the camera was not changed")
+            return {'CANCELLED'}
+
+        if event.type != "TIMER":
+            return {'PASS_THROUGH'}
+
+        # Step through as many frames as fit in the time budget before giving the UI a chance to update
+        deadline = time.perf_counter() + SPRITESHEET_OT_OptimizeCameraOperator._step_time_budget
+
+        try:
+            while time.perf_counter() < deadline:
+                num_evaluated, num_to_evaluate = next(self._steps)
+        except StopIteration as stop:
+            self._finish(context)
+            self._report_frames_bounded(*stop.value)
+            return {'FINISHED'}
+        except Exception as e:
+            self._finish(context)
+            self.report({'ERROR'}, utils.get_exception_message(e))
+            return {'CANCELLED'}
+
+        context.window_manager.progress_update(num_evaluated / num_to_evaluate)
+
+        # Background workers (see BoundsWorkers) report progress in whole ranges of frames, so there may be nothing to estimate from yet
+        if num_evaluated > 0:
+            elapsed_time = time.perf_counter() - self._start_time
+            remaining_time = elapsed_time / num_evaluated * (num_to_evaluate - num_evaluated)
+            remaining_text = f"about {StringUtil.time_as_string(remaining_time, include_hours = False)} remaining"
+        else:
+            remaining_text = "estimating time remaining"
+
+        context.workspace.status_text_set(f"Optimizing camera: {num_evaluated} of {num_to_evaluate} frames evaluated, {remaining_text} (Esc to cancel)")
+
+        return {'PASS_THROUGH'}
 
     def execute(self, context):
+        snapshot = SceneSnapshot.SceneSnapshot(context)
+
+        # An unrestored snapshot would keep journaling every change made afterwards, so it's restored however this ends
+        try:
+            if self.control_mode == "move_each_frame":
+                CameraUtil.fit_camera_to_targets(context)
+                return {'FINISHED'}
+
+            steps = self._optimization_steps(context)
+
+            if steps is None:
+                return {'CANCELLED'}
+
+            while True:
+                try:
+                    next(steps)
+                except StopIteration as stop:
+                    num_frames_bounded, num_frames_total = stop.value
+                    break
+        finally:
+            snapshot.restore_from_snapshot(context)
+
+        self._report_frames_bounded(num_frames_bounded, num_frames_total)
+
+        return {'FINISHED'}
+
+    def _enter_cheap_evaluation_state(self, context: bpy.types.Context):
+        """Switches every 3D viewport to wireframe and excludes every collection which doesn't contain anything the camera targets
+        depend on. Both are journaled in the operator's snapshot, so they're undone when it's restored."""
+        for area in context.screen.areas:
+            if area.type == "VIEW_3D":
+                SceneSnapshot.set_value(area.spaces.active.shading, "type", "WIREFRAME")
+
+        dependencies = set(CameraUtil.find_evaluation_dependencies(context))
+        pending = list(context.view_layer.layer_collection.children)
+
+        while len(pending) > 0:
+            layer_collection = pending.pop()
+
+            if layer_collection.exclude:
+                continue
+
+            if any(obj in dependencies for obj in layer_collection.collection.all_objects):
+                pending.extend(layer_collection.children)
+            else:
+                SceneSnapshot.set_value(layer_collection, "exclude", True)
+
+    def _finish(self, context: bpy.types.Context):
+        # If cancelled part way, closing the steps lets them undo any temporary changes to the scene right away
+        self._steps.close()
+
+        wm = context.window_manager
+        wm.event_timer_remove(self._timer)
+        wm.progress_end()
+        context.workspace.status_text_set(None)
+
+        self._snapshot.restore_from_snapshot(context)
+
+    def _optimization_steps(self, context: bpy.types.Context) -> Optional[Generator["CameraUtil.Progress", None, Tuple[int, int]]]:
         props = context.scene.SpritesheetPropertyGroup
 
         animation_sets = props.animation_options.get_animation_sets()
         rotations = props.rotation_options.get_rotations()
 
-        # TODO: the shading mode of the viewport (e.g. wireframe, solid) actually makes a big difference in how long
-        # it takes to iterate animation frames, but jsut setting it in this method doesn't help; it probably isn't
-        # effective until end-of-frame. Rewriting this operator as modal and yielding after setting the shading
-        # could cut the optimization time down a lot for complex scenes.
-
-        snapshot = SceneSnapshot.SceneSnapshot(context, snapshot_types = {'ACTIONS', 'ROTATIONS', 'SELECTIONS'})
-
         if self.control_mode == "move_once":
-            CameraUtil.optimize_for_all_frames(context, rotations, animation_sets)
-        elif self.control_mode == "move_each_frame":
-            CameraUtil.fit_camera_to_targets(context)
-        elif self.control_mode == "move_each_animation":
+            return CameraUtil.optimize_for_all_frames_in_steps(context, rotations, animation_sets)
+
+        if self.control_mode == "move_each_animation":
             index = int(self.animation_set)
             animation_set = animation_sets[index]
 
@@ -134,19 +271,23 @@ This may have to iterate many frames of animation data, so this can take a long
 
             if not is_valid:
                 # Don't report an error; it's visible in the operator's panel
-                return {'CANCELLED'}
+                return None
 
-            CameraUtil.optimize_for_animation_set(context, animation_set)
-        elif self.control_mode == "move_each_rotation":
+            return CameraUtil.optimize_for_animation_set_in_steps(context, animation_set)
+
+        if self.control_mode == "move_each_rotation":
             angle = int(self.rotation_angle)
-            CameraUtil.optimize_for_rotation(context, angle, animation_sets)
-        else:
-            self.report({'ERROR'}, f"Unknown camera control mode {self.control_mode}")
-            return {'CANCELLED'}
+            return CameraUtil.optimize_for_rotation_in_steps(context, angle, animation_sets)
 
-        snapshot.restore_from_snapshot(context)
+        self.report({'ERROR'}, f"Unknown camera control mode {self.control_mode}")
+        return None
 
-        return {'FINISHED'}
+    def _report_frames_bounded(self, num_frames_bounded: int, num_frames_total: int):
+        for failure in CameraUtil.take_worker_failures():
+            self.report({'WARNING'}, failure[0].upper() + failure[1:])
+
+        if num_frames_bounded < num_frames_total:
+            self.report({'INFO'}, f"Sampled {num_frames_bounded} of {num_frames_total} frames, saving {num_frames_total - num_frames_bounded} evaluations")
 
     def draw(self, context):
         props = context.scene.SpritesheetPropertyGroup
@@ -267,9 +408,10 @@ class SPRITESHEET_OT_AddAnimationSetOperator(bpy.types.Operator):
 
         animation_set = props.animation_options.animation_sets.add()
         animation_set.actions.add()
+        render_operator.SPRITESHEET_OT_RenderSpritesheetOperator.invalidate_validation()
 
-        index = len(props.animation_options.animation_sets) - 1
-        ui_panels.SPRITESHEET_PT_AnimationSetPanel.create_sub_panel(index)
+        # Show the new set right away
+        props.animation_options.selected_animation_set_index = len(props.animation_options.animation_sets) - 1
 
         return {'FINISHED'}
 
@@ -298,6 +440,10 @@ class SPRITESHEET_OT_RemoveAnimationSetOperator(bpy.types.Operator):
             bpy.ops.screen.animation_cancel(restore_frame = False)
 
         props.animation_options.animation_sets.remove(self.index)
+        render_operator.SPRITESHEET_OT_RenderSpritesheetOperator.invalidate_validation()
+
+        if props.animation_options.selected_animation_set_index >= len(props.animation_options.animation_sets):
+            props.animation_options.selected_animation_set_index = len(props.animation_options.animation_sets) - 1
 
         return {'FINISHED'}
 
@@ -328,6 +474,7 @@ class SPRITESHEET_OT_ModifyAnimationSetOperator(bpy.types.Operator):
 
         if self.operation == "add_action":
             animation_set.actions.add()
+            render_operator.SPRITESHEET_OT_RenderSpritesheetOperator.invalidate_validation()
             return {'FINISHED'}
 
         # All ops past this use action_index
@@ -341,6 +488,7 @@ class SPRITESHEET_OT_ModifyAnimationSetOperator(bpy.types.Operator):
                 animation_set.selected_action_index = self.action_index - 1
 
             animation_set.actions.remove(self.action_index)
+            render_operator.SPRITESHEET_OT_RenderSpritesheetOperator.invalidate_validation()
             return {'FINISHED'}
 
         if self.operation == "move_action_up":
@@ -348,6 +496,7 @@ class SPRITESHEET_OT_ModifyAnimationSetOperator(bpy.types.Operator):
                 return {'CANCELLED'}
 
             animation_set.actions.move(self.action_index, self.action_index - 1)
+            render_operator.SPRITESHEET_OT_RenderSpritesheetOperator.invalidate_validation()
 
             if self.action_index == animation_set.selected_action_index:
                 animation_set.selected_action_index = self.action_index - 1
@@ -359,6 +508,7 @@ class SPRITESHEET_OT_ModifyAnimationSetOperator(bpy.types.Operator):
                 return {'CANCELLED'}
 
             animation_set.actions.move(self.action_index, self.action_index + 1)
+            render_operator.SPRITESHEET_OT_RenderSpritesheetOperator.invalidate_validation()
 
             if self.action_index == animation_set.selected_action_index:
                 animation_set.selected_action_index = self.action_index + 1
@@ -381,6 +531,7 @@ class SPRITESHEET_OT_AddCameraTargetOperator(bpy.types.Operator):
         props = context.scene.SpritesheetPropertyGroup
 
         props.camera_options.targets.add()
+        render_operator.SPRITESHEET_OT_RenderSpritesheetOperator.invalidate_validation()
         return {'FINISHED'}
 
 class SPRITESHEET_OT_RemoveCameraTargetOperator(bpy.types.Operator):
@@ -403,6 +554,7 @@ class SPRITESHEET_OT_RemoveCameraTargetOperator(bpy.types.Operator):
             return {'CANCELLED'}
 
         props.camera_options.targets.remove(self.index)
+        render_operator.SPRITESHEET_OT_RenderSpritesheetOperator.invalidate_validation()
 
         if props.camera_options.selected_target_index == self.index:
             props.camera_options.selected_target_index = self.index - 1
@@ -431,6 +583,7 @@ class SPRITESHEET_OT_MoveCameraTargetUpOperator(bpy.types.Operator):
         new_index = self.index - 1
 
         props.camera_options.targets.move(self.index, new_index)
+        render_operator.SPRITESHEET_OT_RenderSpritesheetOperator.invalidate_validation()
 
         if props.camera_options.selected_target_index == self.index:
             props.camera_options.selected_target_index = new_index
@@ -459,6 +612,7 @@ class SPRITESHEET_OT_MoveCameraTargetDownOperator(bpy.types.Operator):
         new_index = self.index + 1
 
         props.camera_options.targets.move(self.index, new_index)
+        render_operator.SPRITESHEET_OT_RenderSpritesheetOperator.invalidate_validation()
 
         if props.camera_options.selected_target_index == self.index:
             props.camera_options.selected_target_index = new_index
@@ -481,10 +635,10 @@ class SPRITESHEET_OT_AddMaterialSetOperator(bpy.types.Operator):
         # Create new material set and give it a single entry to start
         material_set = props.material_options.material_sets.add()
         material_set.materials.add()
+        render_operator.SPRITESHEET_OT_RenderSpritesheetOperator.invalidate_validation()
 
-        # Register a new UI panel to display this material set
-        index = len(props.material_options.material_sets) - 1
-        ui_panels.SPRITESHEET_PT_MaterialSetPanel.create_sub_panel(index)
+        # Show the new set right away
+        props.material_options.selected_material_set_index = len(props.material_options.material_sets) - 1
 
         return {'FINISHED'}
 
@@ -508,6 +662,10 @@ class SPRITESHEET_OT_RemoveMaterialSetOperator(bpy.types.Operator):
             return {'CANCELLED'}
 
         props.material_options.material_sets.remove(self.index)
+        render_operator.SPRITESHEET_OT_RenderSpritesheetOperator.invalidate_validation()
+
+        if props.material_options.selected_material_set_index >= len(props.material_options.material_sets):
+            props.material_options.selected_material_set_index = len(props.material_options.material_sets) - 1
 
         return {'FINISHED'}
 
@@ -538,6 +696,7 @@ class SPRITESHEET_OT_ModifyMaterialSetOperator(bpy.types.Operator):
 
         if self.operation == "add_target":
             material_set.materials.add()
+            render_operator.SPRITESHEET_OT_RenderSpritesheetOperator.invalidate_validation()
             return {'FINISHED'}
 
         # All ops past this use target_index
@@ -548,6 +707,7 @@ class SPRITESHEET_OT_ModifyMaterialSetOperator(bpy.types.Operator):
                 return {'CANCELLED'}
 
             material_set.materials.remove(self.target_index)
+            render_operator.SPRITESHEET_OT_RenderSpritesheetOperator.invalidate_validation()
 
             if self.target_index == material_set.selected_material_index:
                 material_set.selected_material_index = self.target_index - 1
@@ -559,6 +719,7 @@ class SPRITESHEET_OT_ModifyMaterialSetOperator(bpy.types.Operator):
                 return {'CANCELLED'}
 
             material_set.materials.move(self.target_index, self.target_index - 1)
+            render_operator.SPRITESHEET_OT_RenderSpritesheetOperator.invalidate_validation()
 
             if self.target_index == material_set.selected_material_index:
                 material_set.selected_material_index = self.target_index - 1
@@ -570,6 +731,7 @@ class SPRITESHEET_OT_ModifyMaterialSetOperator(bpy.types.Operator):
                 return {'CANCELLED'}
 
             material_set.materials.move(self.target_index, self.target_index + 1)
+            render_operator.SPRITESHEET_OT_RenderSpritesheetOperator.invalidate_validation()
 
             if self.target_index == material_set.selected_material_index:
                 material_set.selected_material_index = self.target_index + 1
@@ -592,6 +754,7 @@ class SPRITESHEET_OT_AddRotationTargetOperator(bpy.types.Operator):
         props = context.scene.SpritesheetPropertyGroup
 
         props.rotation_options.targets.add()
+        render_operator.SPRITESHEET_OT_RenderSpritesheetOperator.invalidate_validation()
         return {'FINISHED'}
 
 class SPRITESHEET_OT_RemoveRotationTargetOperator(bpy.types.Operator):
@@ -614,6 +777,7 @@ class SPRITESHEET_OT_RemoveRotationTargetOperator(bpy.types.Operator):
             return {'CANCELLED'}
 
         props.rotation_options.targets.remove(self.index)
+        render_operator.SPRITESHEET_OT_RenderSpritesheetOperator.invalidate_validation()
 
         if props.rotation_options.selected_target_index == self.index:
             props.rotation_options.selected_target_index = self.index - 1
@@ -642,6 +806,7 @@ class SPRITESHEET_OT_MoveRotationTargetUpOperator(bpy.types.Operator):
         new_index = self.index - 1
 
         props.rotation_options.targets.move(self.index, new_index)
+        render_operator.SPRITESHEET_OT_RenderSpritesheetOperator.invalidate_validation()
 
         if props.rotation_options.selected_target_index == self.index:
             props.rotation_options.selected_target_index = new_index
@@ -670,6 +835,7 @@ class SPRITESHEET_OT_MoveRotationTargetDownOperator(bpy.types.Operator):
         new_index = self.index + 1
 
         props.rotation_options.targets.move(self.index, new_index)
+        render_operator.SPRITESHEET_OT_RenderSpritesheetOperator.invalidate_validation()
 
         if props.rotation_options.selected_target_index == self.index:
             props.rotation_options.selected_target_index = new_index
@@ -31,6 +31,9 @@ class SpritesheetAddonPreferences(bpy.types.AddonPreferences):
     prefsFile: str = os.path.join(os.path.dirname(__file__), "__prefs.json")
     _prefs: Dict[str, Any] = {}
 
+    # How long the addon took to import its modules and register, in seconds; set in __init__.py
+    startupTime: float = 0
+
     displayArea: bpy.props.EnumProperty(
         name = "Addon Display Area",
         description = "Choose where the addon's UI should be displayed",
@@ -52,8 +55,21 @@ class SpritesheetAddonPreferences(bpy.types.AddonPreferences):
         update = _updater()
     )
 
+    reloadModulesOnEnable: bpy.props.BoolProperty(
+        name = "Reload Modules on Enable (Developer)",
+        description = "If true, every module of the addon is reloaded whenever it's enabled, so that changes to its code take effect without restarting Blender. This makes startup slower, and is only useful when working on the addon itself",
+        get = _getter("reloadModulesOnEnable", False),
+        set = _setter("reloadModulesOnEnable"),
+        update = _updater()
+    )
+
     @classmethod
     def register(cls):
+        cls.load_prefs_file()
+
+    @classmethod
+    def load_prefs_file(cls):
+        """Reads the saved preferences. This is also used by __init__.py, which needs them before the addon is registered."""
         try:
             if os.path.isfile(cls.prefsFile):
                 with open(cls.prefsFile) as f:
@@ -62,6 +78,10 @@ class SpritesheetAddonPreferences(bpy.types.AddonPreferences):
             # If the JSON file is malformed, we'll just load defaults
             pass
 
+    @classmethod
+    def saved_value(cls, key: str, default_value: Any) -> Any:
+        return cls._prefs[key] if key in cls._prefs else default_value
+
     def draw(self, _context):
         row = self.layout.row()
         row.prop(self, "displayArea")
@@ -72,6 +92,14 @@ class SpritesheetAddonPreferences(bpy.types.AddonPreferences):
         row = self.layout.row()
         row.operator("spritesheet.prefs_locate_imagemagick", text = "Locate Automatically")
 
+        self.layout.separator()
+
+        row = self.layout.row()
+        row.prop(self, "reloadModulesOnEnable")
+
+        row = self.layout.row()
+        row.label(text = f"Addon startup took {1000 * SpritesheetAddonPreferences.startupTime:.0f} ms", icon = "TIME")
+
 class PrefsAccess():
     """Convenience class to simplify accessing addon preferences."""
     #pylint: disable=no-self-use
@@ -1,9 +1,9 @@
 import bpy
 import collections
 import math
-from typing import Iterable, List, Optional, Tuple
+from typing import Iterable, List, Optional, Set, Tuple
 
-from .util import StringUtil
+from .util import SceneSnapshot, StringUtil
 from . import utils
 
 frame_data = collections.namedtuple('frame_data', 'frame_min frame_max num_frames num_output_frames')
@@ -140,14 +140,14 @@ class AnimationSetPropertyGroup(bpy.types.PropertyGroup):
         # Go through and make sure all the render targets are in a good state before we start changing things
         for prop in self.actions:
             prop.target.animation_data_create() # just in case
-            prop.target.animation_data.use_tweak_mode = False # can't change actions while in NLA's tweak mode
+            SceneSnapshot.set_value(prop.target.animation_data, "use_tweak_mode", False) # can't change actions while in NLA's tweak mode
 
             if prop.target.animation_data.is_property_readonly("action"):
                 # There may be other reasons the prop is readonly, but this is the only one I know of so far
                 raise ValueError(f"Animation target \"{prop.target.name}\" has animation data that cannot be modified. It may be in tweak mode in Nonlinear Animation.")
 
         for prop in self.actions:
-            prop.target.animation_data.action = prop.action
+            SceneSnapshot.set_value(prop.target.animation_data, "action", prop.action)
 
     def get_frame_data(self) -> Optional[Tuple[int, int, int]]:
         frames = self.get_frames_to_render()
@@ -212,6 +212,8 @@ class AnimationOptionsPropertyGroup(bpy.types.PropertyGroup):
         default = False
     )
 
+    selected_animation_set_index: bpy.props.IntProperty(name = "", min = 0)
+
     def get_animation_sets(self) -> Iterable[Optional[AnimationSetPropertyGroup]]:
         if not self.control_animations:
             return [None]
@@ -238,6 +240,62 @@ class CameraOptionsPropertyGroup(bpy.types.PropertyGroup):
         default = False
     )
 
+    bounds_memory_budget: bpy.props.IntProperty(
+        name = "Memory Budget (MB)",
+        description = "The most memory used at once to transform a target's vertices into camera space. Larger meshes, or meshes seen from many rotations at once, are processed in chunks which fit within this budget",
+        default = 64,
+        min = 8,
+        max = 4096
+    )
+
+    bounds_safety_margin: bpy.props.FloatProperty(
+        name = "Safety Margin",
+        description = "When sampling frames or simplifying evaluation, how much to grow the bounds on every side, as a percentage of their size, in case a frame which wasn't sampled or the full-detail geometry extends past them",
+        subtype = "PERCENTAGE",
+        default = 2,
+        min = 0,
+        max = 50
+    )
+
+    bounds_sample_stride: bpy.props.IntProperty(
+        name = "Sample Stride",
+        description = "When sampling frames, every Nth frame is bounded in addition to each keyframe, before refining where the targets are moving",
+        default = 8,
+        min = 2
+    )
+
+    bounds_simplify_subdivision: bpy.props.IntProperty(
+        name = "Max Subdivision",
+        description = "When simplifying evaluation, the maximum subdivision level used while finding the targets' bounds",
+        default = 0,
+        min = 0,
+        max = 6
+    )
+
+    bounds_source: bpy.props.EnumProperty(
+        name = "Bounds From",
+        description = "How to find the bounds of the targets in each frame",
+        items = [
+            ("geometry", "Mesh Geometry", "Bound the vertices of the target meshes. Exact, but other object types are ignored"),
+            ("silhouette", "Rendered Silhouette", "Render a small, single-sample Workbench silhouette of the targets in each frame and bound its pixels. Works for every object type (curves, metaballs, volumes, Grease Pencil, particles) and costs the same regardless of vertex count, but is only accurate to within a pixel of the silhouette's resolution")
+        ],
+        default = "geometry"
+    )
+
+    bounds_worker_count: bpy.props.IntProperty(
+        name = "Worker Processes",
+        description = "How many background Blender processes to split the frames between when finding the targets' bounds. Each worker loads a copy of the scene, so this is only faster when evaluating frames is expensive (e.g. heavy rigs or modifiers). 0 or 1 finds the bounds in this process",
+        default = 0,
+        min = 0,
+        max = 32
+    )
+
+    cache_target_bounds: bpy.props.BoolProperty(
+        name = "Cache Target Bounds",
+        description = "If true, the bounds of the targets in each frame are saved to disk and reused until the targets, their actions or the camera's orientation change. Changes to anything read by a driver outside of the targets aren't detected; clear the cache if the camera is framed incorrectly",
+        default = True
+    )
+
     camera_control_mode: bpy.props.EnumProperty(
         name = "Control Style",
         description = "How to control the Render Camera",
@@ -246,6 +304,12 @@ class CameraOptionsPropertyGroup(bpy.types.PropertyGroup):
         set = _set_camera_control_mode
     )
 
+    export_camera_plan: bpy.props.BoolProperty(
+        name = "Export Camera Plan",
+        description = "If true, the camera location and ortho scale computed for every rotation, animation set and frame are written to camera_plan.json in the output directory",
+        default = False
+    )
+
     render_camera: bpy.props.PointerProperty(
         name = "Render Camera",
         description = "The camera to control during rendering",
@@ -255,14 +319,40 @@ class CameraOptionsPropertyGroup(bpy.types.PropertyGroup):
 
     render_camera_obj: bpy.props.PointerProperty(type = bpy.types.Object) # Automatically set; not for users
 
+    sample_bounds: bpy.props.BoolProperty(
+        name = "Sample Frames",
+        description = "If true, the camera is fit using the bounds of a sample of frames (keyframes, every Nth frame, and frames where the targets are moving towards the edges) instead of every frame. Much faster for long animations. Not used when the camera moves every frame",
+        default = False
+    )
+
     selected_target_index: bpy.props.IntProperty(min = 0, name = "")
 
+    silhouette_resolution: bpy.props.IntProperty(
+        name = "Silhouette Resolution",
+        description = "When bounding rendered silhouettes, the width and height in pixels of each silhouette render. Higher values give tighter bounds, but each render is slower",
+        default = 128,
+        min = 16,
+        max = 1024
+    )
+
+    simplify_bounds_evaluation: bpy.props.BoolProperty(
+        name = "Simplify While Fitting",
+        description = "If true, the scene's Simplify settings are enabled with reduced subdivision while the targets' bounds are found, which can make fitting the camera many times faster for heavily subdivided targets. The safety margin is added to the bounds to make up for the missing detail",
+        default = False
+    )
+
     targets: bpy.props.CollectionProperty(
         name = "Camera Targets",
         description = "When the camera is moved, it will tightly frame all of the objects in this list",
         type = CameraTargetPropertyGroup
     )
 
+    use_bone_envelopes: bpy.props.BoolProperty(
+        name = "Bound Skinned Meshes by Bones",
+        description = "If true, targets deformed only by an armature are bounded using their posed bones, each padded by the furthest any vertex weighted to it lies from it, instead of evaluating the deformed mesh. Much faster for high-poly characters, at the cost of looser framing",
+        default = False
+    )
+
     def is_valid(self) -> Tuple[bool, Optional[str]]:
         if not self.control_camera:
             return (True, None)
@@ -312,6 +402,8 @@ class MaterialSetTargetPropertyGroup(bpy.types.PropertyGroup):
     )
 
 class MaterialSetPropertyGroup(bpy.types.PropertyGroup):
+    # Object types whose materials are replaced by a view layer's material override
+    _rendered_object_types = { "CURVE", "FONT", "META", "MESH", "SURFACE", "VOLUME" }
 
     def _get_name(self) -> str:
         name = self.get("name")
@@ -371,16 +463,52 @@ class MaterialSetPropertyGroup(bpy.types.PropertyGroup):
         poll = _is_mat_valid_to_share
     )
 
-    def assign_materials_to_targets(self):
+    def assign_materials_to_targets(self, context: Optional[bpy.types.Context] = None, use_override: bool = False):
+        """Assigns this set's materials to its targets, only writing to the slots whose material changes.
+
+        If a context is given and use_override is true, the shared material is applied with the view layer's material override instead,
+        which takes a single write no matter how many targets there are; only pass true if can_use_material_override said so. Any
+        override from a previous set is cleared otherwise."""
         if not self.is_valid():
             raise ValueError("Material set is not in a valid state to assign materials")
 
+        if context is not None:
+            override = self.shared_material if use_override else None
+
+            if context.view_layer.material_override != override:
+                SceneSnapshot.set_value(context.view_layer, "material_override", override)
+
+            if use_override:
+                return
+
         for index, prop in enumerate(self.materials):
 
             if len(prop.target.material_slots) == 0:
                 prop.target.material_slots.new(None)
 
-            prop.target.material_slots[0].material = self.material_at(index)
+            # Writing to a slot makes the depsgraph re-evaluate the object, even if the material hasn't changed
+            material = self.material_at(index)
+            if prop.target.material_slots[0].material != material:
+                SceneSnapshot.set_value(prop.target.material_slots[0], "material", material)
+
+    def can_use_material_override(self, context: bpy.types.Context, rendered_objects: Set[bpy.types.Object]) -> bool:
+        """Whether this set can be applied with the view layer's material override: it must be a shared set, rendered with Cycles, whose
+        targets are the only objects rendered in the view layer (rendered_objects, from find_rendered_objects) and aren't Grease Pencil."""
+        if self.mode != "shared" or context.scene.render.engine != 'CYCLES':
+            return False
+
+        targets = { prop.target for prop in self.materials }
+
+        if any(target.type == "GPENCIL" for target in targets):
+            return False
+
+        return rendered_objects <= targets
+
+    @classmethod
+    def find_rendered_objects(cls, context: bpy.types.Context) -> Set[bpy.types.Object]:
+        """The objects in the view layer whose materials a material override would replace. This scans every object in the view layer,
+        so callers deciding for several material sets should only call it once."""
+        return { obj for obj in context.view_layer.objects if obj.type in cls._rendered_object_types and not obj.hide_render }
 
     def is_valid(self) -> Tuple[bool, Optional[str]]:
         if len(self.materials) == 0:
@@ -427,6 +555,8 @@ class MaterialOptionsPropertyGroup(bpy.types.PropertyGroup):
         default = False
     )
 
+    selected_material_set_index: bpy.props.IntProperty(name = "", min = 0)
+
 class ReportingPropertyGroup(bpy.types.PropertyGroup):
     current_frame_num: bpy.props.IntProperty() # which frame we are currently rendering
 
@@ -520,6 +650,7 @@ class RotationOptionsPropertyGroup(bpy.types.PropertyGroup):
 
     def rotate_objects(self, angle_degrees: int):
         for target in self.targets:
+            SceneSnapshot.record(target.target, "rotation_euler")
             target.target.rotation_euler[2] = math.radians(angle_degrees)
 
 class SpritesheetPropertyGroup(bpy.types.PropertyGroup):
@@ -538,18 +669,87 @@ class SpritesheetPropertyGroup(bpy.types.PropertyGroup):
         context.scene.render.resolution_y = self.sprite_size[1]
 
     ### Output file properties
+    align_animations_to_rows: bpy.props.BoolProperty(
+        name = "Start Animations on New Rows",
+        description = "If true, each animation in a spritesheet begins at the start of a row, leaving empty cells at the end of the previous animation's last row. Frame numbers in the JSON account for the empty cells",
+        default = False
+    )
+
+    block_compression_formats: bpy.props.EnumProperty(
+        name = "GPU Texture Formats",
+        description = "Block-compressed texture formats to write alongside each PNG, so game engines don't need to convert them on import",
+        items = [
+            ("bc1", "BC1", "BC1/DXT1 in a .dds file. 4 bits per pixel with 1-bit alpha; semi-transparent pixels become fully opaque or transparent"),
+            ("bc3", "BC3", "BC3/DXT5 in a .dds file. 8 bits per pixel with smooth alpha"),
+            ("bc7", "BC7", "BC7 in a .dds file. 8 bits per pixel, higher quality than BC3. Only mode 6 is used, to keep encoding fast"),
+            ("etc2", "ETC2", "ETC2 RGBA8 in a .ktx2 file, for mobile platforms. 8 bits per pixel")
+        ],
+        options = {'ENUM_FLAG'},
+        default = set()
+    )
+
+    compress_intermediate_frames: bpy.props.BoolProperty(
+        name = "Compress Intermediate Frames",
+        description = "If true, the individual frames rendered by Blender will be PNG-compressed. They are deleted once combined into a spritesheet, so leaving this off saves time without affecting the output",
+        default = False
+    )
+
+    downscaled_sheets: bpy.props.EnumProperty(
+        name = "Downscaled Sheets",
+        description = "Additional, smaller copies of each spritesheet to write, filtered from the full resolution render instead of rendering again",
+        items = [
+            ("half", "0.5x", "Write a copy of each spritesheet at half size. Sprite Size and Gutter must be divisible by 2"),
+            ("quarter", "0.25x", "Write a copy of each spritesheet at quarter size. Sprite Size and Gutter must be divisible by 4")
+        ],
+        options = {'ENUM_FLAG'},
+        default = set()
+    )
+
     force_image_to_square: bpy.props.BoolProperty(
         name = "Trim + Resize to Square",
         description = "If true, all output images will be trimmed, then forced to square dimensions. This operation will not preserve the image's aspect ratio",
         default = False
     )
 
+    generate_mipmaps: bpy.props.BoolProperty(
+        name = "Mipmaps",
+        description = "If true, GPU texture files will contain a full mip chain down to 1x1. Consider adding a gutter so sprites don't bleed into each other at lower mip levels",
+        default = False
+    )
+
+    optimize_sheet_layout: bpy.props.BoolProperty(
+        name = "Optimize Layout",
+        description = "If true, the number of rows and columns is chosen to minimize the final image size after padding and squaring. The image is never made larger in either dimension than the default near-square layout",
+        default = True
+    )
+
     pad_output_to_power_of_two: bpy.props.BoolProperty(
         name = "Pad to Power-of-Two",
         description = "If true, all output images will be padded with transparent pixels to the smallest power-of-two size that can fit the original output",
         default = False
     )
 
+    png_compression_level: bpy.props.IntProperty(
+        name = "PNG Compression",
+        description = "The zlib compression level for output images, from 0 (fastest, largest files) to 9 (slowest, smallest files). Compression is lossless at every level",
+        default = 7,
+        min = 0,
+        max = 9
+    )
+
+    png_encoding_threads: bpy.props.IntProperty(
+        name = "Encoding Threads",
+        description = "How many CPU threads to use when assembling and compressing output images. If 0, all available cores are used",
+        default = 0,
+        min = 0
+    )
+
+    prewarm_shaders: bpy.props.BoolProperty(
+        name = "Pre-warm Shaders",
+        description = "If true, each material set is assigned and rendered once at a tiny size before the job starts rendering frames, so that shader compilation (Eevee) or material sync (Cycles) doesn't slow down the first frames of each set. The time spent warming up is reported separately",
+        default = False
+    )
+
     separate_files_per_animation: bpy.props.BoolProperty(
         name = "Separate Files Per Animation",
         description = "If 'Control Animations' is enabled, this will generate one output file per animation action. Otherwise, all actions will be combined in a single file",
@@ -568,6 +768,14 @@ class SpritesheetPropertyGroup(bpy.types.PropertyGroup):
         default = False
     )
 
+    sprite_gutter: bpy.props.IntProperty(
+        name = "Gutter",
+        description = "How many pixels of space to add around each sprite. The space is filled by extending the sprite's edge pixels outward, so that texture filtering and mipmaps don't bleed between neighboring sprites",
+        default = 0,
+        min = 0,
+        max = 64
+    )
+
     sprite_size: bpy.props.IntVectorProperty(
         name = "Sprite Size",
         description = "How large each individual sprite should be. If non-square, the camera's output will be cropped, not scaled",
@@ -575,4 +783,14 @@ class SpritesheetPropertyGroup(bpy.types.PropertyGroup):
         min = 16,
         size = 2,
         update = _on_sprite_size_changed
-    )
\ No newline at end of file
+    )
+
+    use_parallel_png_encoding: bpy.props.BoolProperty(
+        name = "Parallel PNG Encoding",
+        description = "If true, final output images are compressed in independent chunks across multiple CPU cores. This is much faster for large spritesheets, at the cost of slightly larger files. Without NumPy, rows are stored unfiltered, and images with gradients can come out several times larger",
+        default = False
+    )
+
+    def get_downscale_factors(self) -> List[int]:
+        factors = { "half": 2, "quarter": 4 }
+        return sorted(factors[scale] for scale in self.downscaled_sheets)
\ No newline at end of file
@@ -8,18 +8,29 @@ import sys
 import tempfile
 import time
 import traceback
-from typing import Any, Dict, Generator, List, Optional, Tuple
+from typing import Any, Callable, Dict, Generator, List, Optional, Tuple
 
 import preferences
 
-from .property_groups import AnimationSetPropertyGroup, MaterialSetPropertyGroup, ReportingPropertyGroup, SpritesheetPropertyGroup
-from .util import Camera as CameraUtil
-from .util import ImageMagick
+from .property_groups import ReportingPropertyGroup, SpritesheetPropertyGroup
+from .util.CameraPlan import CameraPlan
 from .util.TerminalOutput import TerminalWriter
-from .util.SceneSnapshot import SceneSnapshot
+from .util import SceneSnapshot
 from .util import StringUtil
 from . import utils
 
+# These are only needed once a job starts (or for validating options which use NumPy), so they aren't imported until then
+CameraUtil = utils.lazy_import(".util.Camera", __package__)
+ImageMagick = utils.lazy_import(".util.ImageMagick", __package__)
+ImageOps = utils.lazy_import(".util.ImageOps", __package__)
+JobSpec = utils.lazy_import(".util.JobSpec", __package__)
+PngEncoder = utils.lazy_import(".util.PngEncoder", __package__)
+SheetLayout = utils.lazy_import(".util.SheetLayout", __package__)
+TextureCompression = utils.lazy_import(".util.TextureCompression", __package__)
+
+# Width and height of the renders which compile each material set's shaders, in pixels
+_PREWARM_RESOLUTION = 8
+
 class SPRITESHEET_OT_RenderSpritesheetOperator(bpy.types.Operator):
     """Operator for executing spritesheet rendering. This is a modal operator which is expected to run for a long time."""
     bl_idname = "spritesheet.render"
@@ -28,30 +39,35 @@ class SPRITESHEET_OT_RenderSpritesheetOperator(bpy.types.Operator):
 
     renderDisabledReason = ""
 
+    # poll runs on every redraw of the panels which show this operator, and most of the validators scan every animation and material set,
+    # so their result is cached until something it depends on changes. This is (cache key, is valid, reason); see _validation_cache_key
+    _cached_validation: Optional[Tuple[Tuple[int, ...], bool, Optional[str]]] = None
+
     @classmethod
     def poll(cls, context):
         # For some reason, if an error occurs in this method, Blender won't report it.
         # So the whole thing is wrapped in a try/except block so we can know what happened.
         try:
             original_reason = cls.renderDisabledReason
+            cache_key = cls._validation_cache_key(context)
 
-            validators = [
-                cls._validate_image_magick_install,
-                cls._validate_animation_options,
-                cls._validate_camera_options,
-                cls._validate_material_options,
-                cls._validate_rotation_options,
-                cls._validate_object_mode # put this last or else it'll get annoying real quick
-            ]
+            if cls._cached_validation is None or cls._cached_validation[0] != cache_key:
+                cls._cached_validation = (cache_key, *cls._run_validators(context, [
+                    cls._validate_animation_options,
+                    cls._validate_camera_options,
+                    cls._validate_material_options,
+                    cls._validate_output_options,
+                    cls._validate_rotation_options
+                ]))
 
-            is_valid = True
-            cls.renderDisabledReason = ""
+            # These are cheap, and depend on things which don't cause depsgraph updates (preferences and the current mode), so they always run
+            is_valid, cls.renderDisabledReason = cls._run_validators(context, [cls._validate_image_magick_install])
 
-            for validator in validators:
-                is_valid, cls.renderDisabledReason = validator(context)
+            if is_valid:
+                _, is_valid, cls.renderDisabledReason = cls._cached_validation
 
-                if not is_valid:
-                    break
+            if is_valid:
+                is_valid, cls.renderDisabledReason = cls._run_validators(context, [cls._validate_object_mode]) # put this last or else it'll get annoying real quick
 
             if cls.renderDisabledReason != original_reason:
                 # force_redraw_ui calls an operator, which you can't do from within a poll method, so we set it
@@ -63,6 +79,47 @@ class SPRITESHEET_OT_RenderSpritesheetOperator(bpy.types.Operator):
             traceback.print_exc()
             return False
 
+    @classmethod
+    def invalidate_validation(cls):
+        cls._cached_validation = None
+
+    @classmethod
+    def on_depsgraph_update(cls, depsgraph: bpy.types.Depsgraph):
+        """Invalidates the cached validation when anything other than an object's transform changes.
+
+        Changing any of the addon's properties updates the scene, and editing actions, cameras, materials and so on updates their
+        data blocks, so between them these cover everything the cached validators read. Moving objects around happens far more
+        often than anything else, and never changes whether a job is valid, so it's the one update which is ignored."""
+        if cls._cached_validation is None:
+            return
+
+        for update in depsgraph.updates:
+            if not isinstance(update.id, bpy.types.Object) or update.is_updated_geometry or update.is_updated_shading or not update.is_updated_transform:
+                cls.invalidate_validation()
+                return
+
+    @classmethod
+    def _run_validators(cls, context: bpy.types.Context, validators: List[Callable[[bpy.types.Context], Tuple[bool, Optional[str]]]]) -> Tuple[bool, Optional[str]]:
+        for validator in validators:
+            is_valid, reason = validator(context)
+
+            if not is_valid:
+                return (is_valid, reason)
+
+        return (True, None)
+
+    @classmethod
+    def _validation_cache_key(cls, context: bpy.types.Context) -> Tuple[int, ...]:
+        """Everything the cached validation is only valid for, besides what invalidate_validation is called for.
+
+        Adding, removing or moving items in a collection property from Python doesn't update the scene, so the addon's operators
+        which do so call invalidate_validation. The sizes of the top-level collections are also part of the key, to catch scripts
+        changing them; reading them doesn't depend on how many items there are."""
+        props = context.scene.SpritesheetPropertyGroup
+
+        return (context.scene.as_pointer(), len(props.animation_options.animation_sets), len(props.material_options.material_sets),
+                len(props.camera_options.targets), len(props.rotation_options.targets))
+
     @classmethod
     def _validate_animation_options(cls, context: bpy.types.Context) -> Tuple[bool, Optional[str]]:
         props = context.scene.SpritesheetPropertyGroup
@@ -146,6 +203,22 @@ class SPRITESHEET_OT_RenderSpritesheetOperator(bpy.types.Operator):
 
         return (True, None)
 
+    @classmethod
+    def _validate_output_options(cls, context: bpy.types.Context) -> Tuple[bool, Optional[str]]:
+        props = context.scene.SpritesheetPropertyGroup
+
+        if props.block_compression_formats and not TextureCompression.is_available():
+            return (False, "GPU texture formats are selected in Output Properties, but NumPy could not be imported in Blender's Python.")
+
+        if props.downscaled_sheets and not ImageOps.is_available():
+            return (False, "Downscaled sheets are selected in Output Properties, but NumPy could not be imported in Blender's Python.")
+
+        for factor in props.get_downscale_factors():
+            if props.sprite_size[0] % factor != 0 or props.sprite_size[1] % factor != 0 or props.sprite_gutter % factor != 0:
+                return (False, f"To output sheets at {1 / factor:g}x scale, Sprite Size and Gutter must be divisible by {factor}.")
+
+        return (True, None)
+
     @classmethod
     def _validate_rotation_options(cls, context: bpy.types.Context)  -> Tuple[bool, Optional[str]]:
         props = context.scene.SpritesheetPropertyGroup
@@ -163,17 +236,25 @@ class SPRITESHEET_OT_RenderSpritesheetOperator(bpy.types.Operator):
         self._json_data: Dict[str, Any] = {}
         self._output_dir: Optional[str] = None
         self._error: Optional[str]  = None
+        self._camera_plan: Optional[CameraPlan] = None
         self._exception_trace: Optional[str] = None
+        self._job_spec: Optional[JobSpec.JobSpec] = None
         self._last_job_id: int = -1
         self._last_job_start_time: Optional[float] = None
         self._next_job_id: int = 0
-        self._scene_snapshot: SceneSnapshot = SceneSnapshot(context)
+        self._scene_snapshot: SceneSnapshot.SceneSnapshot = SceneSnapshot.SceneSnapshot(context)
         self._start_time: float = time.perf_counter()
         self._terminal_writer: TerminalWriter = TerminalWriter(sys.stdout, not reporting_props.output_to_terminal)
 
         # Execute generator a single time to set up all reporting properties and validate config; this won't render anything yet
         self._generator: Generator[None, None, None] = self._generate_frames_and_spritesheets(context)
-        next(self._generator)
+
+        # cancel restores the snapshot once the job is running, but nothing would before then
+        try:
+            next(self._generator)
+        except:
+            self._scene_snapshot.restore_from_snapshot(context)
+            raise
 
         self.execute(context)
 
@@ -266,38 +347,28 @@ class SPRITESHEET_OT_RenderSpritesheetOperator(bpy.types.Operator):
             self._error = "Failed to validate ImageMagick executable. Check that the path is correct in Addon Preferences."
             return
 
+        # Everything the job reads from its configuration is compiled once here, rather than read from the property groups while rendering
+        spec = JobSpec.compile_job_spec(context, self._base_output_dir())
+        self._job_spec = spec
+
         self._set_render_settings(context)
         self._terminal_writer.clear()
+        self._terminal_writer.write(f"Using {ImageMagick.get_image_magick_version()}\n\n")
 
         if props.camera_options.control_camera:
-            scene.camera = props.camera_options.render_camera_obj
+            SceneSnapshot.set_value(scene, "camera", props.camera_options.render_camera_obj)
 
-        animation_sets: List[Optional[bpy.types.AnimationSetPropertyGroup]]
-        separate_files_per_animation: bool
-        if props.animation_options.control_animations:
-            animation_sets = props.animation_options.animation_sets
-            separate_files_per_animation = props.separate_files_per_animation
-        else:
-            animation_sets = [None]
-            separate_files_per_animation = False
-
-        material_sets = props.material_options.material_sets if props.material_options.control_materials else [None]
-
-        # TODO there's no reason the rotation couldn't be float, except for determining the output file name
-        rotations: List[int]
-        separate_files_per_rotation: bool
-        if props.rotation_options.control_rotation:
-            rotations = props.rotation_options.get_rotations()
-            separate_files_per_rotation = props.separate_files_per_rotation
-        else:
-            rotations = [None]
-            separate_files_per_rotation = False
+        animation_sets = spec.animation_sets
+        material_sets = spec.material_sets
+        rotations = spec.rotations
+        separate_files_per_animation = spec.separate_files_per_animation
+        separate_files_per_rotation = spec.separate_files_per_rotation
 
         # Variables for progress tracking
         material_number = 0
-        num_expected_json_files = (len(rotations) if props.separate_files_per_rotation else 1) * (len(animation_sets) if props.separate_files_per_animation else 1) # materials never result in separate JSON files
+        num_expected_json_files = (len(rotations) if separate_files_per_rotation else 1) * (len(animation_sets) if separate_files_per_animation else 1) # materials never result in separate JSON files
 
-        reporting_props.total_num_frames = self._count_total_frames(material_sets, rotations, animation_sets)
+        reporting_props.total_num_frames = self._count_total_frames(spec)
         self._terminal_writer.write("Expecting to render a total of {} frames\n".format(reporting_props.total_num_frames))
 
         if separate_files_per_animation:
@@ -312,14 +383,20 @@ class SPRITESHEET_OT_RenderSpritesheetOperator(bpy.types.Operator):
         # We yield once before modifying the scene at all, so that all of the reporting properties are set up
         yield
 
-        if props.camera_options.control_camera and props.camera_options.camera_control_mode == "move_once":
-            self._optimize_camera(context, rotations = rotations, animation_sets = animation_sets)
+        if spec.control_camera:
+            self._plan_camera(context, spec)
+
+            if spec.camera_control_mode == "move_once":
+                self._apply_camera_plan(context)
+
+        if props.prewarm_shaders:
+            yield from self._prewarm_shaders(context, material_sets)
 
         self._terminal_writer.write("\n")
 
         frames_since_last_output = 0
 
-        for material_set_index, material_set in enumerate(material_sets):
+        for material_set in material_sets:
             material_number += 1
             material_set_name = material_set.name if material_set else "N/A"
             render_data = []
@@ -330,7 +407,7 @@ class SPRITESHEET_OT_RenderSpritesheetOperator(bpy.types.Operator):
             self._terminal_writer.indent += 1
 
             if material_set is not None:
-                material_set.assign_materials_to_targets()
+                material_set.property_group.assign_materials_to_targets(context, material_set.use_material_override)
 
             rotation_number = 0
             for rotation_angle in rotations:
@@ -340,13 +417,13 @@ class SPRITESHEET_OT_RenderSpritesheetOperator(bpy.types.Operator):
                 self._terminal_writer.write("Rendering angle {} of {}: {} degrees\n".format(rotation_number, len(rotations), rotation_angle))
                 self._terminal_writer.indent += 1
 
-                if props.rotation_options.control_rotation:
+                if spec.control_rotation:
                     props.rotation_options.rotate_objects(rotation_angle)
 
-                if props.camera_options.control_camera and props.camera_options.camera_control_mode == "move_each_rotation":
-                    self._optimize_camera(context, rotations = rotations, animation_sets = animation_sets, current_rotation = rotation_angle)
+                if spec.camera_control_mode == "move_each_rotation":
+                    self._apply_camera_plan(context, rotation = rotation_angle)
 
-                for animation_set in animation_sets:
+                for animation_set_index, animation_set in enumerate(animation_sets):
                     animation_set_number += 1
 
                     if animation_set is not None:
@@ -365,12 +442,12 @@ class SPRITESHEET_OT_RenderSpritesheetOperator(bpy.types.Operator):
                         # files before processing the next animation
                         if separate_files_per_animation:
                             self._terminal_writer.write(f"\nCombining image files for animation set {animation_set_number} of {len(animation_sets)}\n")
-                            image_magick_result = self._run_image_magick(props, reporting_props, material_set_index, animation_set, frames_since_last_output, temp_dir_path, rotation_angle)
+                            image_magick_result = self._run_image_magick(props, reporting_props, material_set, animation_set, frames_since_last_output, temp_dir_path, rotation_angle, render_data)
 
                             if not image_magick_result["succeeded"]: # error running ImageMagick
                                 return
 
-                            self._create_json_file(props, reporting_props, material_sets, render_data, image_magick_result)
+                            self._create_json_file(props, reporting_props, render_data, image_magick_result)
                             self._terminal_writer.write("\n")
 
                             frames_since_last_output = 0
@@ -381,7 +458,7 @@ class SPRITESHEET_OT_RenderSpritesheetOperator(bpy.types.Operator):
 
                         self._terminal_writer.indent -= 1
                     else:
-                        still_data = self._render_still(context, rotation_angle, frames_since_last_output, temp_dir_path)
+                        still_data = self._render_still(context, animation_set_index, rotation_angle, frames_since_last_output, temp_dir_path)
                         render_data.append(still_data)
                         frames_since_last_output += 1
 
@@ -394,12 +471,12 @@ class SPRITESHEET_OT_RenderSpritesheetOperator(bpy.types.Operator):
                     self._terminal_writer.indent += 1
 
                     # Output one file for the whole rotation, with all animations in it
-                    image_magick_result = self._run_image_magick(props, reporting_props, material_set_index, None, frames_since_last_output, temp_dir_path, rotation_angle)
+                    image_magick_result = self._run_image_magick(props, reporting_props, material_set, None, frames_since_last_output, temp_dir_path, rotation_angle, render_data)
 
                     if not image_magick_result["succeeded"]:
                         return
 
-                    self._create_json_file(props, reporting_props, material_sets, render_data, image_magick_result)
+                    self._create_json_file(props, reporting_props, render_data, image_magick_result)
                     self._terminal_writer.write("\n")
                     self._terminal_writer.indent -= 1
 
@@ -417,12 +494,12 @@ class SPRITESHEET_OT_RenderSpritesheetOperator(bpy.types.Operator):
                 self._terminal_writer.indent += 1
 
                 # Output one file for the entire material
-                image_magick_result = self._run_image_magick(props, reporting_props, material_set_index, None, frames_since_last_output, temp_dir_path, None)
+                image_magick_result = self._run_image_magick(props, reporting_props, material_set, None, frames_since_last_output, temp_dir_path, None, render_data)
 
                 if not image_magick_result["succeeded"]:
                     return
 
-                self._create_json_file(props, reporting_props, material_sets, render_data, image_magick_result)
+                self._create_json_file(props, reporting_props, render_data, image_magick_result)
                 self._terminal_writer.write("\n")
                 self._terminal_writer.indent -= 1
 
@@ -459,38 +536,16 @@ class SPRITESHEET_OT_RenderSpritesheetOperator(bpy.types.Operator):
         # Use the user's home directory
         return os.path.join(str(pathlib.Path.home()), "Rendered spritesheets")
 
-    def _create_file_path(self, props: SpritesheetPropertyGroup, material_set_index: int, animation_set: Optional[AnimationSetPropertyGroup], rotation_angle: int, include_material_set: bool = True) -> str:
-        if bpy.data.filepath:
-            filename, _ = os.path.splitext(os.path.basename(bpy.data.filepath))
-        else:
-            filename = "spritesheet"
-
-        output_file_path = os.path.join(self._base_output_dir(), filename)
-
-        # Make sure output directory exists
-        pathlib.Path(os.path.dirname(output_file_path)).mkdir(exist_ok = True)
-
-        material_set = props.material_options.material_sets[material_set_index]
-        if include_material_set and material_set is not None:
-            output_file_path += "_" + self._format_string_for_filename(material_set.name)
-
-        if props.animation_options.control_animations and props.separate_files_per_animation:
-            output_file_path += "_" + self._format_string_for_filename(animation_set.name)
-
-        if props.rotation_options.control_rotation and props.separate_files_per_rotation:
-            output_file_path += "_rot" + str(rotation_angle).zfill(3)
-
-        return output_file_path
-
-    def _create_json_file(self, props: SpritesheetPropertyGroup, reporting_props: ReportingPropertyGroup, material_sets: List[MaterialSetPropertyGroup], render_data: Dict[str, Any], image_magick_data: Dict[str, Any]):
+    def _create_json_file(self, props: SpritesheetPropertyGroup, reporting_props: ReportingPropertyGroup, render_data: Dict[str, Any], image_magick_data: Dict[str, Any]):
+        spec = self._job_spec
         job_id = self._get_next_job_id()
         self._report_job("JSON dump", "writing JSON attributes", job_id, reporting_props)
 
         # Action and rotation are the same for each record if using separate files, so just grab the first value
-        animation_set: Optional[AnimationSetPropertyGroup] = render_data[0]["animation_set"] if props.animation_options.control_animations and props.separate_files_per_animation else None
-        rotation: Optional[int] = render_data[0]["rotation"] if props.rotation_options.control_rotation and props.separate_files_per_rotation else None
+        animation_set: Optional[JobSpec.AnimationSetSpec] = render_data[0]["animation_set"] if spec.separate_files_per_animation else None
+        rotation: Optional[int] = render_data[0]["rotation"] if spec.separate_files_per_rotation else None
 
-        json_file_path = self._create_file_path(props, 0, animation_set, rotation, include_material_set = False) + ".ssdata"
+        json_file_path = spec.output_file_path(None, animation_set, rotation) + ".ssdata"
 
         # Since the material isn't part of the file path, we could end up writing each JSON file multiple times.
         # They all have the same data, so just skip writing if that's the case.
@@ -502,36 +557,54 @@ class SPRITESHEET_OT_RenderSpritesheetOperator(bpy.types.Operator):
 
         json_data = {
             "baseObjectName": utils.blend_file_name(default_value = "object"),
-            "spriteWidth": props.sprite_size[0],
-            "spriteHeight": props.sprite_size[1],
+            "spriteWidth": spec.sprite_size[0],
+            "spriteHeight": spec.sprite_size[1],
             "paddingWidth": padding[0],
             "paddingHeight": padding[1],
+            "gutterSize": image_magick_data["args"]["gutter"],
             "numColumns": image_magick_data["args"]["numColumns"],
             "numRows": image_magick_data["args"]["numRows"]
         }
 
-        if props.material_options.control_materials:
+        if spec.control_materials:
             # If using materials, need to reference where the spritesheet for each material is located
             json_data["materialData"] = []
 
-            for index, material_set in enumerate(material_sets):
-                image_path = self._create_file_path(props, index, animation_set, rotation) + ".png"
+            for material_set in spec.material_sets:
+                image_path = spec.output_file_path(material_set, animation_set, rotation) + ".png"
                 self._output_dir = os.path.dirname(image_path)
                 relative_path = os.path.basename(image_path)
 
-                json_data["materialData"].append({
+                material_data = {
                     "name": material_set.name,
                     "file": relative_path,
                     "role": material_set.role
-                })
+                }
+
+                if props.block_compression_formats:
+                    material_data["compressedFiles"] = self._compressed_file_names(props, image_path)
+
+                if props.downscaled_sheets:
+                    material_data["scaledFiles"] = self._scaled_file_data(props, image_path)
+
+                json_data["materialData"].append(material_data)
         else:
             # When not using materials, there's only one image file per JSON file
-            image_path = self._create_file_path(props, 0, animation_set, rotation, include_material_set = False) + ".png"
+            image_path = spec.output_file_path(None, animation_set, rotation) + ".png"
             self._output_dir = os.path.dirname(image_path)
 
             json_data["imageFile"] = os.path.basename(image_path)
 
-        if props.animation_options.control_animations:
+            if props.block_compression_formats:
+                json_data["compressedImageFiles"] = self._compressed_file_names(props, image_path)
+
+            if props.downscaled_sheets:
+                json_data["scaledImageFiles"] = self._scaled_file_data(props, image_path)
+
+        if "mipLevels" in image_magick_data["args"]:
+            json_data["mipLevels"] = [{ "width": width, "height": height } for width, height in image_magick_data["args"]["mipLevels"]]
+
+        if spec.control_animations:
             json_data["animations"] = []
         else:
             json_data["stills"] = []
@@ -540,10 +613,10 @@ class SPRITESHEET_OT_RenderSpritesheetOperator(bpy.types.Operator):
             out_data = { }
 
             # Animation data (if present)
-            if props.animation_options.control_animations:
+            if spec.control_animations:
                 assert "animation_set" in in_data, "props.animation_options.control_animations is enabled, but data object didn't have 'animation_set' key"
 
-                out_data["frameRate"] = in_data["animation_set"].output_frame_rate
+                out_data["frameRate"] = in_data["animation_set"].frame_rate
                 out_data["frameSkip"] = in_data["animation_set"].frame_skip
                 out_data["name"] = in_data["animation_set"].name
                 out_data["numFrames"] = in_data["numFrames"]
@@ -570,65 +643,101 @@ class SPRITESHEET_OT_RenderSpritesheetOperator(bpy.types.Operator):
         self._json_data[json_file_path] = json_data
         self._report_job("JSON dump", "output is at " + json_file_path, job_id, reporting_props, is_complete = True)
 
-    def _count_total_frames(self, material_sets: List[MaterialSetPropertyGroup], rotations: List[int], animation_sets: List[Optional[AnimationSetPropertyGroup]]) -> int:
+    def _choose_sheet_layout(self, props: SpritesheetPropertyGroup, reporting_props: ReportingPropertyGroup, total_num_frames: int, group_sizes: Optional[List[int]]) -> Dict[str, Any]:
+        job_id = self._get_next_job_id()
+        cell_size = (props.sprite_size[0] + 2 * props.sprite_gutter, props.sprite_size[1] + 2 * props.sprite_gutter)
+
+        layout = SheetLayout.choose_layout(total_num_frames, cell_size, props.pad_output_to_power_of_two, props.force_image_to_square, group_sizes, props.optimize_sheet_layout)
+        final_size = layout["finalSize"]
+        default_size = layout["defaultFinalSize"]
+
+        layout_str = f"{layout['numColumns']}x{layout['numRows']} grid with final size {final_size[0]}x{final_size[1]}"
+
+        if final_size == default_size:
+            self._report_job("Sheet layout", f"using {layout_str}", job_id, reporting_props, is_complete = True)
+        else:
+            # Report savings in terms of uncompressed 8-bit RGBA, which is what the sheet will occupy once loaded into memory
+            bytes_saved = 4 * (default_size[0] * default_size[1] - final_size[0] * final_size[1])
+            self._report_job("Sheet layout", f"using {layout_str} instead of {default_size[0]}x{default_size[1]}, saving {StringUtil.format_number(bytes_saved / (1024 * 1024), 2)} MB of uncompressed texture memory",
+                             job_id, reporting_props, is_complete = True)
+
+        return layout
+
+    def _compressed_file_names(self, props: SpritesheetPropertyGroup, image_path: str) -> Dict[str, str]:
+        return { texture_format: os.path.basename(TextureCompression.container_file_path(image_path, texture_format)) for texture_format in sorted(props.block_compression_formats) }
+
+    def _scaled_file_data(self, props: SpritesheetPropertyGroup, image_path: str) -> List[Dict[str, Any]]:
+        return [{
+            "scale": 1 / factor,
+            "file": os.path.basename(ImageOps.downscaled_file_path(image_path, factor)),
+            "spriteWidth": props.sprite_size[0] // factor,
+            "spriteHeight": props.sprite_size[1] // factor,
+            "gutterSize": props.sprite_gutter // factor
+        } for factor in props.get_downscale_factors()]
+
+    def _count_total_frames(self, spec: "JobSpec.JobSpec") -> int:
         total_frames_across_actions = 0
 
-        for animation_set in animation_sets:
+        for animation_set in spec.animation_sets:
             if animation_set is None:
                 total_frames_across_actions += 1
             else:
-                total_frames_across_actions += animation_set.get_frame_data().num_output_frames
+                total_frames_across_actions += len(animation_set.frames)
+
+        return total_frames_across_actions * len(spec.material_sets) * len(spec.rotations)
+
+    def _encode_png_in_parallel(self, props: SpritesheetPropertyGroup, reporting_props: ReportingPropertyGroup, image_path: str, image: Tuple[int, int, bytes]):
+        job_id = self._get_next_job_id()
+        self._report_job("PNG encoding", f"compressing output image at level {props.png_compression_level}", job_id, reporting_props)
 
-        return total_frames_across_actions * len(material_sets) * len(rotations)
+        width, height, pixels = image
+        PngEncoder.write_rgba_png(image_path, width, height, pixels, props.png_compression_level, props.png_encoding_threads)
 
-    def _format_string_for_filename(self, string: str) -> str:
-        # TODO this should strip characters that aren't legal on the file system
-        return string.replace(' ', '_').replace('/', '_').replace('(', '').replace(')', '').lower()
+        self._report_job("PNG encoding", f"wrote {StringUtil.format_number(os.path.getsize(image_path) / (1024 * 1024), 2)} MB image of size {width}x{height}", job_id, reporting_props, is_complete = True)
 
     def _get_next_job_id(self) -> int:
         self._next_job_id += 1
         return self._next_job_id
 
-    def _next_power_of_two(self, val: int) -> int:
-        """Returns the smallest power of two which is equal to or greater than val"""
-        return 1 if val == 0 else 2 ** math.ceil(math.log2(val))
-
-    def _optimize_camera(self, context: bpy.types.Context, rotations = None, animation_sets: List[Optional[AnimationSetPropertyGroup]] = None,
-                         current_animation_set: Optional[AnimationSetPropertyGroup] = None, current_rotation: Optional[int] = None, report_job: bool = True):
+    def _plan_camera(self, context: bpy.types.Context, spec: "JobSpec.JobSpec"):
         props = context.scene.SpritesheetPropertyGroup
         reporting_props = context.scene.ReportingPropertyGroup
 
-        if not props.camera_options.control_camera:
-            raise RuntimeError("_optimizeCamera called without control_camera option enabled")
-
         job_id = self._get_next_job_id()
-        job_title = "Optimizing camera"
+        self._report_job("Camera plan", "finding camera parameters for every frame of the render", job_id, reporting_props)
+
+        animation_sets = [animation_set.property_group if animation_set else None for animation_set in spec.animation_sets]
+
+        # Only this job's planning should count towards the peak
+        CameraUtil.take_peak_memory()
+        self._camera_plan = CameraUtil.build_camera_plan(context, list(spec.rotations), animation_sets, spec.frames_by_set(), spec.camera_control_mode)
 
-        if props.camera_options.camera_control_mode == "move_once":
-            if report_job:
-                self._report_job(job_title, "finding parameters to cover the entire render", job_id, reporting_props)
+        for failure in CameraUtil.take_worker_failures():
+            self._report_job("Camera plan", failure, job_id, reporting_props, is_error = True)
 
-            CameraUtil.optimize_for_all_frames(context, rotations, animation_sets)
-        elif props.camera_options.camera_control_mode == "move_each_frame":
-            if report_job:
-                self._report_job(job_title, "finding parameters to cover the current frame", job_id, reporting_props)
+        peak_memory = CameraUtil.take_peak_memory()
 
-            CameraUtil.fit_camera_to_targets(context)
-        elif props.camera_options.camera_control_mode == "move_each_animation":
-            if report_job:
-                self._report_job(job_title, "finding parameters to cover the current animation", job_id, reporting_props)
+        if props.camera_options.export_camera_plan:
+            plan_file_path = os.path.join(os.path.dirname(spec.output_base_path), "camera_plan.json")
 
-            CameraUtil.optimize_for_animation_set(context, current_animation_set)
-        elif props.camera_options.camera_control_mode == "move_each_rotation":
-            if report_job:
-                self._report_job(job_title, "finding parameters to cover the current rotation angle", job_id, reporting_props)
+            with open(plan_file_path, "w") as f:
+                json.dump(self._camera_plan.to_json([animation_set.name if animation_set else None for animation_set in spec.animation_sets]), f, indent = "\t")
 
-            CameraUtil.optimize_for_rotation(context, current_rotation, animation_sets)
+        plan_text = f"computed {len(self._camera_plan.entries)} camera position(s) for control mode '{self._camera_plan.control_mode}'"
 
-        complete_msg = f"Camera will render from {StringUtil.format_number(props.camera_options.render_camera_obj.location)}, with an ortho_scale of {StringUtil.format_number(props.camera_options.render_camera.ortho_scale)}"
+        if self._camera_plan.num_frames_bounded < self._camera_plan.num_frames_total:
+            num_saved = self._camera_plan.num_frames_total - self._camera_plan.num_frames_bounded
+            plan_text += f" from {self._camera_plan.num_frames_bounded} sampled frame(s), saving {num_saved} evaluation(s)"
 
-        if report_job:
-            self._report_job(job_title, complete_msg, job_id, reporting_props, is_complete = True)
+        # Nothing is measured when every frame's bounds came from the cache, the workers or another bounds source
+        if peak_memory > 0:
+            plan_text += f", holding at most {StringUtil.format_number(peak_memory / (1024 * 1024), 2)} MB of vertex data at once"
+
+        self._report_job("Camera plan", plan_text, job_id, reporting_props, is_complete = True)
+
+    def _apply_camera_plan(self, context: bpy.types.Context, rotation: Optional[int] = None, animation_set_index: Optional[int] = None, frame: Optional[int] = None):
+        props = context.scene.SpritesheetPropertyGroup
+        self._camera_plan.apply(props.camera_options.render_camera, props.camera_options.render_camera_obj, rotation, animation_set_index, frame)
 
     def _perform_ending_sanity_checks(self, num_expected_json_files: int, reporting_props: ReportingPropertyGroup) -> bool:
         job_id = self._get_next_job_id()
@@ -661,6 +770,12 @@ class SPRITESHEET_OT_RenderSpritesheetOperator(bpy.types.Operator):
             if "imageFile" in data:
                 expected_files.append(data["imageFile"])
 
+            if "compressedImageFiles" in data:
+                expected_files.extend(data["compressedImageFiles"].values())
+
+            if "scaledImageFiles" in data:
+                expected_files.extend(scaled["file"] for scaled in data["scaledImageFiles"])
+
             if "materialData" in data:
                 if len(expected_files) != 0:
                     msg = "JSON should not have both 'imageFile' and 'materialData' keys"
@@ -670,6 +785,8 @@ class SPRITESHEET_OT_RenderSpritesheetOperator(bpy.types.Operator):
 
                 for material_data in data["materialData"]:
                     expected_files.append(material_data["file"])
+                    expected_files.extend(material_data.get("compressedFiles", {}).values())
+                    expected_files.extend(scaled["file"] for scaled in material_data.get("scaledFiles", []))
 
             for file_path in expected_files:
                 abs_path = os.path.join(self._output_dir, file_path)
@@ -684,6 +801,35 @@ class SPRITESHEET_OT_RenderSpritesheetOperator(bpy.types.Operator):
         self._terminal_writer.indent -= 1
         return True
 
+    def _prewarm_shaders(self, context: bpy.types.Context, material_sets: Tuple[Optional["JobSpec.MaterialSetSpec"], ...]) -> Generator[None, None, None]:
+        """Renders each material set once at a tiny size, so that its shaders are compiled before any frames are timed or written.
+
+        Eevee compiles each material the first time it's drawn, no matter the resolution, so a render a few pixels across is enough to
+        warm it up. A fixed size is used rather than a low resolution percentage, which would round small sprites down to nothing."""
+        scene = context.scene
+        reporting_props = scene.ReportingPropertyGroup
+
+        job_id = self._get_next_job_id()
+        self._report_job("Shader warm-up", f"compiling shaders for {len(material_sets)} material set(s)", job_id, reporting_props)
+
+        previous_resolution = (scene.render.resolution_x, scene.render.resolution_y, scene.render.resolution_percentage)
+
+        for attr, value in (("resolution_x", _PREWARM_RESOLUTION), ("resolution_y", _PREWARM_RESOLUTION), ("resolution_percentage", 100)):
+            SceneSnapshot.set_value(scene.render, attr, value)
+
+        for material_set in material_sets:
+            if material_set is not None:
+                material_set.property_group.assign_materials_to_targets(context, material_set.use_material_override)
+
+            with utils.close_stdout():
+                bpy.ops.render.render()
+
+            yield
+
+        for attr, value in zip(("resolution_x", "resolution_y", "resolution_percentage"), previous_resolution):
+            SceneSnapshot.set_value(scene.render, attr, value)
+        self._report_job("Shader warm-up", f"compiled shaders for {len(material_sets)} material set(s)", job_id, reporting_props, is_complete = True)
+
     def _progress_bar(self, title: str, numerator: int, denominator: int, width: int = None, show_percentage: bool = True, show_numbers: bool = True, numbers_label: str = "") -> str:
         numbers_label = " " + numbers_label if numbers_label else ""
         numbers_display = f"({numerator}/{denominator}{numbers_label}) " if show_numbers else ""
@@ -703,49 +849,53 @@ class SPRITESHEET_OT_RenderSpritesheetOperator(bpy.types.Operator):
 
         return text_prefix + bar_string
 
-    def _render_animation_set(self, context: bpy.types.Context, animation_set: AnimationSetPropertyGroup, rotation: Optional[int], temp_dir_path: str) -> Generator[None, None, Dict[str, Any]]:
+    def _render_animation_set(self, context: bpy.types.Context, animation_set: "JobSpec.AnimationSetSpec", rotation: Optional[int], temp_dir_path: str) -> Generator[None, None, Dict[str, Any]]:
         scene = context.scene
-        props = scene.SpritesheetPropertyGroup
         reporting_props = scene.ReportingPropertyGroup
+        spec = self._job_spec
+        animation_set_index = animation_set.index
 
-        animation_set.assign_actions_to_targets()
+        animation_set.property_group.assign_actions_to_targets()
 
         action_data = {
             "animation_set": animation_set,
+            "filePaths": [],
             "frameData": [],
             "rotation": rotation
         }
 
-        if props.camera_options.control_camera and props.camera_options.camera_control_mode == "move_each_animation":
-            self._optimize_camera(context, current_animation_set = animation_set)
+        if spec.camera_control_mode == "move_each_animation":
+            self._apply_camera_plan(context, rotation = rotation, animation_set_index = animation_set_index)
 
         # Go frame-by-frame and render the object
         job_id = self._get_next_job_id()
         rendered_frames = 0
-        frames_to_render = animation_set.get_frames_to_render()
-        num_digits_in_frame_max = int(math.log10(frames_to_render[-1])) + 1
+        frames_to_render = animation_set.frames
 
-        for frame_num in frames_to_render:
-            text = f"({rendered_frames + 1}/{len(frames_to_render)})"
-            self._report_job("Rendering frames", text, job_id, reporting_props)
+        # Order of properties in filename is important; they need to sort lexicographically
+        # in such a way that sequential frames naturally end up sequential in the sorted file list,
+        # no matter what configuration options we're using
+        filename_prefix = animation_set.name + "_"
 
-            # Order of properties in filename is important; they need to sort lexicographically
-            # in such a way that sequential frames naturally end up sequential in the sorted file list,
-            # no matter what configuration options we're using
-            filename = animation_set.name + "_"
+        if spec.control_rotation:
+            filename_prefix += "rot" + str(rotation).zfill(3) + "_"
 
-            if props.rotation_options.control_rotation:
-                filename += "rot" + str(rotation).zfill(3) + "_"
-
-            filename += str(frame_num).zfill(num_digits_in_frame_max)
+        for frame_num, frame_label in zip(frames_to_render, animation_set.frame_labels):
+            text = f"({rendered_frames + 1}/{len(frames_to_render)})"
+            self._report_job("Rendering frames", text, job_id, reporting_props)
 
-            filepath = os.path.join(temp_dir_path, filename)
+            filepath = os.path.join(temp_dir_path, filename_prefix + frame_label)
 
             if frame_num == frames_to_render[0]:
                 action_data["firstFrameFilepath"] = filepath + ".png"
 
+            action_data["filePaths"].append(filepath + ".png")
+
             scene.frame_set(frame_num)
-            scene.render.filepath = filepath
+            SceneSnapshot.set_value(scene.render, "filepath", filepath)
+
+            if spec.camera_control_mode == "move_each_frame":
+                self._apply_camera_plan(context, rotation = rotation, animation_set_index = animation_set_index, frame = frame_num)
 
             self._run_render_without_stdout(context)
             rendered_frames += 1
@@ -758,15 +908,15 @@ class SPRITESHEET_OT_RenderSpritesheetOperator(bpy.types.Operator):
 
         yield action_data
 
-    def _render_still(self, context: bpy.types.Context, rotation_angle: int, frame_number: int, temp_dir_path: str) -> Dict[str, Any]:
+    def _render_still(self, context: bpy.types.Context, animation_set_index: int, rotation_angle: int, frame_number: int, temp_dir_path: str) -> Dict[str, Any]:
         # Renders a single frame
         scene = context.scene
-        props = scene.SpritesheetPropertyGroup
         reporting_props = scene.ReportingPropertyGroup
+        spec = self._job_spec
 
         filename = "out_still_" + str(frame_number).zfill(4)
 
-        if props.rotation_options.control_rotation:
+        if spec.control_rotation:
             filename += "_rot" + str(rotation_angle).zfill(3)
 
         filename += ".png"
@@ -780,7 +930,11 @@ class SPRITESHEET_OT_RenderSpritesheetOperator(bpy.types.Operator):
         job_id = self._get_next_job_id()
         self._report_job("Single frame", "rendering", job_id, reporting_props)
 
-        scene.render.filepath = filepath
+        SceneSnapshot.set_value(scene.render, "filepath", filepath)
+
+        if spec.camera_control_mode == "move_each_frame":
+            self._apply_camera_plan(context, rotation = rotation_angle, animation_set_index = animation_set_index)
+
         self._run_render_without_stdout(context)
 
         self._report_job("Single frame", "rendered successfully", job_id, reporting_props, is_complete = True)
@@ -848,75 +1002,127 @@ class SPRITESHEET_OT_RenderSpritesheetOperator(bpy.types.Operator):
         When saving a rendered image, usually Blender outputs a message like 'Saved <filepath> ...', which clogs the output.
         This method renders without that message being printed."""
 
-        props = context.scene.SpritesheetPropertyGroup
         reporting_props = context.scene.ReportingPropertyGroup
 
-        if props.camera_options.control_camera and props.camera_options.camera_control_mode == "move_each_frame":
-            # Don't report job because this method is always being called inside of another job
-            self._optimize_camera(context, report_job = False)
-
         with utils.close_stdout():
             bpy.ops.render.render(write_still = True)
 
         reporting_props.current_frame_num += 1
 
-    def _run_image_magick(self, props: SpritesheetPropertyGroup, reporting_props: ReportingPropertyGroup, material_set_index: int, animation_set: AnimationSetPropertyGroup,
-                          total_num_frames: int, temp_dir_path: str, rotation_angle: int) -> Dict[str, Any]:
+    def _run_image_magick(self, props: SpritesheetPropertyGroup, reporting_props: ReportingPropertyGroup, material_set: Optional["JobSpec.MaterialSetSpec"], animation_set: Optional["JobSpec.AnimationSetSpec"],
+                          total_num_frames: int, temp_dir_path: str, rotation_angle: int, render_data: List[Dict[str, Any]]) -> Dict[str, Any]:
+        # Animations can only be aligned to rows when every entry in the sheet is an animation, not a still
+        file_groups = None
+        group_sizes = None
+        if props.align_animations_to_rows and all("numFrames" in data for data in render_data):
+            # Each animation's own files, in render order; sorting the file names would order them by set name instead
+            file_groups = [data["filePaths"] for data in render_data]
+            group_sizes = [len(group) for group in file_groups]
+
+        layout = self._choose_sheet_layout(props, reporting_props, total_num_frames, group_sizes)
+
         job_id = self._get_next_job_id()
         self._report_job("ImageMagick", f"Combining {total_num_frames} frames into spritesheet with ImageMagick", job_id, reporting_props)
 
-        output_file_path = self._create_file_path(props, material_set_index, animation_set, rotation_angle, include_material_set = props.material_options.control_materials) + ".png"
-        image_magick_output = ImageMagick.assemble_frames_into_spritesheet(props.sprite_size, total_num_frames, temp_dir_path, output_file_path)
+        # Padding and squaring happen in the same ImageMagick process as combining the frames, so work out their target sizes up front
+        image_size = (layout["numColumns"] * (props.sprite_size[0] + 2 * props.sprite_gutter), layout["numRows"] * (props.sprite_size[1] + 2 * props.sprite_gutter))
+        padded_size = (SheetLayout.next_power_of_two(image_size[0]), SheetLayout.next_power_of_two(image_size[1])) if props.pad_output_to_power_of_two else image_size
+        square_size = max(padded_size) if props.force_image_to_square else None
+
+        # When encoding in parallel, ImageMagick doesn't need to write a PNG at all; we take its pixels and encode them ourselves
+        needs_pixels = props.use_parallel_png_encoding or bool(props.block_compression_formats) or bool(props.downscaled_sheets)
+
+        output_file_path = self._job_spec.output_file_path(material_set, animation_set, rotation_angle) + ".png"
+        image_magick_output = ImageMagick.assemble_frames_into_spritesheet(self._job_spec.sprite_size, total_num_frames, temp_dir_path, output_file_path, props.png_compression_level, props.png_encoding_threads,
+                                                                           props.sprite_gutter, layout, file_groups, padded_size if padded_size != image_size else None, square_size,
+                                                                           write_png = not props.use_parallel_png_encoding, read_pixels = needs_pixels)
 
         if not image_magick_output["succeeded"]:
             self._error = str(image_magick_output["stderr"]).replace("\\n", "\n").replace("\\r", "\r")
             self._report_job("ImageMagick", self._error, job_id, reporting_props, is_error = True)
-        else:
-            self._report_job("ImageMagick", f"output file is at {output_file_path}", job_id, reporting_props, is_complete = True)
+            return image_magick_output
+
+        self._report_job("ImageMagick", f"output file is at {output_file_path}", job_id, reporting_props, is_complete = True)
 
         if props.pad_output_to_power_of_two:
             job_id = self._get_next_job_id()
-            image_size = image_magick_output["args"]["outputImageSize"]
-            target_size = (self._next_power_of_two(image_size[0]), self._next_power_of_two(image_size[1]))
-            target_size_str = "{}x{}".format(target_size[0], target_size[1])
+            target_size_str = f"{padded_size[0]}x{padded_size[1]}"
 
-            image_magick_output["args"]["outputImageSize"] = target_size
+            image_magick_output["args"]["outputImageSize"] = padded_size
 
-            if target_size == image_size:
-                self._report_job("ImageMagick", "Padding not necessary; image output size {} is already power-of-two".format(target_size_str), job_id, reporting_props, is_skipped = True)
+            if padded_size == image_size:
+                self._report_job("ImageMagick", f"Padding not necessary; image output size {target_size_str} is already power-of-two", job_id, reporting_props, is_skipped = True)
             else:
-                self._report_job("ImageMagick", f"Padding output image to power-of-two size {target_size_str}", job_id, reporting_props)
-                ImageMagick.pad_image_to_size(image_magick_output["args"]["outputFilePath"], target_size)
-                self._report_job("ImageMagick", f"Output image successfully padded to power-of-two size {target_size_str} from {image_size[0]}x{image_size[1]}", job_id, reporting_props, is_complete = True)
+                self._report_job("ImageMagick", f"Output image padded to power-of-two size {target_size_str} from {image_size[0]}x{image_size[1]}", job_id, reporting_props, is_complete = True)
 
                 # Record padding in JSON for tool integration
-                padding_amount = (target_size[0] - image_size[0], target_size[1] - image_size[1])
+                padding_amount = (padded_size[0] - image_size[0], padded_size[1] - image_size[1])
                 image_magick_output["args"]["padding"] = padding_amount
 
         if props.force_image_to_square:
             job_id = self._get_next_job_id()
-            image_size = image_magick_output["args"]["outputImageSize"]
-            max_dim = max(image_size)
-            target_size = (max_dim, max_dim)
-            target_size_str = f"{max_dim}x{max_dim}"
+            image_magick_output["args"]["outputImageSize"] = (square_size, square_size)
+
+            self._report_job("ImageMagick", f"Output image trimmed and resized to square size {square_size}x{square_size} from {padded_size[0]}x{padded_size[1]}", job_id, reporting_props, is_complete = True)
+
+        if needs_pixels:
+            image = image_magick_output["pixels"]
+
+            if props.use_parallel_png_encoding:
+                self._encode_png_in_parallel(props, reporting_props, image_magick_output["args"]["outputFilePath"], image)
 
-            image_magick_output["args"]["outputImageSize"] = target_size
+            if props.downscaled_sheets:
+                self._write_downscaled_sheets(props, reporting_props, image_magick_output, image)
 
-            # Unlike padding to power-of-two, we can't check the current size, because it could include transparency to trim
-            self._report_job("ImageMagick", f"Forcing output image to square size {target_size_str}", job_id, reporting_props)
-            ImageMagick.trim_and_resize_image_ignore_aspect(image_magick_output["args"]["outputFilePath"], target_size)
-            self._report_job("ImageMagick", f"Output image successfully trimmed and resized to square size {target_size_str} from {image_size[0]}x{image_size[1]}", job_id, reporting_props, is_complete = True)
+            if props.block_compression_formats:
+                self._write_compressed_textures(props, reporting_props, image_magick_output, image)
 
         return image_magick_output
 
+    def _write_compressed_textures(self, props: SpritesheetPropertyGroup, reporting_props: ReportingPropertyGroup, image_magick_output: Dict[str, Any], image: Tuple[int, int, bytes]):
+        image_path = image_magick_output["args"]["outputFilePath"]
+        image_magick_output["args"]["compressedTextures"] = {}
+
+        levels = ImageOps.mip_chain(image) if props.generate_mipmaps else [image]
+        image_magick_output["args"]["mipLevels"] = [(width, height) for width, height, _ in levels]
+
+        for texture_format in sorted(props.block_compression_formats):
+            job_id = self._get_next_job_id()
+            format_name = texture_format.upper()
+            texture_path = TextureCompression.container_file_path(image_path, texture_format)
+
+            self._report_job("GPU texture", f"encoding {format_name}", job_id, reporting_props)
+            metrics = TextureCompression.write_compressed_texture(texture_path, levels, texture_format)
+            image_magick_output["args"]["compressedTextures"][texture_format] = texture_path
+
+            self._report_job("GPU texture", f"{format_name} output with {len(levels)} mip level(s) is at {texture_path} (RMSE {metrics['rmse']:.2f}, PSNR {metrics['psnr']:.1f} dB, max error {metrics['maxError']:.0f})",
+                             job_id, reporting_props, is_complete = True)
+
+    def _write_downscaled_sheets(self, props: SpritesheetPropertyGroup, reporting_props: ReportingPropertyGroup, image_magick_output: Dict[str, Any], image: Tuple[int, int, bytes]):
+        image_path = image_magick_output["args"]["outputFilePath"]
+        num_threads = props.png_encoding_threads if props.use_parallel_png_encoding else 1
+
+        for factor in props.get_downscale_factors():
+            job_id = self._get_next_job_id()
+            scaled_path = ImageOps.downscaled_file_path(image_path, factor)
+
+            self._report_job("Downscaled sheet", f"filtering spritesheet to {1 / factor:g}x scale", job_id, reporting_props)
+            width, height, pixels = ImageOps.downscale(image, factor)
+            PngEncoder.write_rgba_png(scaled_path, width, height, pixels, props.png_compression_level, num_threads)
+            self._report_job("Downscaled sheet", f"{width}x{height} output is at {scaled_path}", job_id, reporting_props, is_complete = True)
+
     def _set_render_settings(self, context: bpy.types.Context):
         scene = context.scene
         props = scene.SpritesheetPropertyGroup
 
-        scene.cycles.pixel_filter_type = 'BOX'
-        scene.render.image_settings.file_format = 'PNG'
-        scene.render.image_settings.color_mode = 'RGBA'
-        scene.render.film_transparent = True  # Transparent PNG
-        scene.render.bake_margin = 0
-        scene.render.resolution_x = props.sprite_size[0]
-        scene.render.resolution_y = props.sprite_size[1]
\ No newline at end of file
+        SceneSnapshot.set_value(scene.cycles, "pixel_filter_type", 'BOX')
+        SceneSnapshot.set_value(scene.render.image_settings, "file_format", 'PNG')
+        SceneSnapshot.set_value(scene.render.image_settings, "color_mode", 'RGBA')
+        SceneSnapshot.set_value(scene.render, "film_transparent", True) # Transparent PNG
+
+        # Per-frame images are only read back once by ImageMagick and then deleted
+        if not props.compress_intermediate_frames:
+            SceneSnapshot.set_value(scene.render.image_settings, "compression", 0)
+        SceneSnapshot.set_value(scene.render, "bake_margin", 0)
+        SceneSnapshot.set_value(scene.render, "resolution_x", props.sprite_size[0])
+        SceneSnapshot.set_value(scene.render, "resolution_y", props.sprite_size[1])
\ No newline at end of file
@@ -13,6 +13,17 @@ class SPRITESHEET_UL_AnimationActionPropertyList(bpy.types.UIList):
         last_frame_offset = -1 if item.action and data.last_frame_usage == "force_exclude" else 0
         sub.label(text = f"Frames {item.min_frame}-{item.max_frame + last_frame_offset}" if item.action else " ")
 
+class SPRITESHEET_UL_AnimationSetPropertyList(bpy.types.UIList):
+    def draw_item(self, context, layout, data, item, icon, active_data, active_propname, index):
+        #pylint: disable=unused-argument,no-self-use
+
+        # Only the rows which are scrolled into view are drawn, so it's fine for this to read the set's actions
+        layout.prop(item, "name", text = "", emboss = False, icon = "ACTION")
+
+        sub = layout.column()
+        sub.alignment = "RIGHT"
+        sub.label(text = f"{len(item.actions)} action(s)")
+
 class SPRITESHEET_UL_CameraTargetPropertyList(bpy.types.UIList):
     def draw_item(self, context, layout, data, item, icon, active_data, active_propname, index):
         #pylint: disable=unused-argument,no-self-use
@@ -33,6 +44,16 @@ class SPRITESHEET_UL_MaterialSetTargetPropertyList(bpy.types.UIList):
         sub.enabled = data.mode == "individual" # fade out shared material name for clarity that this won't be modifiable per-row
         sub.label(text = material_name, icon = "MATERIAL")
 
+class SPRITESHEET_UL_MaterialSetPropertyList(bpy.types.UIList):
+    def draw_item(self, context, layout, data, item, icon, active_data, active_propname, index):
+        #pylint: disable=unused-argument,no-self-use
+
+        layout.prop(item, "name", text = "", emboss = False, icon = "MATERIAL")
+
+        sub = layout.column()
+        sub.alignment = "RIGHT"
+        sub.label(text = f"{len(item.materials)} target(s)")
+
 class SPRITESHEET_UL_RotationTargetPropertyList(bpy.types.UIList):
     def draw_item(self, context, layout, data, item, icon, active_data, active_propname, index):
         #pylint: disable=unused-argument,no-self-use
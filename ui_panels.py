@@ -147,32 +147,48 @@ class SPRITESHEET_PT_AnimationsPanel(BaseAddonPanel, bpy.types.Panel):
         props = context.scene.SpritesheetPropertyGroup
 
         self.layout.active = props.animation_options.control_animations
-        self.layout.operator("spritesheet.add_animation_set", text = "Add Animation Set", icon = "ADD")
 
-class SPRITESHEET_PT_AnimationSetPanel():
-    # See SPRITESHEET_PT_MaterialSetPanel for why this has no parent types
+        # Lists only draw the rows which are scrolled into view, and can be filtered by name, so this stays fast however many sets there are
+        self.template_list(context,
+                           self.layout,
+                           "SPRITESHEET_UL_AnimationSetPropertyList", # Class name
+                           "", # List ID (blank to generate)
+                           props.animation_options, # List items property source
+                           "animation_sets", # List items property name
+                           props.animation_options, # List index property source
+                           "selected_animation_set_index", # List index property name
+                           min_rows = 4,
+                           add_op = "spritesheet.add_animation_set",
+                           remove_op = ("spritesheet.remove_animation_set", { "index": props.animation_options.selected_animation_set_index })
+        )
+
+class SPRITESHEET_PT_AnimationSetPanel(BaseAddonPanel, bpy.types.Panel):
+    """Shows the animation set which is selected in SPRITESHEET_PT_AnimationsPanel's list. Only that one set is ever drawn."""
+    bl_idname = "SPRITESHEET_PT_animationset"
     bl_label = "" # hidden; see draw_header
-    bl_parent_id = "SPRITESHEET_PT_animations"
+    bl_options = set()
 
-    index = 0
+    @classmethod
+    def preregister(cls):
+        super().preregister()
+
+        # Unlike the other panels, this is always nested, no matter where the addon is displayed
+        cls.bl_parent_id = "SPRITESHEET_PT_animations"
 
     @classmethod
     def poll(cls, context):
         props = context.scene.SpritesheetPropertyGroup
 
-        return cls.index < len(props.animation_options.animation_sets)
-
-    @classmethod
-    def create_sub_panel(cls, index):
-        UIUtil.create_panel_type(cls, index)
+        return props.animation_options.selected_animation_set_index < len(props.animation_options.animation_sets)
 
     def draw_header(self, context):
         props = context.scene.SpritesheetPropertyGroup
-        animation_set = props.animation_options.animation_sets[self.index]
+        index = props.animation_options.selected_animation_set_index
+        animation_set = props.animation_options.animation_sets[index]
 
         self.layout.enabled = props.animation_options.control_animations
         self.layout.use_property_split = True
-        self.layout.prop(animation_set, "name", text = f"Animation Set {self.index + 1}")
+        self.layout.prop(animation_set, "name", text = f"Animation Set {index + 1}")
 
         frames = animation_set.get_frames_to_render()
         if len(frames) > 0:
@@ -187,16 +203,17 @@ class SPRITESHEET_PT_AnimationSetPanel():
 
     def draw(self, context):
         props = context.scene.SpritesheetPropertyGroup
-        animation_set = props.animation_options.animation_sets[self.index]
+        index = props.animation_options.selected_animation_set_index
+        animation_set = props.animation_options.animation_sets[index]
 
         add_op = ("spritesheet.modify_animation_set", {
-            "animation_set_index": self.index,
+            "animation_set_index": index,
             "operation": "add_action"
         })
 
         remove_op = ("spritesheet.modify_animation_set", {
             "action_index": animation_set.selected_action_index,
-            "animation_set_index": self.index,
+            "animation_set_index": index,
             "operation": "remove_action"
         })
 
@@ -209,12 +226,12 @@ class SPRITESHEET_PT_AnimationSetPanel():
         self.layout.enabled = props.animation_options.control_animations
 
         row = self.layout.row(align = True)
-        row.operator("spritesheet.remove_animation_set", text = "Remove Set", icon = "REMOVE").index = self.index
+        row.operator("spritesheet.remove_animation_set", text = "Remove Set", icon = "REMOVE").index = index
 
         if context.screen.is_animation_playing and animation_set.is_previewing:
             row.operator("screen.animation_cancel", text = "Pause Playback", icon = "PAUSE").restore_frame = False
         else:
-            row.operator("spritesheet.play_animation_set", text = "Play in Viewport", icon = "PLAY").index = self.index
+            row.operator("spritesheet.play_animation_set", text = "Play in Viewport", icon = "PLAY").index = index
 
         self.layout.separator()
 
@@ -272,6 +289,37 @@ class SPRITESHEET_PT_CameraPanel(BaseAddonPanel, bpy.types.Panel):
         self.layout.active = props.camera_options.control_camera
         self.layout.prop_search(props.camera_options, "render_camera", bpy.data, "cameras")
         self.layout.prop(props.camera_options, "camera_control_mode")
+        self.layout.prop(props.camera_options, "export_camera_plan")
+
+        row = self.layout.row(align = True)
+        row.prop(props.camera_options, "cache_target_bounds")
+        row.operator("spritesheet.clear_bounds_cache", text = "", icon = "TRASH")
+
+        self.layout.prop(props.camera_options, "bounds_source")
+
+        silhouette_col = self.layout.column()
+        silhouette_col.active = props.camera_options.bounds_source == "silhouette"
+        silhouette_col.prop(props.camera_options, "silhouette_resolution")
+
+        self.layout.prop(props.camera_options, "bounds_worker_count")
+        self.layout.prop(props.camera_options, "bounds_memory_budget")
+        self.layout.prop(props.camera_options, "sample_bounds")
+
+        sampling_col = self.layout.column()
+        sampling_col.active = props.camera_options.sample_bounds and props.camera_options.camera_control_mode != "move_each_frame"
+        sampling_col.prop(props.camera_options, "bounds_sample_stride")
+
+        self.layout.prop(props.camera_options, "simplify_bounds_evaluation")
+
+        simplify_col = self.layout.column()
+        simplify_col.active = props.camera_options.simplify_bounds_evaluation
+        simplify_col.prop(props.camera_options, "bounds_simplify_subdivision")
+
+        self.layout.prop(props.camera_options, "use_bone_envelopes")
+
+        margin_col = self.layout.column()
+        margin_col.active = props.camera_options.sample_bounds or props.camera_options.simplify_bounds_evaluation
+        margin_col.prop(props.camera_options, "bounds_safety_margin")
 
         self.layout.separator()
 
@@ -310,6 +358,9 @@ class SPRITESHEET_PT_JobManagementPanel(BaseAddonPanel, bpy.types.Panel):
     bl_label = "Job Management"
     bl_options = set() # override parent's DEFAULT_CLOSED
 
+    # Searching for ImageMagick can be slow, so rather than when Blender starts, it's done the first time the panel shows that it's needed
+    _has_tried_locating_image_magick = False
+
     def draw(self, context):
         reporting_props = context.scene.ReportingPropertyGroup
 
@@ -369,9 +420,20 @@ class SPRITESHEET_PT_JobManagementPanel(BaseAddonPanel, bpy.types.Panel):
 
             if "imagemagick" in reason_lower:
                 box.operator("spritesheet.prefs_locate_imagemagick", text = "Locate Automatically")
+
+                if not SPRITESHEET_PT_JobManagementPanel._has_tried_locating_image_magick:
+                    SPRITESHEET_PT_JobManagementPanel._has_tried_locating_image_magick = True
+
+                    # Operators can't be called while drawing, so do it on a very brief, trigger-once timer
+                    bpy.app.timers.register(_locate_image_magick, first_interval = 0.05, persistent = False)
         elif "orthographic" in reason_lower:
             box.operator("spritesheet.configure_render_camera", text = f"Make Camera \"{props.camera_options.render_camera.name}\" Ortho")
 
+def _locate_image_magick():
+    # The path may have been set while waiting for the timer
+    if not preferences.PrefsAccess.image_magick_path:
+        bpy.ops.spritesheet.prefs_locate_imagemagick()
+
 class SPRITESHEET_PT_MaterialsPanel(BaseAddonPanel, bpy.types.Panel):
     bl_idname = "SPRITESHEET_PT_materials"
     bl_label = "Control Materials"
@@ -385,47 +447,59 @@ class SPRITESHEET_PT_MaterialsPanel(BaseAddonPanel, bpy.types.Panel):
         props = context.scene.SpritesheetPropertyGroup
 
         self.layout.active = props.material_options.control_materials
-        self.layout.operator("spritesheet.add_material_set", text = "Add Material Set", icon = "ADD")
-
-class SPRITESHEET_PT_MaterialSetPanel():
-    """UI Panel for material sets.
 
-    Since this panel is shown multiple times, it is instantiated as multiple sub-types, and this specific class
-    is never actually instantiated. Hence, it does not need to extend any classes like the other panels do, since
-    those will be mixed in at runtime."""
+        # See SPRITESHEET_PT_AnimationsPanel for why this is a list
+        self.template_list(context,
+                           self.layout,
+                           "SPRITESHEET_UL_MaterialSetPropertyList", # Class name
+                           "", # List ID (blank to generate)
+                           props.material_options, # List items property source
+                           "material_sets", # List items property name
+                           props.material_options, # List index property source
+                           "selected_material_set_index", # List index property name
+                           min_rows = 4,
+                           add_op = "spritesheet.add_material_set",
+                           remove_op = ("spritesheet.remove_material_set", { "index": props.material_options.selected_material_set_index })
+        )
 
+class SPRITESHEET_PT_MaterialSetPanel(BaseAddonPanel, bpy.types.Panel):
+    """Shows the material set which is selected in SPRITESHEET_PT_MaterialsPanel's list. Only that one set is ever drawn."""
+    bl_idname = "SPRITESHEET_PT_materialset"
     bl_label = "" # hidden; see draw_header
-    bl_parent_id = "SPRITESHEET_PT_materials"
+    bl_options = set()
 
-    index = 0
+    @classmethod
+    def preregister(cls):
+        super().preregister()
+
+        # Unlike the other panels, this is always nested, no matter where the addon is displayed
+        cls.bl_parent_id = "SPRITESHEET_PT_materials"
 
     @classmethod
     def poll(cls, context):
         props = context.scene.SpritesheetPropertyGroup
 
-        return cls.index < len(props.material_options.material_sets)
-
-    @classmethod
-    def create_sub_panel(cls, index):
-        UIUtil.create_panel_type(cls, index)
+        return props.material_options.selected_material_set_index < len(props.material_options.material_sets)
 
     def draw_header(self, context):
         props = context.scene.SpritesheetPropertyGroup
-        material_set = props.material_options.material_sets[self.index]
+        index = props.material_options.selected_material_set_index
+        material_set = props.material_options.material_sets[index]
 
         self.layout.enabled = props.material_options.control_materials
         self.layout.use_property_split = True
-        self.layout.prop(material_set, "name", text = f"Material Set {self.index + 1}")
+        self.layout.prop(material_set, "name", text = f"Material Set {index + 1}")
 
     def draw(self, context):
         props = context.scene.SpritesheetPropertyGroup
-        material_set = props.material_options.material_sets[self.index]
+        index = props.material_options.selected_material_set_index
+        material_set = props.material_options.material_sets[index]
 
         self.layout.enabled = props.material_options.control_materials
 
         row = self.layout.row(align = True)
-        row.operator("spritesheet.remove_material_set", text = "Remove Set", icon = "REMOVE").index = self.index
-        row.operator("spritesheet.assign_material_set", text = "Assign in Scene", icon = "HIDE_OFF").index = self.index
+        row.operator("spritesheet.remove_material_set", text = "Remove Set", icon = "REMOVE").index = index
+        row.operator("spritesheet.assign_material_set", text = "Assign in Scene", icon = "HIDE_OFF").index = index
 
         self.layout.prop(material_set, "role")
         self.layout.prop(material_set, "mode")
@@ -434,13 +508,13 @@ class SPRITESHEET_PT_MaterialSetPanel():
             self.layout.prop(material_set, "shared_material")
 
         add_op = ("spritesheet.modify_material_set", {
-            "material_set_index": self.index,
+            "material_set_index": index,
             "operation": "add_target"
         })
 
         remove_op = ("spritesheet.modify_material_set", {
             "target_index": material_set.selected_material_index,
-            "material_set_index": self.index,
+            "material_set_index": index,
             "operation": "remove_target"
         })
 
@@ -488,11 +562,19 @@ class SPRITESHEET_PT_OutputPropertiesPanel(BaseAddonPanel, bpy.types.Panel):
         self.layout.use_property_decorate = False
 
         self.layout.prop(props, "sprite_size")
+        self.layout.prop(props, "sprite_gutter")
 
         col = self.layout.column(heading = "Output Size", align = True)
         col.prop(props, "pad_output_to_power_of_two")
         col.prop(props, "force_image_to_square")
 
+        col = self.layout.column(heading = "Layout", align = True)
+        col.prop(props, "optimize_sheet_layout")
+
+        sub = col.row()
+        sub.enabled = props.animation_options.control_animations
+        sub.prop(props, "align_animations_to_rows")
+
         col = self.layout.column(heading = "Separate Files by", align = True)
 
         sub = col.row()
@@ -508,6 +590,25 @@ class SPRITESHEET_PT_OutputPropertiesPanel(BaseAddonPanel, bpy.types.Panel):
         sub.enabled = False
         sub.prop(props, "separate_files_per_material", text = "Material Set")
 
+        self.layout.separator()
+
+        col = self.layout.column(heading = "Encoding", align = True)
+        col.prop(props, "png_compression_level")
+        col.prop(props, "png_encoding_threads")
+        col.prop(props, "use_parallel_png_encoding")
+        col.prop(props, "compress_intermediate_frames")
+        col.prop(props, "prewarm_shaders")
+
+        row = self.layout.row(heading = "GPU Formats")
+        row.prop(props, "block_compression_formats")
+
+        sub = self.layout.row()
+        sub.enabled = len(props.block_compression_formats) > 0
+        sub.prop(props, "generate_mipmaps")
+
+        row = self.layout.row(heading = "Downscaled Sheets")
+        row.prop(props, "downscaled_sheets")
+
 class SPRITESHEET_PT_RotationOptionsPanel(BaseAddonPanel, bpy.types.Panel):
     bl_idname = "SPRITESHEET_PT_rotationoptions"
     bl_label = "Control Rotation"
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import math
 from mathutils import Vector
 from typing import Iterable, Optional, Tuple
 
@@ -37,17 +38,17 @@ class Bounds2D:
 
     @staticmethod
     def from_points(points: Iterable[Tuple[float, float]]) -> Bounds2D:
-        min_point = (
-            min([p[0] for p in points]),
-            min([p[1] for p in points])
-        )
+        # Single pass, so points can be a generator and never have to be held in memory all at once
+        min_x = min_y = math.inf
+        max_x = max_y = -math.inf
 
-        max_point = (
-            max([p[0] for p in points]),
-            max([p[1] for p in points])
-        )
+        for p in points:
+            min_x = min(min_x, p[0])
+            min_y = min(min_y, p[1])
+            max_x = max(max_x, p[0])
+            max_y = max(max_y, p[1])
 
-        return Bounds2D.from_min_and_max_points(min_point, max_point)
+        return Bounds2D.from_min_and_max_points(Vector((min_x, min_y)), Vector((max_x, max_y)))
 
     @staticmethod
     def from_min_and_max_points(min_point: Tuple[float, float], max_point: Tuple[float, float]) -> Bounds2D:
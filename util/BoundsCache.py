@@ -0,0 +1,289 @@
+import array
+import bpy
+import hashlib
+import json
+import os
+import tempfile
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from ..property_groups import AnimationSetPropertyGroup
+from .. import utils
+
+# (min x, min y, max x, max y) in camera space
+CachedBounds = Tuple[float, float, float, float]
+
+# Increase this whenever the fingerprint or the way bounds are calculated changes, so that older entries are never reused
+_CACHE_VERSION = 2
+
+# When more files than this are in the cache, the least recently used ones are deleted
+_MAX_CACHE_FILES = 256
+
+# Kept out of the addon's own directory, which may not be writable and is deleted whenever the addon is updated.
+# Blender only gained a user cache directory after the oldest version this addon supports, so the system's temp directory is used
+_cache_dir = os.path.join(tempfile.gettempdir(), "blender_spritesheet_renderer", "bounds_cache")
+
+class SceneFingerprint:
+    """Hashes everything the camera-space bounds of the target objects depend on, other than the current frame.
+
+    This covers the camera's orientation, the scene's Simplify settings, how the bounds are found, and for the target objects
+    and every object they depend on (see utils.find_dependencies): transforms, constraints, modifiers, drivers, mesh data
+    (including shape keys and vertex weights), armature rest poses, NLA tracks and assigned actions. Each animation set gets its own
+    fingerprint, so changing one set's actions only invalidates that set. Anything a driver reads from outside of these
+    objects isn't tracked.
+
+    If exclude_rotation is true, the Z rotation of rotation targets is left out, because every cached entry is already
+    keyed by the angle the targets were rotated to."""
+
+    def __init__(self, scene: bpy.types.Scene, camera_obj: bpy.types.Object, meshes: List[bpy.types.Object], rotation_targets: Set[str], exclude_rotation: bool):
+        self._action_digests: Dict[str, bytes] = {}
+        self._objects = utils.find_dependencies(meshes)
+
+        hasher = hashlib.blake2b(digest_size = 16)
+        _update(hasher, _CACHE_VERSION, tuple(bpy.app.version), tuple(camera_obj.rotation_euler))
+
+        # Simplified bounds are close to, but not the same as, the full ones
+        _update(hasher, scene.render.use_simplify, scene.render.simplify_subdivision)
+
+        # Bone envelopes and silhouettes give looser bounds than the deformed mesh
+        camera_options = scene.SpritesheetPropertyGroup.camera_options
+        _update(hasher, camera_options.use_bone_envelopes, camera_options.bounds_source, camera_options.silhouette_resolution)
+
+        for obj in self._objects:
+            _hash_object(hasher, obj, exclude_z_rotation = exclude_rotation and obj.name in rotation_targets)
+
+        self._static_digest = hasher.digest()
+
+    def for_animation_set(self, scene: bpy.types.Scene, animation_set: Optional[AnimationSetPropertyGroup]) -> str:
+        hasher = hashlib.blake2b(self._static_digest, digest_size = 16)
+        assigned_actions = {}
+
+        if animation_set is None:
+            # Stills are bounded at whichever frame the scene is on
+            _update(hasher, "still", scene.frame_current)
+        else:
+            assigned_actions = { a.target.name: a.action for a in animation_set.get_selected_actions() }
+
+            for target_name in sorted(assigned_actions):
+                _update(hasher, "set action", target_name)
+                hasher.update(self._action_digest(assigned_actions[target_name]))
+
+        # Any dependency which the set doesn't animate keeps whatever action it already has
+        for obj in self._objects:
+            if obj.name not in assigned_actions and obj.animation_data is not None and obj.animation_data.action is not None:
+                _update(hasher, "action", obj.name)
+                hasher.update(self._action_digest(obj.animation_data.action))
+
+        return hasher.hexdigest()
+
+    def _action_digest(self, action: bpy.types.Action) -> bytes:
+        if action.name not in self._action_digests:
+            hasher = hashlib.blake2b(digest_size = 16)
+            _hash_fcurves(hasher, action.fcurves)
+            self._action_digests[action.name] = hasher.digest()
+
+        return self._action_digests[action.name]
+
+def clear() -> int:
+    """Deletes every cached entry, returning the number of files removed."""
+    if not os.path.isdir(_cache_dir):
+        return 0
+
+    num_removed = 0
+
+    for file_name in os.listdir(_cache_dir):
+        if file_name.endswith(".json"):
+            try:
+                os.remove(os.path.join(_cache_dir, file_name))
+                num_removed += 1
+            except OSError:
+                pass
+
+    return num_removed
+
+def entry_key(angle: Optional[int], frame: Optional[int]) -> str:
+    return f"{angle}/{frame}"
+
+def load(fingerprint: str) -> Dict[str, CachedBounds]:
+    file_path = os.path.join(_cache_dir, fingerprint + ".json")
+
+    try:
+        with open(file_path) as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        # Missing or corrupt files are treated the same as an empty cache
+        return {}
+
+    if data.get("version") != _CACHE_VERSION:
+        return {}
+
+    # Touch the file so that pruning removes the least recently used entries first
+    try:
+        os.utime(file_path)
+    except OSError:
+        pass
+
+    return { key: tuple(bounds) for key, bounds in data["bounds"].items() }
+
+def store(fingerprint: str, entries: Dict[str, CachedBounds]):
+    file_path = os.path.join(_cache_dir, fingerprint + ".json")
+    temp_file_path = file_path + ".tmp"
+
+    try:
+        os.makedirs(_cache_dir, exist_ok = True)
+
+        # Write then rename, so a crash part way through can't leave a truncated file behind
+        with open(temp_file_path, "w") as f:
+            json.dump({ "version": _CACHE_VERSION, "bounds": entries }, f)
+
+        os.replace(temp_file_path, file_path)
+        _prune()
+    except OSError:
+        # The cache is only an optimization; failing to write it just means these bounds are calculated again next time
+        pass
+
+def _hash_armature(hasher: "hashlib._Hash", obj: bpy.types.Object):
+    bones = obj.data.bones
+    _update(hasher, [(b.name, b.parent.name if b.parent else None, b.use_deform, b.envelope_distance) for b in bones])
+    hasher.update(_float_buffer(bones, "matrix_local", 16))
+
+    # Channels which an action doesn't key keep their current pose
+    pose_bones = obj.pose.bones
+    for attr, size in (("location", 3), ("rotation_euler", 3), ("rotation_quaternion", 4), ("scale", 3)):
+        hasher.update(_float_buffer(pose_bones, attr, size))
+
+    for pose_bone in pose_bones:
+        _update(hasher, pose_bone.name, pose_bone.rotation_mode)
+
+        # Only the names of constraint targets are hashed here; the targets themselves are dependencies, so they're hashed in full
+        for constraint in pose_bone.constraints:
+            _update(hasher, _rna_values(constraint))
+
+    if obj.data.animation_data is not None:
+        _hash_drivers(hasher, obj.data.animation_data)
+
+def _hash_drivers(hasher: "hashlib._Hash", animation_data: bpy.types.AnimData):
+    _hash_fcurves(hasher, animation_data.drivers)
+
+    for driver_fcurve in animation_data.drivers:
+        _update(hasher, driver_fcurve.driver.type, driver_fcurve.driver.expression)
+
+        for variable in driver_fcurve.driver.variables:
+            _update(hasher, variable.name, variable.type, [(t.id.name if t.id else None, t.data_path, t.bone_target, t.transform_type, t.transform_space) for t in variable.targets])
+
+def _hash_fcurves(hasher: "hashlib._Hash", fcurves: Iterable[bpy.types.FCurve]):
+    for fcurve in fcurves:
+        _update(hasher, fcurve.data_path, fcurve.array_index, fcurve.mute, fcurve.extrapolation)
+
+        for modifier in fcurve.modifiers:
+            _update(hasher, _rna_values(modifier))
+
+        keyframes = fcurve.keyframe_points
+
+        for attr in ("co", "handle_left", "handle_right"):
+            hasher.update(_float_buffer(keyframes, attr, 2))
+
+        _update(hasher, [(k.interpolation, k.easing) for k in keyframes])
+
+def _hash_mesh(hasher: "hashlib._Hash", mesh: bpy.types.Mesh):
+    _update(hasher, len(mesh.vertices), len(mesh.edges), len(mesh.polygons))
+    hasher.update(_float_buffer(mesh.vertices, "co", 3))
+
+    # Vertex weights have no bulk accessor; this only happens once per fingerprint, not once per frame
+    weights = array.array("f")
+    for vertex in mesh.vertices:
+        for group in vertex.groups:
+            weights.append(vertex.index)
+            weights.append(group.group)
+            weights.append(group.weight)
+
+    hasher.update(weights.tobytes())
+
+    if mesh.shape_keys is not None:
+        for key_block in mesh.shape_keys.key_blocks:
+            _update(hasher, key_block.name, key_block.value, key_block.mute, key_block.relative_key.name, key_block.vertex_group)
+            hasher.update(_float_buffer(key_block.data, "co", 3))
+
+        if mesh.shape_keys.animation_data is not None:
+            _hash_drivers(hasher, mesh.shape_keys.animation_data)
+            _hash_nla_tracks(hasher, mesh.shape_keys.animation_data)
+
+            if mesh.shape_keys.animation_data.action is not None:
+                _hash_fcurves(hasher, mesh.shape_keys.animation_data.action.fcurves)
+
+def _hash_nla_tracks(hasher: "hashlib._Hash", animation_data: bpy.types.AnimData):
+    # Strips are evaluated beneath the active action, whichever action an animation set assigns
+    for track in animation_data.nla_tracks:
+        _update(hasher, "nla track", track.name, track.mute, track.is_solo)
+
+        for strip in track.strips:
+            _update(hasher, _rna_values(strip))
+
+            if strip.action is not None:
+                _hash_fcurves(hasher, strip.action.fcurves)
+
+def _hash_object(hasher: "hashlib._Hash", obj: bpy.types.Object, exclude_z_rotation: bool):
+    rotation = tuple(obj.rotation_euler)
+
+    if exclude_z_rotation:
+        rotation = rotation[:2]
+
+    _update(hasher, obj.name, obj.type, obj.parent.name if obj.parent else None, obj.parent_type, obj.parent_bone,
+            [tuple(row) for row in obj.matrix_parent_inverse], tuple(obj.location), obj.rotation_mode, rotation, tuple(obj.rotation_quaternion),
+            tuple(obj.scale), tuple(obj.delta_location), tuple(obj.delta_rotation_euler), tuple(obj.delta_scale))
+
+    for constraint in obj.constraints:
+        _update(hasher, _rna_values(constraint))
+
+    for modifier in obj.modifiers:
+        _update(hasher, _rna_values(modifier))
+
+    if obj.animation_data is not None:
+        _hash_drivers(hasher, obj.animation_data)
+        _hash_nla_tracks(hasher, obj.animation_data)
+
+    if obj.type == 'MESH':
+        _hash_mesh(hasher, obj.data)
+    elif obj.type == 'ARMATURE':
+        _hash_armature(hasher, obj)
+
+def _float_buffer(collection: bpy.types.bpy_prop_collection, attr: str, size: int) -> bytes:
+    values = array.array("f", [0.0]) * (len(collection) * size)
+    collection.foreach_get(attr, values)
+    return values.tobytes()
+
+def _prune():
+    files = [os.path.join(_cache_dir, f) for f in os.listdir(_cache_dir) if f.endswith(".json")]
+
+    if len(files) <= _MAX_CACHE_FILES:
+        return
+
+    files.sort(key = os.path.getmtime)
+
+    for file_path in files[:len(files) - _MAX_CACHE_FILES]:
+        try:
+            os.remove(file_path)
+        except OSError:
+            # Most likely removed by another Blender instance sharing the cache
+            pass
+
+def _rna_values(struct: bpy.types.bpy_struct) -> List[Tuple[str, str]]:
+    """Every simple property of a modifier, constraint or similar, so that changing any setting changes the fingerprint."""
+    values = []
+
+    for prop in struct.bl_rna.properties:
+        if prop.identifier == "rna_type" or prop.type == 'COLLECTION':
+            continue
+
+        value = getattr(struct, prop.identifier, None)
+
+        if prop.type == 'POINTER':
+            value = getattr(value, "name", None)
+        elif hasattr(value, "__len__") and not isinstance(value, str):
+            value = tuple(sorted(value)) if isinstance(value, set) else tuple(value)
+
+        values.append((prop.identifier, repr(value)))
+
+    return values
+
+def _update(hasher: "hashlib._Hash", *values):
+    hasher.update(repr(values).encode())
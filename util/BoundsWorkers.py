@@ -0,0 +1,165 @@
+import bpy
+import importlib
+import json
+import math
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from typing import TYPE_CHECKING, Dict, Generator, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from ..property_groups import AnimationSetPropertyGroup
+
+# This module is also run as a script by the worker processes, where relative imports aren't possible; see _run_worker
+
+# How much of a failed worker's output is included in its failure message
+_MAX_LOG_LINES = 20
+
+# How long to wait between checking whether the workers have finished, in seconds
+_POLL_INTERVAL = 0.02
+
+# Starting a worker takes a few seconds, so it isn't worth it unless each has at least this many frames to bound
+_MIN_FRAMES_PER_WORKER = 16
+
+# (rotation, animation set index, frame) -> (min x, min y, max x, max y) in camera space
+WorkerBounds = Dict[Tuple[Optional[int], int, Optional[int]], Tuple[float, float, float, float]]
+
+def find_bounds_in_steps(context: bpy.types.Context, rotations_degrees: List[Optional[int]], animation_sets: List[Optional["AnimationSetPropertyGroup"]],
+                         frames_by_set: Dict[int, List[Optional[int]]],
+                         num_workers: int) -> Generator[Tuple[int, int], None, Tuple[WorkerBounds, Dict[int, List[Optional[int]]], List[str]]]:
+    """Bounds the given frames of each animation set in background Blender processes, each working on a contiguous range of frames.
+
+    The workers open a copy of the current file, so unsaved changes are included. While they run, this yields (number of frames
+    bounded so far, number of frames given to workers) every time it checks on them, so that callers can keep the UI responsive;
+    closing the generator kills any workers still running. Returns the bounds found, and the frames which weren't bounded (because
+    there were too few to be worth starting workers for, or because a worker failed), which the caller should bound itself. Also
+    returns a message for each worker which failed, for the caller to report."""
+    work = [(index, frame) for index, frames in sorted(frames_by_set.items()) for frame in frames]
+    num_workers = min(num_workers, len(work) // _MIN_FRAMES_PER_WORKER)
+
+    if num_workers < 2:
+        return ({}, frames_by_set, [])
+
+    all_animation_sets = list(context.scene.SpritesheetPropertyGroup.animation_options.animation_sets)
+
+    chunk_size = math.ceil(len(work) / num_workers)
+    chunks = [work[start : start + chunk_size] for start in range(0, len(work), chunk_size)]
+
+    temp_dir_path = tempfile.mkdtemp(prefix = "spritesheet_bounds_")
+    bounds: WorkerBounds = {}
+    remaining: Dict[int, List[Optional[int]]] = {}
+    failures: List[str] = []
+    workers: List[subprocess.Popen] = []
+
+    try:
+        blend_file_path = os.path.join(temp_dir_path, "scene.blend")
+        bpy.ops.wm.save_as_mainfile(filepath = blend_file_path, copy = True, check_existing = False)
+
+        pending = []
+
+        for worker_index, chunk in enumerate(chunks):
+            job_file_path = os.path.join(temp_dir_path, f"job_{worker_index}.json")
+            output_file_path = os.path.join(temp_dir_path, f"bounds_{worker_index}.json")
+            log_file_path = os.path.join(temp_dir_path, f"worker_{worker_index}.log")
+
+            job = {
+                # Animation sets are identified by their index in the scene, since the caller may only be bounding some of them
+                "animationSets": [None if animation_set is None else all_animation_sets.index(animation_set) for animation_set in animation_sets],
+                "frames": [[index, frame] for index, frame in chunk],
+                "outputFile": output_file_path,
+                "rotations": rotations_degrees,
+                "scene": context.scene.name
+            }
+
+            with open(job_file_path, "w") as f:
+                json.dump(job, f)
+
+            args = [bpy.app.binary_path, "-b", blend_file_path, "-noaudio", "--python-exit-code", "1", "--python", os.path.realpath(__file__), "--",
+                    __package__.rpartition(".")[0], job_file_path]
+
+            with open(log_file_path, "w") as log_file:
+                process = subprocess.Popen(args, stdout = subprocess.DEVNULL, stderr = log_file)
+
+            workers.append(process)
+            pending.append((process, chunk, output_file_path, log_file_path))
+
+        num_frames_bounded = 0
+
+        while len(pending) > 0:
+            yield (num_frames_bounded, len(work))
+
+            finished = [worker for worker in pending if worker[0].poll() is not None]
+
+            if len(finished) == 0:
+                time.sleep(_POLL_INTERVAL)
+                continue
+
+            pending = [worker for worker in pending if worker not in finished]
+
+            for process, chunk, output_file_path, log_file_path in finished:
+                num_frames_bounded += len(chunk)
+                _collect_worker_output(process, chunk, output_file_path, log_file_path, bounds, remaining, failures)
+    finally:
+        # Only has an effect if the caller closed the generator early, or something went wrong
+        for process in workers:
+            if process.poll() is None:
+                process.kill()
+                process.wait()
+
+        shutil.rmtree(temp_dir_path, ignore_errors = True)
+
+    return (bounds, remaining, failures)
+
+def _collect_worker_output(process: subprocess.Popen, chunk: List[Tuple[int, Optional[int]]], output_file_path: str, log_file_path: str,
+                           bounds: WorkerBounds, remaining: Dict[int, List[Optional[int]]], failures: List[str]):
+    if process.returncode == 0 and os.path.isfile(output_file_path):
+        with open(output_file_path) as f:
+            for angle, animation_set_index, frame, min_x, min_y, max_x, max_y in json.load(f):
+                bounds[(angle, animation_set_index, frame)] = (min_x, min_y, max_x, max_y)
+    else:
+        with open(log_file_path) as f:
+            log_lines = f.read().strip().splitlines()[-_MAX_LOG_LINES:]
+
+        failures.append(f"bounds worker exited with code {process.returncode}; its {len(chunk)} frame(s) were bounded in this process instead. "
+                        f"Output:\n" + "\n".join(log_lines))
+
+        for index, frame in chunk:
+            remaining.setdefault(index, []).append(frame)
+
+def _run_worker(addon_name: str, job_file_path: str):
+    #pylint: disable=import-outside-toplevel,protected-access
+    import addon_utils
+
+    # The worker is started as a plain script, so the addon has to be loaded (if it isn't already) to use its modules
+    addon_utils.enable(addon_name, default_set = False)
+    Camera = importlib.import_module(addon_name + ".util.Camera")
+
+    with open(job_file_path) as f:
+        job = json.load(f)
+
+    scene = bpy.context.scene
+    if scene.name != job["scene"]:
+        raise RuntimeError(f"Expected scene \"{job['scene']}\" to be active, but found \"{scene.name}\"")
+
+    # Results are cached by the main process, and a worker shouldn't start workers of its own
+    props = scene.SpritesheetPropertyGroup
+    props.camera_options.cache_target_bounds = False
+    props.camera_options.bounds_worker_count = 0
+
+    animation_sets = [None if index is None else props.animation_options.animation_sets[index] for index in job["animationSets"]]
+    frames_by_set: Dict[int, List[Optional[int]]] = {}
+
+    for animation_set_index, frame in job["frames"]:
+        frames_by_set.setdefault(animation_set_index, []).append(frame)
+
+    frame_bounds = Camera._find_bounds_for_each_frame(bpy.context, job["rotations"], animation_sets, frames_by_set)
+    rows = [[angle, animation_set_index, frame, b.min_point[0], b.min_point[1], b.max_point[0], b.max_point[1]] for (angle, animation_set_index, frame), b in frame_bounds.items()]
+
+    with open(job["outputFile"], "w") as f:
+        json.dump(rows, f)
+
+if __name__ == "__main__":
+    _run_worker(*sys.argv[sys.argv.index("--") + 1:])
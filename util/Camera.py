@@ -1,52 +1,232 @@
+import bisect
+import bmesh
 import bpy
-from mathutils import Vector
-from typing import List, Optional
+import math
+from mathutils import Matrix, Vector
+from typing import Any, Callable, Dict, Generator, Iterable, List, Optional, Set, Tuple
 
-from ..property_groups import AnimationSetPropertyGroup
+# NumPy ships with Blender, but fall back to plain Python if it's somehow unavailable
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from ..property_groups import AnimationSetPropertyGroup, SpritesheetPropertyGroup
+from . import BoundsCache, BoundsWorkers, Silhouette
 from .Bounds import Bounds2D
+from .CameraPlan import CameraPlan, PlanKey
 from .. import utils
 
+# Modifiers whose result only depends on the mesh and their own settings, so that unless their settings are animated or they
+# reference another object, they give the same object-space geometry on every frame
+_RIGID_MODIFIER_TYPES = { "ARRAY", "BEVEL", "DECIMATE", "EDGE_SPLIT", "MIRROR", "MULTIRES", "REMESH", "SOLIDIFY", "SUBSURF", "TRIANGULATE", "WEIGHTED_NORMAL", "WELD" }
+
+# Transforming one vertex into camera space takes this many bytes per view, including NumPy's temporary arrays
+_BYTES_PER_VERTEX_VIEW = 32
+
+# After this many frames in a row where a mesh deforms too far for its hull to be trusted, it's always bounded with a full pass instead,
+# since rebuilding the hull each time would cost more than it saves
+_MAX_HULL_MISSES = 3
+
+# Modifiers which can follow an armature without moving any point outside of the convex hull of the deformed mesh
+_HULL_PRESERVING_MODIFIER_TYPES = { "EDGE_SPLIT", "SUBSURF", "TRIANGULATE", "WEIGHTED_NORMAL" }
+
+class _BoneEnvelope:
+    """A conservative stand-in for a mesh which is only deformed by an armature.
+
+    Each vertex is deformed by a weighted average of its bones' transforms, so it always lies within the convex hull of where each of
+    those bones would move it alone. If every vertex weighted to a bone is within radius of it in the rest pose, the bone alone can
+    only move them to within radius (times the bone's scale) of its posed segment, so the posed segments padded by their radii
+    enclose the deformed mesh. Vertices without any deform weights keep their rest positions in armature space."""
+
+    __slots__ = ("armature", "pose_bone_indices", "radii", "static_points")
+
+    def __init__(self, armature: bpy.types.Object, pose_bone_indices: "np.ndarray", radii: "np.ndarray", static_points: "np.ndarray"):
+        self.armature = armature
+        self.pose_bone_indices = pose_bone_indices
+        self.radii = radii
+        self.static_points = static_points
+
+class _HullCacheEntry:
+    """Candidate extreme vertices for one target mesh, and how far each other vertex can move before it might become extreme.
+
+    Only vertices on the convex hull can be extreme in any direction, and since every view is an affine transform of object space, a
+    vertex inside the hull of the candidates can't be extreme in any view either. If a vertex started slack away from the hull's
+    boundary, moved by d, and no candidate moved by more than h, it's still inside the candidates' hull as long as d + h <= slack:
+    the hull's support in any direction drops by at most h, and the vertex's projection onto it grows by at most d. Checking that
+    only takes the distance each vertex moved, which is much cheaper than transforming it into every view."""
+
+    __slots__ = ("candidate_rest", "candidates", "num_misses", "others", "others_rest", "slack", "topology")
+
+    def __init__(self, topology: Tuple[int, int, int], coords: "np.ndarray", candidates: "np.ndarray", hull_faces: "np.ndarray", memory_budget: int):
+        is_candidate = np.zeros(len(coords), dtype = bool)
+        is_candidate[candidates] = True
+
+        self.candidates = candidates
+        self.candidate_rest = coords[candidates]
+        self.num_misses = 0
+        self.others = np.flatnonzero(~is_candidate)
+        self.others_rest = coords[self.others]
+        self.slack = _distances_inside_hull(self.others_rest, coords, hull_faces, memory_budget)
+        self.topology = topology
+
+# Keyed by target object name
+_hull_cache: Dict[str, _HullCacheEntry] = {}
+
+# Messages from background workers which failed since take_worker_failures was last called
+_worker_failures: List[str] = []
+
+# The most bytes of vertex arrays held at once since take_peak_memory was last called
+_peak_memory = 0
+
+# Yielded by the methods which step through frames: (number of frames evaluated so far, number of frames to evaluate)
+Progress = Tuple[int, int]
+
 ####################################################################################
 # Public methods: same as private but don't return the Bounds object
 ####################################################################################
 
+def find_evaluation_dependencies(context: bpy.types.Context) -> List[bpy.types.Object]:
+    """Every object which has to be evaluated to find the bounds of the camera targets, including rotation and animation targets."""
+    props = context.scene.SpritesheetPropertyGroup
+    objects = _find_bounded_objects(props)
+
+    if props.rotation_options.control_rotation:
+        objects.extend(t.target for t in props.rotation_options.targets)
+
+    for animation_set in props.animation_options.get_animation_sets():
+        if animation_set is not None:
+            objects.extend(a.target for a in animation_set.get_selected_actions())
+
+    return utils.find_dependencies(objects)
+
 def fit_camera_to_targets(context: bpy.types.Context):
     props = context.scene.SpritesheetPropertyGroup
     camera = props.camera_options.render_camera
     camera_obj = props.camera_options.render_camera_obj
 
-    bounds = _find_camera_target_bounds(context, context.scene)
+    if props.camera_options.bounds_source == "silhouette":
+        with Silhouette.SilhouetteRenderer(context, _find_target_objects(props), props.camera_options.silhouette_resolution) as silhouette:
+            bounds = silhouette.find_bounds()
+    else:
+        bounds = _find_camera_target_bounds(context, context.scene)
+
     _adjust_camera_based_on_bounds(context, camera, camera_obj, bounds)
 
-def optimize_for_animation_set(context: bpy.types.Context, animation_set: Optional[AnimationSetPropertyGroup]):
+def build_camera_plan(context: bpy.types.Context, rotations_degrees: List[int], animation_sets: List[Optional[AnimationSetPropertyGroup]],
+                      frames_by_set: Optional[Dict[int, List[Optional[int]]]] = None, control_mode: Optional[str] = None) -> CameraPlan:
+    """Computes where the camera should be for every rotation, animation set and frame of a render job, according to the camera control mode.
+
+    Callers which have already read each animation set's frames and the control mode (such as a render job's JobSpec) can pass them in
+    to avoid reading them from the property groups again; otherwise they're read here.
+
+    This sets every animation set's actions and steps through its frames; callers are responsible for restoring the scene afterwards."""
     props = context.scene.SpritesheetPropertyGroup
     camera = props.camera_options.render_camera
     camera_obj = props.camera_options.render_camera_obj
 
-    bounds = _optimal_bounds_for_animation_set(context, animation_set)
+    if camera.type != "ORTHO":
+        raise RuntimeError("Camera.build_camera_plan currently only works for orthographic cameras")
+
+    plan = CameraPlan(control_mode if control_mode is not None else props.camera_options.camera_control_mode)
+    grouped_bounds: Dict[PlanKey, Bounds2D] = {}
+
+    # Sampling only finds the union of each animation's bounds, so it can't be used when the camera moves every frame
+    use_sampling = props.camera_options.sample_bounds and plan.control_mode != "move_each_frame"
+
+    if use_sampling:
+        frame_bounds, plan.num_frames_bounded, plan.num_frames_total = _run_to_completion(_generate_sampled_bounds(context, rotations_degrees, animation_sets, frames_by_set))
+    else:
+        frame_bounds = _find_bounds_for_each_frame(context, rotations_degrees, animation_sets, frames_by_set)
+        plan.num_frames_bounded = plan.num_frames_total = len({ (animation_set_index, frame) for (_, animation_set_index, frame) in frame_bounds })
+
+    for (angle, animation_set_index, frame), bounds in frame_bounds.items():
+        key = plan.key(angle, animation_set_index, frame)
+
+        if key in grouped_bounds:
+            grouped_bounds[key].encapsulate(bounds)
+        else:
+            grouped_bounds[key] = bounds
+
+    for key, bounds in grouped_bounds.items():
+        if use_sampling or props.camera_options.simplify_bounds_evaluation:
+            bounds = _add_safety_margin(context, bounds)
+
+        location, ortho_scale = _camera_params_for_bounds(context, camera_obj, bounds)
+        plan.entries[key] = (location[0], location[1], location[2], ortho_scale)
+
+    return plan
+
+# The optimize_* methods return the number of frames which were bounded, and how many there are in total; these
+# only differ if the camera options enable sampling. Each has an _in_steps version, which is a generator that yields
+# Progress after every frame, for callers which need to keep the UI responsive
+
+def optimize_for_animation_set(context: bpy.types.Context, animation_set: Optional[AnimationSetPropertyGroup]) -> Tuple[int, int]:
+    return _run_to_completion(optimize_for_animation_set_in_steps(context, animation_set))
+
+def optimize_for_animation_set_in_steps(context: bpy.types.Context, animation_set: Optional[AnimationSetPropertyGroup]) -> Generator[Progress, None, Tuple[int, int]]:
+    props = context.scene.SpritesheetPropertyGroup
+    camera = props.camera_options.render_camera
+    camera_obj = props.camera_options.render_camera_obj
+
+    bounds, num_frames_bounded, num_frames_total = yield from _optimal_bounds_for_animation_set(context, animation_set)
     _adjust_camera_based_on_bounds(context, camera, camera_obj, bounds)
 
-def optimize_for_all_frames(context: bpy.types.Context, rotations_degrees: List[Optional[int]], animation_sets: List[AnimationSetPropertyGroup]):
+    return (num_frames_bounded, num_frames_total)
+
+def optimize_for_all_frames(context: bpy.types.Context, rotations_degrees: List[Optional[int]], animation_sets: List[AnimationSetPropertyGroup]) -> Tuple[int, int]:
+    return _run_to_completion(optimize_for_all_frames_in_steps(context, rotations_degrees, animation_sets))
+
+def optimize_for_all_frames_in_steps(context: bpy.types.Context, rotations_degrees: List[Optional[int]], animation_sets: List[AnimationSetPropertyGroup]) -> Generator[Progress, None, Tuple[int, int]]:
     props = context.scene.SpritesheetPropertyGroup
     camera = props.camera_options.render_camera
     camera_obj = props.camera_options.render_camera_obj
 
-    bounds = _optimize_for_all_frames(context, camera, rotations_degrees, animation_sets)
+    bounds, num_frames_bounded, num_frames_total = yield from _optimize_for_all_frames(context, camera, rotations_degrees, animation_sets)
     _adjust_camera_based_on_bounds(context, camera, camera_obj, bounds)
 
-def optimize_for_rotation(context: bpy.types.Context, rotation_degrees: List[Optional[int]], animation_sets: List[AnimationSetPropertyGroup]):
+    return (num_frames_bounded, num_frames_total)
+
+def optimize_for_rotation(context: bpy.types.Context, rotation_degrees: Optional[int], animation_sets: List[AnimationSetPropertyGroup]) -> Tuple[int, int]:
+    return _run_to_completion(optimize_for_rotation_in_steps(context, rotation_degrees, animation_sets))
+
+def optimize_for_rotation_in_steps(context: bpy.types.Context, rotation_degrees: Optional[int], animation_sets: List[AnimationSetPropertyGroup]) -> Generator[Progress, None, Tuple[int, int]]:
     props = context.scene.SpritesheetPropertyGroup
     camera = props.camera_options.render_camera
     camera_obj = props.camera_options.render_camera_obj
 
-    bounds = _optimize_for_rotation(context, camera, rotation_degrees, animation_sets)
+    bounds, num_frames_bounded, num_frames_total = yield from _optimize_for_rotation(context, camera, rotation_degrees, animation_sets)
     _adjust_camera_based_on_bounds(context, camera, camera_obj, bounds)
 
+    return (num_frames_bounded, num_frames_total)
+
+def take_peak_memory() -> int:
+    """Returns the most memory, in bytes, used at once by the arrays of vertices being bounded since this was last called.
+
+    This is measured from the arrays themselves rather than by tracing allocations, which would slow down everything else, so it
+    doesn't include Blender's own evaluated meshes or memory used by background workers."""
+    #pylint: disable=global-statement
+    global _peak_memory
+    peak_memory = _peak_memory
+    _peak_memory = 0
+    return peak_memory
+
+def take_worker_failures() -> List[str]:
+    """Returns a message for each background bounds worker (see BoundsWorkers) which failed since this was last called, so that
+    callers can report them. The frames given to those workers are still bounded, in Blender's own process instead."""
+    failures = list(_worker_failures)
+    _worker_failures.clear()
+    return failures
+
 ####################################################################################
-# Internal methods: all return Bounds so they can call each other usefully
+# Internal methods: all return Bounds so they can call each other usefully. Those which
+# step through frames are generators yielding Progress, which return Bounds when done
 ####################################################################################
 
 def _adjust_camera_based_on_bounds(context: bpy.types.Context, camera: bpy.types.Camera, camera_obj: bpy.types.Object, bounds: Bounds2D):
+    camera_obj.location, camera.ortho_scale = _camera_params_for_bounds(context, camera_obj, bounds)
+
+def _camera_params_for_bounds(context: bpy.types.Context, camera_obj: bpy.types.Object, bounds: Bounds2D) -> Tuple[Vector, float]:
     # Bounds are in camera space; convert back to world
     cam_space_center = bounds.center_3d
     world_space_center = camera_obj.rotation_euler.to_matrix() @ cam_space_center
@@ -56,8 +236,7 @@ def _adjust_camera_based_on_bounds(context: bpy.types.Context, camera: bpy.types
     cam_dir = Vector( (0, 0, 1) ) # default camera orientation
     cam_dir.rotate(camera_obj.rotation_euler)
 
-    camera_obj.location = world_space_center + 10 * cam_dir
-    camera.ortho_scale = _calculate_ortho_scale(context, bounds)
+    return (world_space_center + 10 * cam_dir, _calculate_ortho_scale(context, bounds))
 
 def _calculate_ortho_scale(context: bpy.types.Context, cam_space_bounds: Bounds2D) -> float:
     props = context.scene.SpritesheetPropertyGroup
@@ -75,109 +254,740 @@ def _calculate_ortho_scale(context: bpy.types.Context, cam_space_bounds: Bounds2
     # Consider adding a small fudge factor in future in case the edges are being clipped
     return max(size)
 
-def _optimal_bounds_for_animation_set(context: bpy.types.Context, animation_set: AnimationSetPropertyGroup):
-    return _find_bounding_box_for_animation_set(context, animation_set)
+def _optimal_bounds_for_animation_set(context: bpy.types.Context, animation_set: AnimationSetPropertyGroup) -> Generator[Progress, None, Tuple[Bounds2D, int, int]]:
+    return (yield from _generate_union_of_bounds(context, [None], [animation_set]))
 
-def _optimize_for_all_frames(context: bpy.types.Context, camera: bpy.types.Camera, rotations_degrees: List[Optional[int]], animation_sets: List[AnimationSetPropertyGroup]):
+def _optimize_for_all_frames(context: bpy.types.Context, camera: bpy.types.Camera, rotations_degrees: List[Optional[int]], animation_sets: List[AnimationSetPropertyGroup]) -> Generator[Progress, None, Tuple[Bounds2D, int, int]]:
     if camera.type != "ORTHO":
         raise RuntimeError("Camera.optimize_for_all_frames currently only works for orthographic cameras")
 
-    props = context.scene.SpritesheetPropertyGroup
-    cumulative_bounds = None
+    return (yield from _generate_union_of_bounds(context, rotations_degrees, animation_sets))
 
-    if props.rotation_options.control_rotation:
-        for angle in rotations_degrees:
-            bounds = _optimize_for_rotation(context, camera, angle, animation_sets)
+def _optimize_for_rotation(context: bpy.types.Context, camera: bpy.types.Camera, rotation_degrees: Optional[int], animation_sets: List[Optional[AnimationSetPropertyGroup]]) -> Generator[Progress, None, Tuple[Bounds2D, int, int]]:
+    if camera.type != "ORTHO":
+        raise RuntimeError("Camera.optimize_for_rotation currently only works for orthographic cameras")
 
-            if cumulative_bounds is None:
-                cumulative_bounds = bounds
-            else:
-                cumulative_bounds.encapsulate(bounds)
-    elif props.animation_options.control_animations:
-        for animation_set in props.animation_options.get_animation_sets():
-            bounds = _optimal_bounds_for_animation_set(context, animation_set)
+    return (yield from _generate_union_of_bounds(context, [rotation_degrees], animation_sets))
 
-            if cumulative_bounds is None:
-                cumulative_bounds = bounds
-            else:
-                cumulative_bounds.encapsulate(bounds)
+def _generate_union_of_bounds(context: bpy.types.Context, rotations_degrees: List[Optional[int]], animation_sets: List[Optional[AnimationSetPropertyGroup]]) -> Generator[Progress, None, Tuple[Bounds2D, int, int]]:
+    """Finds bounds which fit every frame of every animation set at every angle, returning them along with the number of frames bounded and the total number of frames."""
+    camera_options = context.scene.SpritesheetPropertyGroup.camera_options
+
+    if camera_options.sample_bounds:
+        frame_bounds, num_frames_bounded, num_frames_total = yield from _generate_sampled_bounds(context, rotations_degrees, animation_sets)
     else:
-        cumulative_bounds = _find_camera_target_bounds(context, context.scene)
+        frame_bounds = yield from _generate_bounds_for_each_frame(context, rotations_degrees, animation_sets)
+        num_frames_bounded = num_frames_total = len({ (animation_set_index, frame) for (_, animation_set_index, frame) in frame_bounds })
 
-    return cumulative_bounds
+    bounds = _union_of_bounds(frame_bounds.values())
 
-def _optimize_for_rotation(context: bpy.types.Context, camera: bpy.types.Camera, rotation_degrees: List[Optional[int]], animation_sets: List[Optional[AnimationSetPropertyGroup]]):
-    if camera.type != "ORTHO":
-        raise RuntimeError("Camera.optimize_for_rotation currently only works for orthographic cameras")
+    if camera_options.sample_bounds or camera_options.simplify_bounds_evaluation:
+        bounds = _add_safety_margin(context, bounds)
 
-    if rotation_degrees is not None:
-        rotation_targets = list(map(lambda t: t.target, context.scene.SpritesheetPropertyGroup.rotation_options.targets))
-        utils.rotate_objects(rotation_targets, z_rot_degrees = rotation_degrees)
+    return (bounds, num_frames_bounded, num_frames_total)
 
+def _union_of_bounds(all_bounds: Iterable[Bounds2D]) -> Bounds2D:
     cumulative_bounds = None
 
-    for animation_set in animation_sets:
-        if animation_set is not None:
-            current_bounds = _optimal_bounds_for_animation_set(context, animation_set)
-        else:
-            current_bounds = _find_camera_target_bounds(context, context.scene)
-
+    for bounds in all_bounds:
         if cumulative_bounds is not None:
-            cumulative_bounds.encapsulate(current_bounds)
+            cumulative_bounds.encapsulate(bounds)
         else:
-            cumulative_bounds = current_bounds
+            cumulative_bounds = Bounds2D.from_min_and_max_points(bounds.min_point, bounds.max_point)
 
     return cumulative_bounds
 
-def _find_bounding_box_for_animation_set(context: bpy.types.Context, animation_set: AnimationSetPropertyGroup):
-    """Returns a Bounds object describing the minimal bounding box that can fit all frames of the animation set"""
+def _find_bounds_for_each_frame(context: bpy.types.Context, rotations_degrees: List[Optional[int]], animation_sets: List[Optional[AnimationSetPropertyGroup]],
+                                frames_by_set: Optional[Dict[int, List[Optional[int]]]] = None) -> Dict[PlanKey, Bounds2D]:
+    return _run_to_completion(_generate_bounds_for_each_frame(context, rotations_degrees, animation_sets, frames_by_set))
+
+def _generate_bounds_for_each_frame(context: bpy.types.Context, rotations_degrees: List[Optional[int]], animation_sets: List[Optional[AnimationSetPropertyGroup]],
+                                    frames_by_set: Optional[Dict[int, List[Optional[int]]]] = None) -> Generator[Progress, None, Dict[PlanKey, Bounds2D]]:
+    """Runs _evaluate_bounds_for_each_frame, with the scene's Simplify settings enabled while it runs if the camera options ask for it.
+
+    Reduced subdivision can make evaluating each frame many times faster, while barely changing the bounds; the safety margin
+    is added to the resulting bounds to make up the difference."""
+    camera_options = context.scene.SpritesheetPropertyGroup.camera_options
+
+    if not camera_options.simplify_bounds_evaluation:
+        return (yield from _evaluate_bounds_for_each_frame(context, rotations_degrees, animation_sets, frames_by_set))
+
+    render = context.scene.render
+    previous_settings = (render.use_simplify, render.simplify_subdivision)
+
+    render.use_simplify = True
+    render.simplify_subdivision = camera_options.bounds_simplify_subdivision
+
+    try:
+        return (yield from _evaluate_bounds_for_each_frame(context, rotations_degrees, animation_sets, frames_by_set))
+    finally:
+        render.use_simplify, render.simplify_subdivision = previous_settings
+
+def _evaluate_bounds_for_each_frame(context: bpy.types.Context, rotations_degrees: List[Optional[int]], animation_sets: List[Optional[AnimationSetPropertyGroup]],
+                                    frames_by_set: Optional[Dict[int, List[Optional[int]]]]) -> Generator[Progress, None, Dict[PlanKey, Bounds2D]]:
+    """Finds the camera-space bounds of the targets for every (rotation, animation set index, frame) of a render job.
+
+    Rotation targets are only ever rotated about their own Z axis, so when possible (see _find_rotation_pivots), each frame is
+    evaluated once and every angle's bounds are found by rotating the targets' points about the vertical axis through their pivots.
+    Otherwise the targets are rotated to each angle and every frame is evaluated again. An angle of None leaves the rotation targets
+    as they are. Stills have a frame of None, and are bounded at whatever frame the scene is currently on. If frames_by_set is provided,
+    only the frames it lists for each animation set's index are bounded; otherwise every frame to be rendered is.
+
+    If the camera options allow it, bounds are also cached on disk (see BoundsCache), and only the frames which aren't cached for the
+    scene's current state are evaluated. Those frames may be split between background worker processes (see BoundsWorkers). Skinned
+    targets may also be bounded from their bones (see _BoneEnvelope), in which case their modifiers are disabled until every frame is done."""
     scene = context.scene
-    frames_to_render = animation_set.get_frames_to_render()
+    props = scene.SpritesheetPropertyGroup
+    meshes = _find_bounded_objects(props)
+    use_silhouette = props.camera_options.bounds_source == "silhouette"
+    frame_bounds: Dict[PlanKey, Bounds2D] = {}
+
+    # A mesh which deformed too far for its hull in an earlier job may not in this one
+    for entry in _hull_cache.values():
+        entry.num_misses = 0
+
+    if frames_by_set is None:
+        frames_by_set = { index: _frames_to_bound(animation_set) for index, animation_set in enumerate(animation_sets) }
+
+    fingerprints: List[Optional[str]] = [None] * len(animation_sets)
+    if props.camera_options.cache_target_bounds:
+        fingerprints = _load_cached_bounds(context, meshes, rotations_degrees, animation_sets, frames_by_set, frame_bounds)
+
+    num_cached = len(frame_bounds)
+
+    if props.camera_options.bounds_worker_count > 1:
+        missing_frames = { index: [frame for frame in frames if any((angle, index, frame) not in frame_bounds for angle in rotations_degrees)] for index, frames in frames_by_set.items() }
+        worker_bounds, frames_by_set, failures = yield from BoundsWorkers.find_bounds_in_steps(context, rotations_degrees, animation_sets, missing_frames, props.camera_options.bounds_worker_count)
+        _worker_failures.extend(failures)
+
+        for key, (min_x, min_y, max_x, max_y) in worker_bounds.items():
+            frame_bounds[key] = Bounds2D.from_min_and_max_points(Vector((min_x, min_y)), Vector((max_x, max_y)))
+
+    # Silhouettes are rendered, so none of the shortcuts for reading geometry apply to them
+    use_geometry_shortcuts = np is not None and not use_silhouette
+
+    pivots = None
+    if use_geometry_shortcuts and props.rotation_options.control_rotation:
+        pivots = _find_rotation_pivots(props, meshes, animation_sets)
+
+    # Targets which never deform only need their hull points transformed each frame, rather than being evaluated
+    rigid_points = _find_rigid_target_points(context, meshes, animation_sets) if use_geometry_shortcuts else {}
+
+    # Skinned targets can be bounded from their armature's pose instead, so their modifiers don't need to run at all
+    bone_envelopes = {}
+    if use_geometry_shortcuts and props.camera_options.use_bone_envelopes:
+        bone_envelopes = _find_bone_envelopes(props, meshes, animation_sets)
+
+    suspended_modifiers = [modifier for name in bone_envelopes for modifier in bpy.data.objects[name].modifiers if modifier.show_viewport]
+    silhouette = Silhouette.SilhouetteRenderer(context, meshes, props.camera_options.silhouette_resolution) if use_silhouette else None
+
+    for modifier in suspended_modifiers:
+        modifier.show_viewport = False
+
+    try:
+        if silhouette is not None:
+            silhouette.begin()
+
+        yield from _evaluate_frames(context, rotations_degrees, animation_sets, frames_by_set, meshes, pivots, rigid_points, bone_envelopes, silhouette, frame_bounds)
+    finally:
+        if silhouette is not None:
+            silhouette.end()
+
+        for modifier in suspended_modifiers:
+            modifier.show_viewport = True
+
+    if props.camera_options.cache_target_bounds and len(frame_bounds) > num_cached:
+        _store_cached_bounds(fingerprints, frame_bounds)
+
+    return frame_bounds
+
+def _evaluate_frames(context: bpy.types.Context, rotations_degrees: List[Optional[int]], animation_sets: List[Optional[AnimationSetPropertyGroup]],
+                     frames_by_set: Dict[int, List[Optional[int]]], meshes: List[bpy.types.Object], pivots: Optional[Dict[str, Optional[bpy.types.Object]]],
+                     rigid_points: Dict[str, "np.ndarray"], bone_envelopes: Dict[str, _BoneEnvelope], silhouette: Optional[Silhouette.SilhouetteRenderer],
+                     frame_bounds: Dict[PlanKey, Bounds2D]) -> Generator[Progress, None, None]:
+    """Bounds every frame in frames_by_set which isn't already in frame_bounds, adding the results to it."""
+    scene = context.scene
+    props = scene.SpritesheetPropertyGroup
+    num_evaluated = 0
+
+    if pivots is None:
+        num_to_evaluate = sum(1 for angle in rotations_degrees for index, frames in frames_by_set.items() for frame in frames if (angle, index, frame) not in frame_bounds)
+
+        for angle in rotations_degrees:
+            is_missing = lambda animation_set_index, frame, angle = angle: (angle, animation_set_index, frame) not in frame_bounds
+
+            if not any(is_missing(index, frame) for index, frames in frames_by_set.items() for frame in frames):
+                continue
+
+            if props.rotation_options.control_rotation and angle is not None:
+                props.rotation_options.rotate_objects(angle)
+
+            for animation_set_index, frame in _set_each_frame(scene, animation_sets, frames_by_set, is_missing):
+                if silhouette is not None:
+                    frame_bounds[(angle, animation_set_index, frame)] = silhouette.find_bounds()
+                else:
+                    frame_bounds[(angle, animation_set_index, frame)] = _find_camera_target_bounds(context, scene, rigid_points, bone_envelopes)
+
+                num_evaluated += 1
+                yield (num_evaluated, num_to_evaluate)
+    else:
+        m_world_to_cam = props.camera_options.render_camera_obj.rotation_euler.to_matrix().inverted().to_4x4()
+        memory_budget = _memory_budget(props)
+        is_missing = lambda animation_set_index, frame: any((angle, animation_set_index, frame) not in frame_bounds for angle in rotations_degrees)
+        num_to_evaluate = sum(1 for index, frames in frames_by_set.items() for frame in frames if is_missing(index, frame))
+
+        for animation_set_index, frame in _set_each_frame(scene, animation_sets, frames_by_set, is_missing):
+            depsgraph = context.evaluated_depsgraph_get()
+
+            mins = np.full((len(rotations_degrees), 2), np.inf, dtype = np.float32)
+            maxs = np.full((len(rotations_degrees), 2), -np.inf, dtype = np.float32)
+
+            for mesh_obj in meshes:
+                # The pivot's location may be animated, so its rotation matrices are rebuilt every frame
+                pivot = pivots[mesh_obj.name]
+                eval_pivot = pivot.evaluated_get(depsgraph) if pivot is not None else None
+
+                if mesh_obj.name in bone_envelopes:
+                    frame_mins, frame_maxs = _bone_envelope_extents(bone_envelopes[mesh_obj.name], depsgraph,
+                                                                    [m_world_to_cam @ _rotation_about_pivot(eval_pivot, angle) for angle in rotations_degrees])
+                    np.minimum(mins, frame_mins, out = mins)
+                    np.maximum(maxs, frame_maxs, out = maxs)
+                    continue
+
+                eval_obj = mesh_obj.evaluated_get(depsgraph)
+                matrices = [m_world_to_cam @ _rotation_about_pivot(eval_pivot, angle) @ eval_obj.matrix_world for angle in rotations_degrees]
+
+                if mesh_obj.name in rigid_points:
+                    frame_mins, frame_maxs = _camera_space_extents(rigid_points[mesh_obj.name], _projection_rows(matrices), memory_budget)
+                else:
+                    try:
+                        frame_mins, frame_maxs = _mesh_extents(eval_obj.to_mesh(), _projection_rows(matrices), mesh_obj.name, memory_budget)
+                    finally:
+                        eval_obj.to_mesh_clear()
+
+                np.minimum(mins, frame_mins, out = mins)
+                np.maximum(maxs, frame_maxs, out = maxs)
+
+            for i, angle in enumerate(rotations_degrees):
+                frame_bounds[(angle, animation_set_index, frame)] = Bounds2D.from_min_and_max_points(Vector(mins[i].tolist()), Vector(maxs[i].tolist()))
+
+            num_evaluated += 1
+            yield (num_evaluated, num_to_evaluate)
+
+def _frames_to_bound(animation_set: Optional[AnimationSetPropertyGroup]) -> List[Optional[int]]:
+    return [None] if animation_set is None else animation_set.get_frames_to_render()
+
+def _load_cached_bounds(context: bpy.types.Context, meshes: List[bpy.types.Object], rotations_degrees: List[Optional[int]], animation_sets: List[Optional[AnimationSetPropertyGroup]],
+                        frames_by_set: Dict[int, List[Optional[int]]], frame_bounds: Dict[PlanKey, Bounds2D]) -> List[str]:
+    """Adds every cached entry which is still valid to frame_bounds, returning the fingerprint of each animation set."""
+    props = context.scene.SpritesheetPropertyGroup
+    rotation_targets = { t.target.name for t in props.rotation_options.targets if t.target is not None }
+
+    # The angle is part of each entry's key, unless the targets are left at whatever rotation they already have
+    exclude_rotation = props.rotation_options.control_rotation and None not in rotations_degrees
+    scene_fingerprint = BoundsCache.SceneFingerprint(context.scene, props.camera_options.render_camera_obj, meshes, rotation_targets, exclude_rotation)
+
+    fingerprints = []
+
+    for animation_set_index, animation_set in enumerate(animation_sets):
+        fingerprint = scene_fingerprint.for_animation_set(context.scene, animation_set)
+        cached_entries = BoundsCache.load(fingerprint)
+        fingerprints.append(fingerprint)
+
+        for angle in rotations_degrees:
+            for frame in frames_by_set.get(animation_set_index, []):
+                entry = cached_entries.get(BoundsCache.entry_key(angle, frame))
+
+                if entry is not None:
+                    frame_bounds[(angle, animation_set_index, frame)] = Bounds2D.from_min_and_max_points(Vector(entry[:2]), Vector(entry[2:]))
+
+    return fingerprints
+
+def _store_cached_bounds(fingerprints: List[Optional[str]], frame_bounds: Dict[PlanKey, Bounds2D]):
+    entries_by_set: Dict[int, Dict[str, BoundsCache.CachedBounds]] = {}
+
+    for (angle, animation_set_index, frame), bounds in frame_bounds.items():
+        entries = entries_by_set.setdefault(animation_set_index, {})
+        entries[BoundsCache.entry_key(angle, frame)] = (bounds.min_point[0], bounds.min_point[1], bounds.max_point[0], bounds.max_point[1])
+
+    for animation_set_index, entries in entries_by_set.items():
+        if fingerprints[animation_set_index] is not None:
+            # Entries for angles and frames which aren't part of this pass are kept, in case they're needed again later
+            BoundsCache.store(fingerprints[animation_set_index], { **BoundsCache.load(fingerprints[animation_set_index]), **entries })
+
+def _set_each_frame(scene: bpy.types.Scene, animation_sets: List[Optional[AnimationSetPropertyGroup]], frames_by_set: Dict[int, List[Optional[int]]],
+                    should_visit: Callable[[int, Optional[int]], bool]) -> Generator[Tuple[int, Optional[int]], None, None]:
+    """Assigns each animation set's actions and steps the scene through the frames listed for it, yielding the set's index and the frame.
+
+    Frames for which should_visit returns false are skipped, as are animation sets which have no frames left to visit."""
+    for animation_set_index, animation_set in enumerate(animation_sets):
+        frames = [frame for frame in frames_by_set.get(animation_set_index, []) if should_visit(animation_set_index, frame)]
+
+        if len(frames) == 0:
+            continue
+
+        if animation_set is None:
+            yield (animation_set_index, None)
+            continue
+
+        animation_set.assign_actions_to_targets()
+
+        for frame in frames:
+            scene.frame_set(frame)
+            yield (animation_set_index, frame)
+
+def _find_rotation_pivots(props: SpritesheetPropertyGroup, meshes: List[bpy.types.Object], animation_sets: List[Optional[AnimationSetPropertyGroup]]) -> Optional[Dict[str, Optional[bpy.types.Object]]]:
+    """Maps each target mesh's name to the rotation target which rotates it, or None if it isn't affected by rotation.
+
+    Returns None entirely if rotating a target might do more than spin its meshes around its origin: for example if a rotation
+    target has a parent or constraints, a non-XYZ rotation mode or an animated Z rotation, or a mesh is influenced by more than one
+    rotation target."""
+    rotation_targets = { t.target.name: t.target for t in props.rotation_options.targets }
+
+    for pivot in rotation_targets.values():
+        if pivot.parent is not None or len(pivot.constraints) > 0 or pivot.rotation_mode != 'XYZ' or any(pivot.delta_rotation_euler):
+            return None
+
+        actions = [a.action for animation_set in animation_sets if animation_set is not None for a in animation_set.get_selected_actions() if a.target == pivot]
+        fcurves = [fcurve for action in actions for fcurve in action.fcurves]
+
+        if pivot.animation_data is not None:
+            fcurves.extend(pivot.animation_data.drivers)
+
+            if pivot.animation_data.action is not None:
+                fcurves.extend(pivot.animation_data.action.fcurves)
+
+        if any(fcurve.data_path == "rotation_euler" and fcurve.array_index == 2 for fcurve in fcurves):
+            return None
+
+    def find_pivot(obj: bpy.types.Object) -> Tuple[bool, Optional[bpy.types.Object]]:
+        # Returns whether obj's pivot is unambiguous, and the pivot itself
+        found = []
+
+        while obj is not None:
+            if len(obj.constraints) > 0 and obj.name not in rotation_targets:
+                return (False, None)
+
+            if obj.name in rotation_targets:
+                found.append(obj)
+
+            obj = obj.parent
+
+        return (len(found) <= 1, found[0] if found else None)
+
+    pivots = {}
+
+    for mesh_obj in meshes:
+        is_unambiguous, pivot = find_pivot(mesh_obj)
+
+        if not is_unambiguous:
+            return None
+
+        # Deforming modifiers (e.g. armatures) have to be rotated by the same target as the mesh itself
+        for modifier in mesh_obj.modifiers:
+            modifier_obj = getattr(modifier, "object", None)
+
+            if modifier_obj is not None and find_pivot(modifier_obj) != (True, pivot):
+                return None
+
+        pivots[mesh_obj.name] = pivot
+
+    return pivots
+
+def _rotation_about_pivot(pivot: Optional[bpy.types.Object], angle_degrees: Optional[int]) -> Matrix:
+    """The world-space transform which takes the pivot from its current Z rotation to angle_degrees."""
+    if pivot is None or angle_degrees is None:
+        return Matrix.Identity(4)
+
+    delta = math.radians(angle_degrees) - pivot.rotation_euler[2]
+    origin = pivot.matrix_world.translation
+
+    return Matrix.Translation(origin) @ Matrix.Rotation(delta, 4, 'Z') @ Matrix.Translation(-origin)
+
+def _generate_sampled_bounds(context: bpy.types.Context, rotations_degrees: List[Optional[int]], animation_sets: List[Optional[AnimationSetPropertyGroup]],
+                             frames_by_set: Optional[Dict[int, List[Optional[int]]]] = None) -> Generator[Progress, None, Tuple[Dict[PlanKey, Bounds2D], int, int]]:
+    """Like _generate_bounds_for_each_frame, but only bounds enough frames to find the union of each animation set's bounds at each angle.
+
+    Every keyframe of the set's actions is bounded, along with every Nth frame for the sample stride in the camera options. Then,
+    between each pair of neighboring samples, if either side of the bounds moved by enough that a frame in between could reach past
+    the union of all samples so far, the frame halfway between them is bounded too, until no more intervals need refining. Returns
+    the bounds of every sampled frame, the number of frames sampled, and the number of frames which an exhaustive pass would bound.
+    If frames_by_set is provided, the frames it lists for each animation set's index are sampled from instead of every frame to be rendered."""
+    props = context.scene.SpritesheetPropertyGroup
+    stride = props.camera_options.bounds_sample_stride
+
+    if frames_by_set is None:
+        all_frames = [_frames_to_bound(animation_set) for animation_set in animation_sets]
+    else:
+        all_frames = [list(frames_by_set[index]) for index in range(len(animation_sets))]
+    frame_bounds: Dict[PlanKey, Bounds2D] = {}
+
+    # Positions within all_frames which have been sampled so far, for each animation set
+    sampled: List[List[int]] = [[] for _ in animation_sets]
+    pending: Dict[int, List[int]] = {}
+    num_evaluated = 0
+
+    for animation_set_index, animation_set in enumerate(animation_sets):
+        num_frames = len(all_frames[animation_set_index])
+
+        if animation_set is None or num_frames <= 2:
+            pending[animation_set_index] = list(range(num_frames))
+            continue
+
+        positions = set(range(0, num_frames, stride))
+        positions.add(num_frames - 1)
+        positions.update(_keyframe_positions(animation_set, all_frames[animation_set_index]))
+
+        pending[animation_set_index] = sorted(positions)
+
+    while len(pending) > 0:
+        round_frames = { index: [all_frames[index][pos] for pos in positions] for index, positions in pending.items() }
+        # How many frames need refining isn't known ahead of time, so progress only covers the rounds which have started
+        round_bounds, num_evaluated = yield from _offset_progress(_generate_bounds_for_each_frame(context, rotations_degrees, animation_sets, round_frames), num_evaluated)
+        frame_bounds.update(round_bounds)
+
+        for animation_set_index, positions in pending.items():
+            sampled[animation_set_index] = sorted(sampled[animation_set_index] + positions)
+
+        pending = {}
+        unions: Dict[Tuple[Optional[int], int], Bounds2D] = {}
+
+        for (angle, animation_set_index, _), bounds in frame_bounds.items():
+            if (angle, animation_set_index) in unions:
+                unions[(angle, animation_set_index)].encapsulate(bounds)
+            else:
+                unions[(angle, animation_set_index)] = Bounds2D.from_min_and_max_points(bounds.min_point, bounds.max_point)
+
+        for animation_set_index, positions in enumerate(sampled):
+            frames = all_frames[animation_set_index]
+            to_refine = [(start + end) // 2 for start, end in zip(positions, positions[1:])
+                         if end - start > 1 and _could_exceed_union(frame_bounds, unions, rotations_degrees, animation_set_index, frames[start], frames[end])]
+
+            if len(to_refine) > 0:
+                pending[animation_set_index] = to_refine
+
+    return (frame_bounds, sum(len(positions) for positions in sampled), sum(len(frames) for frames in all_frames))
+
+def _offset_progress(steps: Generator[Progress, None, Any], offset: int) -> Generator[Progress, None, Tuple[Any, int]]:
+    """Re-yields the progress of steps with offset added, returning the value steps returned and the final number of frames evaluated."""
+    num_evaluated = offset
+
+    while True:
+        try:
+            num_evaluated, num_to_evaluate = next(steps)
+        except StopIteration as stop:
+            return (stop.value, num_evaluated)
+
+        num_evaluated += offset
+        yield (num_evaluated, num_to_evaluate + offset)
+
+def _run_to_completion(steps: Generator[Progress, None, Any]) -> Any:
+    while True:
+        try:
+            next(steps)
+        except StopIteration as stop:
+            return stop.value
+
+def _keyframe_positions(animation_set: AnimationSetPropertyGroup, frames: List[int]) -> Set[int]:
+    """Positions within frames of the frames on either side of each keyframe in the animation set's actions."""
+    positions = set()
+
+    for action in animation_set.get_selected_actions():
+        for fcurve in action.action.fcurves:
+            for keyframe in fcurve.keyframe_points:
+                pos = bisect.bisect_left(frames, keyframe.co[0])
+
+                if pos < len(frames):
+                    positions.add(pos)
+
+                if pos > 0:
+                    positions.add(pos - 1)
+
+    return positions
+
+def _could_exceed_union(frame_bounds: Dict[PlanKey, Bounds2D], unions: Dict[Tuple[Optional[int], int], Bounds2D], rotations_degrees: List[Optional[int]],
+                        animation_set_index: int, start_frame: int, end_frame: int) -> bool:
+    """Whether, at any angle, a frame between start_frame and end_frame might reach past the union of the animation set's sampled bounds.
+
+    Frames in between are assumed to move past the further of the two samples by no more than the distance between them."""
+    for angle in rotations_degrees:
+        start = frame_bounds[(angle, animation_set_index, start_frame)]
+        end = frame_bounds[(angle, animation_set_index, end_frame)]
+        union = unions[(angle, animation_set_index)]
+
+        # Measure each side outwards, so that larger is always further out
+        for start_extent, end_extent, union_extent in zip((-start.min_point[0], -start.min_point[1], start.max_point[0], start.max_point[1]),
+                                                          (-end.min_point[0], -end.min_point[1], end.max_point[0], end.max_point[1]),
+                                                          (-union.min_point[0], -union.min_point[1], union.max_point[0], union.max_point[1])):
+            if max(start_extent, end_extent) + abs(start_extent - end_extent) > union_extent:
+                return True
+
+    return False
+
+def _add_safety_margin(context: bpy.types.Context, bounds: Bounds2D) -> Bounds2D:
+    """Grows the bounds on every side by the camera options' safety margin, as a percentage of their size."""
+    margin = (context.scene.SpritesheetPropertyGroup.camera_options.bounds_safety_margin / 100) * bounds.size
+
+    return Bounds2D.from_min_and_max_points(bounds.min_point - margin, bounds.max_point + margin)
+
+def _find_camera_target_bounds(context: bpy.types.Context, scene: bpy.types.Scene, rigid_points: Optional[Dict[str, "np.ndarray"]] = None,
+                               bone_envelopes: Optional[Dict[str, _BoneEnvelope]] = None) -> Bounds2D:
+    props = scene.SpritesheetPropertyGroup
+    camera_obj = props.camera_options.render_camera_obj
 
     cumulative_bounds = None
 
-    for index in frames_to_render:
-        scene.frame_set(index)
-        current_bounds = _find_camera_target_bounds(context, scene)
+    for m in _find_target_meshes(props):
+        if bone_envelopes is not None and m.name in bone_envelopes:
+            m_world_to_cam = camera_obj.rotation_euler.to_matrix().inverted().to_4x4()
+            mins, maxs = _bone_envelope_extents(bone_envelopes[m.name], context.evaluated_depsgraph_get(), [m_world_to_cam])
+            bounds = Bounds2D.from_min_and_max_points(Vector(mins[0].tolist()), Vector(maxs[0].tolist()))
+        elif rigid_points is not None and m.name in rigid_points:
+            bounds = _get_rigid_camera_space_bounding_box(context, camera_obj, m, rigid_points[m.name])
+        else:
+            bounds = _get_camera_space_bounding_box(context, camera_obj, m)
 
         if cumulative_bounds is not None:
-            cumulative_bounds.encapsulate(current_bounds)
+            cumulative_bounds.encapsulate(bounds = bounds)
         else:
-            cumulative_bounds = current_bounds
+            cumulative_bounds = bounds
 
     return cumulative_bounds
 
-def _find_camera_target_bounds(context: bpy.types.Context, scene: bpy.types.Scene) -> Bounds2D:
-    props = scene.SpritesheetPropertyGroup
+def _find_bounded_objects(props: SpritesheetPropertyGroup) -> List[bpy.types.Object]:
+    """The objects whose bounds the camera is fit to: every target object when rendering silhouettes, or else only the target meshes."""
+    if props.camera_options.bounds_source == "silhouette":
+        return _find_target_objects(props)
 
-    cumulative_bounds = None
+    return _find_target_meshes(props)
+
+def _find_target_meshes(props: SpritesheetPropertyGroup) -> List[bpy.types.Object]:
+    meshes = [obj for obj in _find_target_objects(props) if obj.type == 'MESH']
 
+    if len(meshes) == 0:
+        raise Exception("Found no meshes within the target set; cannot compute camera bounds")
+
+    return meshes
+
+def _find_target_objects(props: SpritesheetPropertyGroup) -> List[bpy.types.Object]:
     targets = [t.target for t in props.camera_options.targets]
-    meshes = []
+    objects = []
 
     while len(targets) > 0:
         target = targets.pop()
+        objects.append(target)
+        targets.extend(target.children)
 
-        if target.type == 'MESH':
-            meshes.append(target)
+    return objects
 
-        targets.extend(target.children)
+def _find_rigid_target_points(context: bpy.types.Context, meshes: List[bpy.types.Object], animation_sets: List[Optional[AnimationSetPropertyGroup]]) -> Dict[str, "np.ndarray"]:
+    """Maps the name of each target mesh which never deforms to the object-space positions of its convex hull's vertices.
 
-    if len(meshes) == 0:
-        raise Exception("Found no meshes within the target set; cannot compute camera bounds")
+    A mesh is rigid if it has no animated shape keys, and only has modifiers from _RIGID_MODIFIER_TYPES which don't reference
+    other objects and aren't animated by any action or driver. Its bounds can then be found from its hull and matrix_world alone."""
+    depsgraph = context.evaluated_depsgraph_get()
+    rigid_points = {}
 
-    for m in meshes:
-        bounds = _get_camera_space_bounding_box(context, props.camera_options.render_camera_obj, m)
+    for mesh_obj in meshes:
+        if not _is_rigid(mesh_obj, animation_sets):
+            continue
 
-        if cumulative_bounds is not None:
-            cumulative_bounds.encapsulate(bounds = bounds)
-        else:
-            cumulative_bounds = bounds
+        eval_obj = mesh_obj.evaluated_get(depsgraph)
+        mesh = eval_obj.to_mesh()
 
-    return cumulative_bounds
+        try:
+            num_verts = len(mesh.vertices)
+
+            if num_verts == 0:
+                continue
+
+            coords = np.empty(num_verts * 3, dtype = np.float32)
+            mesh.vertices.foreach_get("co", coords)
+            rigid_points[mesh_obj.name] = coords.reshape(num_verts, 3)[_convex_hull_vertex_indices(mesh)]
+        finally:
+            eval_obj.to_mesh_clear()
+
+    return rigid_points
+
+def _is_rigid(mesh_obj: bpy.types.Object, animation_sets: List[Optional[AnimationSetPropertyGroup]]) -> bool:
+    shape_keys = mesh_obj.data.shape_keys
+
+    if mesh_obj.data.animation_data is not None or (shape_keys is not None and shape_keys.animation_data is not None):
+        return False
+
+    for modifier in mesh_obj.modifiers:
+        if modifier.type not in _RIGID_MODIFIER_TYPES:
+            return False
+
+        if any(isinstance(getattr(modifier, prop.identifier, None), bpy.types.Object) for prop in modifier.bl_rna.properties if prop.type == 'POINTER'):
+            return False
+
+    return not any(fcurve.data_path.startswith("modifiers[") for fcurve in _find_object_fcurves(mesh_obj, animation_sets))
+
+def _find_object_fcurves(obj: bpy.types.Object, animation_sets: List[Optional[AnimationSetPropertyGroup]]) -> List[bpy.types.FCurve]:
+    """Every F-curve which can animate the object during the job: its drivers, its own action and any actions the animation sets assign it."""
+    fcurves = [fcurve for animation_set in animation_sets if animation_set is not None
+               for a in animation_set.get_selected_actions() if a.target == obj for fcurve in a.action.fcurves]
+
+    if obj.animation_data is not None:
+        fcurves.extend(obj.animation_data.drivers)
+
+        if obj.animation_data.action is not None:
+            fcurves.extend(obj.animation_data.action.fcurves)
+
+    return fcurves
+
+def _find_bone_envelopes(props: SpritesheetPropertyGroup, meshes: List[bpy.types.Object], animation_sets: List[Optional[AnimationSetPropertyGroup]]) -> Dict[str, _BoneEnvelope]:
+    """Maps the name of each target mesh which can be bounded by its armature's bones to its envelope (see _BoneEnvelope).
+
+    Only meshes which are parented to their armature, aren't otherwise animated or rotated, have no shape keys, and are deformed by a single
+    vertex group Armature modifier (followed by nothing which can move points outside of its result's hull) are eligible."""
+    rotation_targets = set()
+    if props.rotation_options.control_rotation:
+        rotation_targets = { t.target.name for t in props.rotation_options.targets if t.target is not None }
+
+    envelopes = {}
+
+    for mesh_obj in meshes:
+        if mesh_obj.name in rotation_targets or not _is_only_skinned(mesh_obj, animation_sets):
+            continue
+
+        envelope = _build_bone_envelope(mesh_obj, mesh_obj.parent)
+
+        if envelope is not None:
+            envelopes[mesh_obj.name] = envelope
+
+    return envelopes
+
+def _is_only_skinned(mesh_obj: bpy.types.Object, animation_sets: List[Optional[AnimationSetPropertyGroup]]) -> bool:
+    armature_obj = mesh_obj.parent
+
+    # The envelope is built in armature space, so the mesh has to stay fixed relative to its armature
+    if armature_obj is None or armature_obj.type != 'ARMATURE' or mesh_obj.parent_type != 'OBJECT' or len(mesh_obj.constraints) > 0:
+        return False
+
+    if mesh_obj.data.shape_keys is not None or mesh_obj.data.animation_data is not None or len(_find_object_fcurves(mesh_obj, animation_sets)) > 0:
+        return False
+
+    modifiers = list(mesh_obj.modifiers)
+
+    if len(modifiers) == 0 or modifiers[0].type != 'ARMATURE':
+        return False
+
+    # Envelope and dual quaternion deformation don't blend each bone's transform linearly, so the envelope wouldn't enclose them
+    armature_mod = modifiers[0]
+    if (armature_mod.object != armature_obj or not armature_mod.use_vertex_groups or armature_mod.use_bone_envelopes or armature_mod.use_deform_preserve_volume
+            or armature_mod.use_multi_modifier or armature_mod.vertex_group != ""):
+        return False
+
+    return all(modifier.type in _HULL_PRESERVING_MODIFIER_TYPES for modifier in modifiers[1:])
+
+def _build_bone_envelope(mesh_obj: bpy.types.Object, armature_obj: bpy.types.Object) -> Optional[_BoneEnvelope]:
+    mesh = mesh_obj.data
+    num_verts = len(mesh.vertices)
+
+    if num_verts == 0:
+        return None
+
+    coords = np.empty(num_verts * 3, dtype = np.float32)
+    mesh.vertices.foreach_get("co", coords)
+
+    m_mesh_to_armature = np.array(armature_obj.matrix_world.inverted() @ mesh_obj.matrix_world, dtype = np.float32)
+    points = coords.reshape(num_verts, 3) @ m_mesh_to_armature[:3, :3].T + m_mesh_to_armature[:3, 3]
+
+    # Vertex groups which deform the mesh, mapped to the index of their bone in the pose
+    pose_bones = armature_obj.pose.bones
+    group_bones = { group.index: pose_bones.find(group.name) for group in mesh_obj.vertex_groups
+                    if group.name in pose_bones and pose_bones[group.name].bone.use_deform }
+
+    # Vertex weights have no bulk accessor; this only happens once per bounds pass, not once per frame
+    vertex_indices = []
+    bone_indices = []
+
+    for vertex in mesh.vertices:
+        for group in vertex.groups:
+            if group.weight > 0 and group.group in group_bones:
+                vertex_indices.append(vertex.index)
+                bone_indices.append(group_bones[group.group])
+
+    vertex_indices = np.array(vertex_indices, dtype = np.int64)
+    bone_indices = np.array(bone_indices, dtype = np.int64)
+
+    is_weighted = np.zeros(num_verts, dtype = bool)
+    is_weighted[vertex_indices] = True
+
+    order = np.argsort(bone_indices, kind = "stable")
+    used_bones, starts = np.unique(bone_indices[order], return_index = True)
+    radii = np.empty(len(used_bones), dtype = np.float32)
+
+    for i, (bone_index, bone_vertices) in enumerate(zip(used_bones, np.split(vertex_indices[order], starts[1:]))):
+        bone = pose_bones[int(bone_index)].bone
+
+        # B-Bones curve between their head and tail, so their vertices can't be bounded from the straight segment
+        if bone.bbone_segments > 1:
+            return None
+
+        radii[i] = _distance_to_segment(points[bone_vertices], np.array(bone.head_local), np.array(bone.tail_local)).max()
+
+    return _BoneEnvelope(armature_obj, used_bones, radii, points[~is_weighted])
+
+def _distance_to_segment(points: "np.ndarray", start: "np.ndarray", end: "np.ndarray") -> "np.ndarray":
+    direction = end - start
+    length_squared = float(direction @ direction)
+
+    t = np.zeros(len(points)) if length_squared == 0 else np.clip((points - start) @ direction / length_squared, 0, 1)
+    return np.linalg.norm(points - (start + t[:, None] * direction), axis = 1)
+
+def _bone_envelope_extents(envelope: _BoneEnvelope, depsgraph: bpy.types.Depsgraph, world_to_views: List[Matrix]) -> Tuple["np.ndarray", "np.ndarray"]:
+    """Returns the camera-space minimum and maximum points of an envelope's posed bones for each world-to-camera matrix, as (num_views, 2) arrays."""
+    eval_armature = envelope.armature.evaluated_get(depsgraph)
+    pose_bones = eval_armature.pose.bones
+    num_bones = len(pose_bones)
+
+    heads = np.empty(num_bones * 3, dtype = np.float32)
+    tails = np.empty(num_bones * 3, dtype = np.float32)
+    pose_matrices = np.empty(num_bones * 16, dtype = np.float32)
+
+    pose_bones.foreach_get("head", heads)
+    pose_bones.foreach_get("tail", tails)
+    pose_bones.foreach_get("matrix", pose_matrices)
+
+    indices = envelope.pose_bone_indices
+    heads = heads.reshape(num_bones, 3)[indices]
+    tails = tails.reshape(num_bones, 3)[indices]
+
+    projections = _projection_rows([m @ eval_armature.matrix_world for m in world_to_views])
+    mins = np.full((len(world_to_views), 2), np.inf, dtype = np.float32)
+    maxs = np.full((len(world_to_views), 2), -np.inf, dtype = np.float32)
+
+    if len(indices) > 0:
+        # A bone (or the armature) which is scaled up moves its vertices further from it; the largest singular value is the most any direction is stretched
+        bone_scales = np.linalg.svd(pose_matrices.reshape(num_bones, 4, 4)[indices, :3, :3], compute_uv = False)[:, 0]
+        armature_scale = np.linalg.svd(np.array(eval_armature.matrix_world.to_3x3()), compute_uv = False)[0]
+        radii = (envelope.radii * bone_scales * armature_scale)[None, :, None]
+
+        cam_heads = _to_camera_space(heads, projections)
+        cam_tails = _to_camera_space(tails, projections)
+
+        np.minimum(mins, (np.minimum(cam_heads, cam_tails) - radii).min(axis = 1), out = mins)
+        np.maximum(maxs, (np.maximum(cam_heads, cam_tails) + radii).max(axis = 1), out = maxs)
+
+    if len(envelope.static_points) > 0:
+        cam_static = _to_camera_space(envelope.static_points, projections)
+        np.minimum(mins, cam_static.min(axis = 1), out = mins)
+        np.maximum(maxs, cam_static.max(axis = 1), out = maxs)
+
+    return (mins, maxs)
+
+def _get_rigid_camera_space_bounding_box(context: bpy.types.Context, camera_obj: bpy.types.Object, target_obj: bpy.types.Object, points: "np.ndarray") -> Bounds2D:
+    depsgraph = context.evaluated_depsgraph_get()
+    m_obj_to_cam = camera_obj.rotation_euler.to_matrix().inverted().to_4x4() @ target_obj.evaluated_get(depsgraph).matrix_world
+
+    mins, maxs = _camera_space_extents(points, _projection_rows([m_obj_to_cam]), _memory_budget(context.scene.SpritesheetPropertyGroup))
+    return Bounds2D.from_min_and_max_points(Vector(mins[0].tolist()), Vector(maxs[0].tolist()))
 
 def _get_camera_space_bounding_box(context: bpy.types.Context, camera_obj: bpy.types.Object, target_obj: bpy.types.Object) -> Bounds2D:
-    # TODO support more than just meshes (esp. metaballs)
+    # Other object types can only be bounded by rendering their silhouettes (see Silhouette)
     if target_obj.type != 'MESH':
         raise Exception(f"Target object {target_obj} is not a mesh")
 
@@ -185,10 +995,148 @@ def _get_camera_space_bounding_box(context: bpy.types.Context, camera_obj: bpy.t
     depsgraph = context.evaluated_depsgraph_get()
     target_obj = target_obj.evaluated_get(depsgraph)
 
-    m_obj_to_world = target_obj.matrix_world
-    m_world_to_cam = camera_obj.rotation_euler.to_matrix().inverted()
+    # Fuse object-to-world and world-to-camera into one transform; only camera-space X and Y matter for the bounds
+    m_obj_to_cam = camera_obj.rotation_euler.to_matrix().inverted().to_4x4() @ target_obj.matrix_world
+
+    mesh = target_obj.to_mesh()
+
+    try:
+        if np is not None:
+            mins, maxs = _mesh_extents(mesh, _projection_rows([m_obj_to_cam]), target_obj.name, _memory_budget(context.scene.SpritesheetPropertyGroup))
+            return Bounds2D.from_min_and_max_points(Vector(mins[0].tolist()), Vector(maxs[0].tolist()))
+
+        return Bounds2D.from_points(m_obj_to_cam @ v.co for v in mesh.vertices)
+    finally:
+        # Evaluated meshes aren't freed until the object is, so release it before the next frame allocates another
+        target_obj.to_mesh_clear()
+
+def _projection_rows(matrices: List[Matrix]) -> "np.ndarray":
+    """Stacks the camera-space X and Y rows of several object-to-camera matrices into a (num_views, 2, 4) array."""
+    return np.array([[m[0], m[1]] for m in matrices], dtype = np.float32)
+
+def _mesh_extents(mesh: bpy.types.Mesh, projections: "np.ndarray", cache_key: str, memory_budget: int) -> Tuple["np.ndarray", "np.ndarray"]:
+    """Returns the camera-space minimum and maximum points of the mesh for each view in projections, each as a (num_views, 2) array."""
+    num_verts = len(mesh.vertices)
+
+    if num_verts == 0:
+        raise Exception(f"Mesh {mesh.name} has no vertices; cannot compute camera bounds")
+
+    coords = np.empty(num_verts * 3, dtype = np.float32)
+    mesh.vertices.foreach_get("co", coords)
+    coords = coords.reshape(num_verts, 3)
+
+    topology = (num_verts, len(mesh.edges), len(mesh.polygons))
+    entry = _hull_cache.get(cache_key)
+
+    if entry is None or entry.topology != topology:
+        # New or re-topologized mesh: build the hull from its current shape
+        entry = _HullCacheEntry(topology, coords, *_convex_hull(mesh), memory_budget)
+        _hull_cache[cache_key] = entry
+
+    if entry.num_misses < _MAX_HULL_MISSES:
+        hull_shift = np.sqrt(np.max(np.sum((coords[entry.candidates] - entry.candidate_rest) ** 2, axis = 1)))
+        others_shift = np.sqrt(np.sum((coords[entry.others] - entry.others_rest) ** 2, axis = 1))
+
+        # See _HullCacheEntry for why this guarantees no other vertex is outside of the candidates' bounds in any view
+        if np.all(others_shift + hull_shift <= entry.slack):
+            entry.num_misses = 0
+            return _camera_space_extents(coords[entry.candidates], projections, memory_budget, coords.nbytes + others_shift.nbytes)
+
+        # Measure future movement from this shape instead, unless the mesh keeps deforming too far for the hull to be worth rebuilding
+        num_misses = entry.num_misses + 1
+
+        if num_misses < _MAX_HULL_MISSES:
+            entry = _HullCacheEntry(topology, coords, *_convex_hull(mesh), memory_budget)
+            _hull_cache[cache_key] = entry
+
+        entry.num_misses = num_misses
+
+    # coords is both the input and what's held in the meantime, so it's only counted once
+    return _camera_space_extents(coords, projections, memory_budget)
+
+def _camera_space_extents(points: "np.ndarray", projections: "np.ndarray", memory_budget: int, held_bytes: int = 0) -> Tuple["np.ndarray", "np.ndarray"]:
+    """Returns the camera-space minimum and maximum of the points for each view in projections, each as a (num_views, 2) array.
+
+    The points are transformed in chunks small enough to stay within memory_budget bytes, so that huge meshes seen from many angles
+    don't need a (num_views, num_points, 2) array all at once. With no points, the extents are infinite. held_bytes is how much
+    memory the caller is holding on to for the same mesh meanwhile, for take_peak_memory."""
+    #pylint: disable=global-statement
+    global _peak_memory
+    num_views = len(projections)
+    chunk_size = max(1024, memory_budget // (num_views * _BYTES_PER_VERTEX_VIEW))
+
+    mins = np.full((num_views, 2), np.inf, dtype = np.float32)
+    maxs = np.full((num_views, 2), -np.inf, dtype = np.float32)
+
+    for start in range(0, len(points), chunk_size):
+        cam_coords = _to_camera_space(points[start : start + chunk_size], projections)
+        _peak_memory = max(_peak_memory, held_bytes + points.nbytes + cam_coords.nbytes)
+
+        np.minimum(mins, cam_coords.min(axis = 1), out = mins)
+        np.maximum(maxs, cam_coords.max(axis = 1), out = maxs)
+
+    return (mins, maxs)
+
+def _distances_inside_hull(points: "np.ndarray", coords: "np.ndarray", hull_faces: "np.ndarray", memory_budget: int) -> "np.ndarray":
+    """Returns how far inside the convex hull each point is, given the hull's triangles as (num_faces, 3) indices into coords.
+
+    Points outside of the hull, or every point if the hull is flat or missing, are given a distance of 0."""
+    if len(hull_faces) == 0:
+        return np.zeros(len(points), dtype = np.float32)
+
+    corners = coords[hull_faces]
+    normals = np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0])
+    lengths = np.linalg.norm(normals, axis = 1)
+
+    # Slivers have no meaningful normal, and the remaining faces still enclose the hull
+    is_valid = lengths > 0
+    normals = normals[is_valid] / lengths[is_valid, None]
+    corners = corners[is_valid]
+
+    if len(normals) == 0:
+        return np.zeros(len(points), dtype = np.float32)
+
+    # Point every normal away from the hull's interior
+    offsets = np.sum(normals * corners[:, 0], axis = 1)
+    center = coords[np.unique(hull_faces)].mean(axis = 0)
+    flip = normals @ center > offsets
+    normals[flip] *= -1
+    offsets[flip] *= -1
+
+    distances = np.empty(len(points), dtype = np.float32)
+    chunk_size = max(1024, memory_budget // (len(normals) * 8))
+
+    for start in range(0, len(points), chunk_size):
+        distances[start : start + chunk_size] = np.min(offsets - points[start : start + chunk_size] @ normals.T, axis = 1)
+
+    return np.maximum(distances, 0)
+
+def _memory_budget(props: SpritesheetPropertyGroup) -> int:
+    return props.camera_options.bounds_memory_budget * 1024 * 1024
+
+def _to_camera_space(points: "np.ndarray", projections: "np.ndarray") -> "np.ndarray":
+    """Transforms (num_points, 3) points by every view in projections; one matrix multiply gives a (num_views, num_points, 2) result."""
+    return points @ projections[:, :, :3].transpose(0, 2, 1) + projections[:, None, :, 3]
+
+def _convex_hull(mesh: bpy.types.Mesh) -> Tuple["np.ndarray", "np.ndarray"]:
+    """Returns the indices of the vertices on the mesh's convex hull, and the hull's triangles as (num_faces, 3) vertex indices."""
+    bm = bmesh.new()
+
+    try:
+        bm.from_mesh(mesh)
+        bm.verts.index_update()
+
+        result = bmesh.ops.convex_hull(bm, input = bm.verts)
+        indices = sorted({ele.index for ele in result["geom"] if isinstance(ele, bmesh.types.BMVert)})
+        faces = [[v.index for v in ele.verts[:3]] for ele in result["geom"] if isinstance(ele, bmesh.types.BMFace) and len(ele.verts) >= 3]
+    finally:
+        bm.free()
+
+    # Flat or degenerate meshes may not produce a hull; treat every vertex as a candidate instead
+    if len(indices) == 0:
+        return (np.arange(len(mesh.vertices)), np.zeros((0, 3), dtype = np.int64))
 
-    obj_verts = target_obj.to_mesh().vertices
-    cam_verts = [m_world_to_cam @ (m_obj_to_world @ v.co) for v in obj_verts]
+    return (np.array(indices, dtype = np.int64), np.array(faces, dtype = np.int64).reshape(-1, 3))
 
-    return Bounds2D.from_points(cam_verts)
+def _convex_hull_vertex_indices(mesh: bpy.types.Mesh) -> "np.ndarray":
+    return _convex_hull(mesh)[0]
@@ -0,0 +1,71 @@
+import bpy
+from typing import Any, Dict, List, Optional, Tuple
+
+from . import SceneSnapshot
+
+# (rotation, animation set index, frame); parts which don't affect the camera in the plan's control mode are None
+PlanKey = Tuple[Optional[int], Optional[int], Optional[int]]
+
+# (location x, location y, location z, ortho scale)
+PlanEntry = Tuple[float, float, float, float]
+
+class CameraPlan:
+    """The camera location and ortho scale for every part of a render job.
+
+    Plans are computed once when the job starts (see Camera.build_camera_plan), so that rendering only has to look up and apply
+    an entry instead of re-fitting the camera for every material set. How finely the plan is divided depends on the camera
+    control mode: "move_once" has a single entry, "move_each_rotation" has one per rotation, "move_each_animation" one per
+    rotation and animation set, and "move_each_frame" one per rotation, animation set and frame."""
+
+    __slots__ = ("control_mode", "entries", "num_frames_bounded", "num_frames_total")
+
+    def __init__(self, control_mode: str):
+        self.control_mode: str = control_mode
+        self.entries: Dict[PlanKey, PlanEntry] = {}
+
+        # How many frames were bounded to compute the plan, out of the total; fewer are bounded when sampling is enabled
+        self.num_frames_bounded: int = 0
+        self.num_frames_total: int = 0
+
+    def apply(self, camera: bpy.types.Camera, camera_obj: bpy.types.Object, rotation: Optional[int] = None, animation_set_index: Optional[int] = None, frame: Optional[int] = None):
+        x, y, z, ortho_scale = self.entries[self.key(rotation, animation_set_index, frame)]
+
+        SceneSnapshot.set_value(camera_obj, "location", (x, y, z))
+        SceneSnapshot.set_value(camera, "ortho_scale", ortho_scale)
+
+    def key(self, rotation: Optional[int], animation_set_index: Optional[int], frame: Optional[int]) -> PlanKey:
+        if self.control_mode == "move_once":
+            return (None, None, None)
+
+        if self.control_mode == "move_each_rotation":
+            return (rotation, None, None)
+
+        if self.control_mode == "move_each_animation":
+            return (rotation, animation_set_index, None)
+
+        return (rotation, animation_set_index, frame)
+
+    def to_json(self, animation_set_names: List[Optional[str]]) -> Dict[str, Any]:
+        entries = []
+
+        for (rotation, animation_set_index, frame), (x, y, z, ortho_scale) in sorted(self.entries.items(), key = lambda item: tuple(-1 if k is None else k for k in item[0])):
+            entry = {}
+
+            if rotation is not None:
+                entry["rotation"] = rotation
+
+            if animation_set_index is not None:
+                entry["animationSet"] = animation_set_names[animation_set_index]
+
+            if frame is not None:
+                entry["frame"] = frame
+
+            entry["location"] = [x, y, z]
+            entry["orthoScale"] = ortho_scale
+
+            entries.append(entry)
+
+        return {
+            "controlMode": self.control_mode,
+            "entries": entries
+        }
@@ -1,23 +1,50 @@
 import glob
 import math
 import os
+import shutil
 import subprocess
-from typing import Any, Dict, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 
 from .. import preferences
 
 from . import FileSystemUtil
 
-def assemble_frames_into_spritesheet(sprite_size: Tuple[int, int], total_num_frames: int, temp_dir_path: str, output_file_path: str) -> Dict[str, Any]:
-    image_magick_args = _image_magick_args(sprite_size, total_num_frames, temp_dir_path, output_file_path)
-    process_output = subprocess.run(image_magick_args["argsList"], stdout = subprocess.PIPE, stderr = subprocess.PIPE, cwd = temp_dir_path, text = True, check = False)
+# A 1x1 transparent pseudo-image, which is expanded to an empty tile wherever it appears in the input
+_EMPTY_TILE = "null:"
 
-    return {
+# Results of running `magick -version`, keyed by executable path and modification time
+_executable_checks: Dict[Tuple[str, float], Tuple[bool, str, str]] = {}
+
+def assemble_frames_into_spritesheet(sprite_size: Tuple[int, int], total_num_frames: int, temp_dir_path: str, output_file_path: str,
+                                     compression_level: int = 7, thread_limit: int = 0, gutter: int = 0, layout: Optional[Dict[str, Any]] = None,
+                                     file_groups: Optional[List[List[str]]] = None, pad_to_size: Optional[Tuple[int, int]] = None, square_size: Optional[int] = None,
+                                     write_png: bool = True, read_pixels: bool = False) -> Dict[str, Any]:
+    """Combines every frame in temp_dir_path into a spritesheet using a single ImageMagick process.
+
+    Tiling, gutter extrusion, padding to pad_to_size and trimming/resizing to square_size all happen in memory, and the result is
+    written once. If file_groups is provided, each group of frame file paths (e.g. each animation, in render order) starts on a new row.
+    If read_pixels is true, the finished sheet's 8-bit RGBA pixels are also returned under the "pixels" key, in the
+    same (width, height, pixels) form as ImageOps uses; if write_png is false, no PNG is written at all."""
+    image_magick_args = _image_magick_args(sprite_size, total_num_frames, temp_dir_path, output_file_path, compression_level, thread_limit, gutter, layout, file_groups,
+                                           pad_to_size, square_size, write_png, read_pixels)
+    process_output = subprocess.run(image_magick_args["argsList"], stdout = subprocess.PIPE, stderr = subprocess.PIPE, cwd = temp_dir_path, check = False)
+
+    output = {
         "args": image_magick_args,
-        "stderr": str(process_output.stderr),
+        "stderr": process_output.stderr.decode(errors = "replace"),
         "succeeded": process_output.returncode == 0
     }
 
+    if read_pixels and output["succeeded"]:
+        output["pixels"] = _parse_pam(process_output.stdout)
+
+    return output
+
+def get_image_magick_version(path: str = None) -> Optional[str]:
+    """Returns the first line of `magick -version` for the given path (or the path in the addon preferences), or None if ImageMagick isn't there."""
+    result = _check_executable(path or preferences.PrefsAccess.image_magick_path)
+    return result[2] if result[0] else None
+
 def locate_image_magick_exe() -> Optional[str]:
     system = FileSystemUtil.get_system_type()
     if system != "windows":
@@ -42,101 +69,146 @@ def locate_image_magick_exe() -> Optional[str]:
 
     return None
 
-def pad_image_to_size(image_path: str, size: Tuple[int, int]) -> bool:
-    extent_arg = str(size[0]) + "x" + str(size[1])
+def validate_image_magick_at_path(path: str = None) -> Tuple[bool, Optional[str]]:
+    """Checks that ImageMagick is installed at the given path, or the path stored in the addon preferences if no path is provided.
 
-    args = [
-        preferences.PrefsAccess.image_magick_path,
-        "convert",
-        "-background",
-        "none", # added pixels will be transparent
-        "-gravity",
-        "NorthWest", # keep existing image stationary relative to upper left corner
-        image_path, # input image
-        "-extent",
-        extent_arg,
-        image_path # output image
-    ]
+    Results are cached for as long as the executable's modification time doesn't change, so this is cheap to call before every job."""
+
+    if not path:
+        if not preferences.PrefsAccess.image_magick_path:
+            return (False, "ImageMagick path is not configured in Addon Preferences")
 
-    process_output = subprocess.run(args, stdout = subprocess.PIPE, stderr = subprocess.PIPE, check = False)
+        path = preferences.PrefsAccess.image_magick_path
 
-    return process_output.returncode == 0
+    succeeded, stderr, _ = _check_executable(path)
+    return (succeeded, stderr)
 
-def trim_and_resize_image_ignore_aspect(image_path: str, size: Tuple[int, int]) -> bool:
-    # Size: ! indicates to force size and not try to preserve the aspect ratio
-    size_arg = str(size[0]) + "x" + str(size[1]) + "!"
+def _align_groups_to_rows(files: List[str], file_groups: List[List[str]], num_columns: int) -> List[str]:
+    """Lays out each group of files in the order given, with empty tiles after each group so that every group starts at the beginning of a row.
 
-    args = [
-        preferences.PrefsAccess.image_magick_path,
-        "convert",
-        image_path, # input image
-        "-trim",
-        "-resize",
-        size_arg,
-        image_path # output image
-    ]
+    The groups' own order is used rather than the sorted file names, which sort by animation set name rather than the order sets were rendered in."""
+    grouped_files = [f for group in file_groups for f in group]
 
-    process_output = subprocess.run(args, stdout = subprocess.PIPE, stderr = subprocess.PIPE, check = False)
+    if sorted(grouped_files) != files:
+        raise RuntimeError(f"Frame groups contain {len(grouped_files)} files, which don't match the {len(files)} files found")
 
-    return process_output.returncode == 0
+    aligned_files = []
 
-def validate_image_magick_at_path(path: str = None) -> Tuple[bool, Optional[str]]:
-    """Checks that ImageMagick is installed at the given path, or the path stored in the addon preferences if no path is provided."""
+    for group in file_groups:
+        aligned_files.extend(group)
+        aligned_files.extend([_EMPTY_TILE] * (-len(group) % num_columns))
 
-    if not path:
-        if not preferences.PrefsAccess.image_magick_path:
-            return (False, "ImageMagick path is not configured in Addon Preferences")
+    return aligned_files
 
-        path = preferences.PrefsAccess.image_magick_path
+def _check_executable(path: str) -> Tuple[bool, str, str]:
+    resolved_path = shutil.which(path) or path
+
+    try:
+        cache_key = (resolved_path, os.path.getmtime(resolved_path))
+    except OSError:
+        cache_key = None
+
+    if cache_key in _executable_checks:
+        return _executable_checks[cache_key]
 
     # Just run a basic command to make sure ImageMagick is installed and the path is correct
     process_output = subprocess.run([path, "-version"], stdout = subprocess.PIPE, stderr = subprocess.PIPE, text = True, check = False)
+    version = process_output.stdout.splitlines()[0] if process_output.stdout else ""
+    result = (process_output.returncode == 0, str(process_output.stderr), version)
 
-    return (process_output.returncode == 0, str(process_output.stderr))
+    # Paths which don't point at a file can't be tracked for changes, so they're checked every time
+    if cache_key is not None:
+        _executable_checks[cache_key] = result
 
-def _image_magick_args(sprite_size: Tuple[int, int], num_images: int, temp_dir_path: str, output_file_path: str) -> Dict[str, Any]:
+    return result
+
+def _encoder_args(compression_level: int, thread_limit: int) -> List[str]:
+    """Arguments controlling how ImageMagick writes PNG output. A thread_limit of 0 leaves ImageMagick's default (all cores) in place."""
+    args = ["-define", f"png:compression-level={compression_level}"]
+
+    if thread_limit > 0:
+        args = ["-limit", "thread", str(thread_limit)] + args
+
+    return args
+
+def _image_magick_args(sprite_size: Tuple[int, int], num_images: int, temp_dir_path: str, output_file_path: str, compression_level: int, thread_limit: int, gutter: int,
+                       layout: Optional[Dict[str, Any]], file_groups: Optional[List[List[str]]], pad_to_size: Optional[Tuple[int, int]], square_size: Optional[int],
+                       write_png: bool, read_pixels: bool) -> Dict[str, Any]:
     # We need the input files to be in this known order, but the command line
-    # won't let us pass too many files at once. ImageMagick supports reading in
-    # file names from a text file, so we write everything to a temp file and pass that.
+    # won't let us pass too many files at once. ImageMagick can read its whole
+    # command from a script file, so we write everything to a temp file and pass that.
     files = sorted(glob.glob(os.path.join(temp_dir_path, "*.png")))
-    in_file_path = os.path.join(temp_dir_path, "filelist.txt")
+    script_file_path = os.path.join(temp_dir_path, "spritesheet.mgk")
 
     if len(files) != num_images:
         raise RuntimeError(f"There should be {num_images} images, but found {len(files)} files")
 
-    with open(in_file_path, "w") as f:
-        quoted_files_string = "\n".join('"{0}"'.format(os.path.basename(f)) for f in files)
-        f.write(quoted_files_string)
-
-    resolution = str(sprite_size[0]) + "x" + str(sprite_size[1])
-    spacing = "+0+0" # no spacing between images in grid, or between grid and image edge
-    geometry_arg = resolution + spacing
-
     # ImageMagick only needs the number of rows, and it can then figure out the
     # number of columns, but we need both for our own data processing anyway
-    num_rows = math.floor(math.sqrt(num_images))
-    num_columns = math.ceil(num_images / num_rows)
-    tile_arg = str(num_columns) + "x" + str(num_rows)
+    if layout is None:
+        num_rows = math.floor(math.sqrt(num_images))
+        num_columns = math.ceil(num_images / num_rows)
+    else:
+        num_columns = layout["numColumns"]
+        num_rows = layout["numRows"]
+
+    if file_groups:
+        files = _align_groups_to_rows(files, file_groups, num_columns)
+
+    # Each cell has the gutter on every side; between images this adds up to twice the gutter
+    cell_size = (sprite_size[0] + 2 * gutter, sprite_size[1] + 2 * gutter)
+    num_pixels_wide = num_columns * cell_size[0]
+    num_pixels_tall = num_rows * cell_size[1]
+
+    script_args = [
+        *_encoder_args(compression_level, thread_limit),
+        "-background",
+        "none",
+        *[os.path.basename(f) for f in files] # paths are relative to cwd
+    ]
+
+    if gutter > 0:
+        # Grow every image by the gutter, filling the new pixels by repeating the image's edges
+        script_args += ["-virtual-pixel", "edge", "-filter", "point", "-set", "option:distort:viewport", f"{cell_size[0]}x{cell_size[1]}-{gutter}-{gutter}", "-distort", "SRT", "0", "+filter", "+repage"]
+    else:
+        script_args += ["-gravity", "center", "-extent", f"{cell_size[0]}x{cell_size[1]}"]
+
+    # Join each row's images horizontally, then stack the rows; the final extent fills out a partial last row
+    for row in range(num_rows):
+        first_index = row * num_columns
+        last_index = min(first_index + num_columns, len(files)) - 1
+
+        if first_index <= last_index:
+            script_args += ["(", "-clone", f"{first_index}-{last_index}", "+append", ")"]
 
-    # Not needed for ImageMagick, but useful info to return
-    num_pixels_wide = num_columns * sprite_size[0]
-    num_pixels_tall = num_rows * sprite_size[1]
+    script_args += ["-delete", f"0-{len(files) - 1}", "-gravity", "NorthWest", "-append", "-extent", f"{num_pixels_wide}x{num_pixels_tall}", "+repage"]
+
+    if pad_to_size is not None:
+        script_args += ["-extent", f"{pad_to_size[0]}x{pad_to_size[1]}"] # added pixels will be transparent
+
+    if square_size is not None:
+        # Size: ! indicates to force size and not try to preserve the aspect ratio
+        script_args += ["-trim", "+repage", "-resize", f"{square_size}x{square_size}!"]
+
+    if write_png:
+        script_args += ["-write", output_file_path]
+
+    if read_pixels:
+        # Always emit 4 channels in the Portable Arbitrary Map format, which has a simple text header
+        script_args += ["-depth", "8", "-type", "TrueColorAlpha", "-write", "PAM:-"]
+
+    with open(script_file_path, "w") as f:
+        f.write("\n".join(_quote_script_arg(arg) for arg in script_args))
 
     args_list = [
         preferences.PrefsAccess.image_magick_path,
-        "montage",
-        "@" + os.path.basename(in_file_path), # '@' prefix indicates to read input files from a text file; path needs to be relative to cwd
-        "-geometry",
-        geometry_arg,
-        "-tile",
-        tile_arg,
-        "-background",
-        "none",
-        output_file_path
+        "-script",
+        os.path.basename(script_file_path) # path needs to be relative to cwd
     ]
 
     args = {
         "argsList": args_list,
+        "gutter": gutter,
         "inputFiles": files,
         "numColumns": num_columns,
         "numRows": num_rows,
@@ -144,4 +216,17 @@ def _image_magick_args(sprite_size: Tuple[int, int], num_images: int, temp_dir_p
         "outputImageSize": (num_pixels_wide, num_pixels_tall)
     }
 
-    return args
\ No newline at end of file
+    return args
+
+def _parse_pam(data: bytes) -> Tuple[int, int, bytes]:
+    header, _, pixels = data.partition(b"ENDHDR\n")
+    fields = dict(line.split(" ", 1) for line in header.decode("ascii").splitlines()[1:] if " " in line)
+
+    if fields.get("TUPLTYPE") != "RGB_ALPHA" or fields.get("MAXVAL") != "255":
+        raise RuntimeError(f"Unexpected pixel format from ImageMagick: {fields}")
+
+    return (int(fields["WIDTH"]), int(fields["HEIGHT"]), pixels)
+
+def _quote_script_arg(arg: str) -> str:
+    # ImageMagick scripts are tokenized like a shell command; backslashes would be read as escapes, but forward slashes work on every platform
+    return '"{0}"'.format(arg.replace("\\", "/"))
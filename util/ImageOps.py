@@ -0,0 +1,87 @@
+import os
+from typing import List, Tuple
+
+#pylint: disable=invalid-name
+
+# NumPy ships with Blender, but guard the import so the rest of the addon still loads in unusual Python environments
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Images are passed around as (width, height, pixels), where pixels is 8-bit RGBA data with the top row first,
+# matching the pixels returned by ImageMagick.assemble_frames_into_spritesheet
+Image = Tuple[int, int, bytes]
+
+def is_available() -> bool:
+    return np is not None
+
+def downscaled_file_path(image_path: str, factor: int) -> str:
+    """Returns the path of the downscaled copy of the PNG at image_path, e.g. "sheet_0.5x.png" for a factor of 2."""
+    base, ext = os.path.splitext(image_path)
+    return f"{base}_{1 / factor:g}x{ext}"
+
+def downscale(image: Image, factor: int) -> Image:
+    """Shrinks an image by a power-of-two factor, using an alpha-aware box filter."""
+    _require_numpy()
+
+    if factor < 1 or factor & (factor - 1) != 0:
+        raise ValueError(f"Downscale factor must be a power of two, but got {factor}")
+
+    premultiplied = _premultiply(_to_array(image))
+
+    while factor > 1:
+        premultiplied = _halve(premultiplied)
+        factor //= 2
+
+    return _from_array(_unpremultiply(premultiplied))
+
+def mip_chain(image: Image) -> List[Image]:
+    """Returns every mip level of the image down to 1x1, starting with the image itself.
+
+    Each level is filtered from the previous one's premultiplied values, so transparent pixels don't darken the edges of sprites.
+    Odd dimensions are rounded down, as GPUs expect."""
+    _require_numpy()
+
+    levels = [image]
+    premultiplied = _premultiply(_to_array(image))
+
+    while premultiplied.shape[0] > 1 or premultiplied.shape[1] > 1:
+        premultiplied = _halve(premultiplied)
+        levels.append(_from_array(_unpremultiply(premultiplied)))
+
+    return levels
+
+def _halve(premultiplied: "np.ndarray") -> "np.ndarray":
+    height, width = premultiplied.shape[:2]
+
+    if height > 1:
+        premultiplied = premultiplied[: height // 2 * 2].reshape(height // 2, 2, -1, 4).mean(axis = 1)
+
+    if width > 1:
+        premultiplied = premultiplied[:, : width // 2 * 2].reshape(premultiplied.shape[0], width // 2, 2, 4).mean(axis = 2)
+
+    return premultiplied
+
+def _premultiply(array: "np.ndarray") -> "np.ndarray":
+    premultiplied = array.astype(np.float32)
+    premultiplied[..., :3] *= premultiplied[..., 3:] / 255
+
+    return premultiplied
+
+def _unpremultiply(premultiplied: "np.ndarray") -> "np.ndarray":
+    alpha = premultiplied[..., 3:]
+    colors = np.where(alpha > 0, premultiplied[..., :3] * 255 / np.maximum(alpha, 1e-6), 0)
+
+    return np.clip(np.rint(np.concatenate((colors, alpha), axis = -1)), 0, 255).astype(np.uint8)
+
+def _require_numpy():
+    if not is_available():
+        raise RuntimeError("This image operation requires NumPy, which could not be imported")
+
+def _to_array(image: Image) -> "np.ndarray":
+    width, height, pixels = image
+    return np.frombuffer(pixels, dtype = np.uint8).reshape(height, width, 4)
+
+def _from_array(array: "np.ndarray") -> Image:
+    return (array.shape[1], array.shape[0], np.ascontiguousarray(array).tobytes())
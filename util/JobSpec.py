@@ -0,0 +1,127 @@
+import bpy
+import math
+import os
+import pathlib
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from ..property_groups import AnimationSetPropertyGroup, MaterialSetPropertyGroup
+from .. import utils
+
+# Everything here is a NamedTuple: plain, read-only Python values with no per-instance __dict__, so reading them
+# in the render loop never goes through RNA property getters the way reading the property groups would
+
+class AnimationSetSpec(NamedTuple):
+    index: int
+    name: str
+    file_name_part: str
+    frame_rate: int
+    frame_skip: int
+    frames: Tuple[int, ...]
+
+    # Labels of each frame, zero-padded to the same width so that frames sort in order
+    frame_labels: Tuple[str, ...]
+
+    # Still needed for assigning actions, which can only be done through RNA
+    property_group: AnimationSetPropertyGroup
+
+class MaterialSetSpec(NamedTuple):
+    index: int
+    name: str
+    file_name_part: str
+    role: str
+
+    # Whether the set can be applied with the view layer's material override; see MaterialSetPropertyGroup.can_use_material_override
+    use_material_override: bool
+
+    # Still needed for assigning materials, which can only be done through RNA
+    property_group: MaterialSetPropertyGroup
+
+class JobSpec(NamedTuple):
+    """Everything a render job reads from its configuration, compiled once when the job starts (see compile_job_spec).
+
+    Lists of sets and rotations hold None when that part of the job isn't controlled, matching how the render loop treats them."""
+
+    animation_sets: Tuple[Optional[AnimationSetSpec], ...]
+    camera_control_mode: Optional[str]
+    control_animations: bool
+    control_camera: bool
+    control_materials: bool
+    control_rotation: bool
+    material_sets: Tuple[Optional[MaterialSetSpec], ...]
+    output_base_path: str
+    rotations: Tuple[Optional[int], ...]
+    separate_files_per_animation: bool
+    separate_files_per_rotation: bool
+    sprite_size: Tuple[int, int]
+
+    def frames_by_set(self) -> Dict[int, List[Optional[int]]]:
+        """The frames of each animation set by index, in the form Camera.build_camera_plan takes. Stills have a single frame of None."""
+        return { index: [None] if animation_set is None else list(animation_set.frames) for index, animation_set in enumerate(self.animation_sets) }
+
+    def output_file_path(self, material_set: Optional[MaterialSetSpec], animation_set: Optional[AnimationSetSpec], rotation: Optional[int],
+                         include_material_set: bool = True) -> str:
+        """The path of an output file, without its extension. Parts which aren't split into separate files are left out."""
+        output_file_path = self.output_base_path
+
+        if include_material_set and material_set is not None:
+            output_file_path += "_" + material_set.file_name_part
+
+        if self.separate_files_per_animation:
+            output_file_path += "_" + animation_set.file_name_part
+
+        if self.separate_files_per_rotation:
+            output_file_path += "_rot" + str(rotation).zfill(3)
+
+        return output_file_path
+
+def compile_job_spec(context: bpy.types.Context, output_dir: str) -> JobSpec:
+    """Reads the render job's configuration from the scene, creating the output directory if needed."""
+    props = context.scene.SpritesheetPropertyGroup
+
+    if props.animation_options.control_animations:
+        animation_sets = tuple(_compile_animation_set(index, animation_set) for index, animation_set in enumerate(props.animation_options.animation_sets))
+    else:
+        animation_sets = (None,)
+
+    if props.material_options.control_materials:
+        # Deciding whether to use the material override scans the whole view layer, so it's done once here rather than on every switch,
+        # and only if some set could use it at all (otherwise can_use_material_override returns before looking at rendered_objects)
+        could_use_override = context.scene.render.engine == 'CYCLES' and any(material_set.mode == "shared" for material_set in props.material_options.material_sets)
+        rendered_objects = MaterialSetPropertyGroup.find_rendered_objects(context) if could_use_override else set()
+        material_sets = tuple(MaterialSetSpec(index, material_set.name, format_string_for_filename(material_set.name), material_set.role,
+                                              material_set.can_use_material_override(context, rendered_objects), material_set)
+                              for index, material_set in enumerate(props.material_options.material_sets))
+    else:
+        material_sets = (None,)
+
+    # TODO there's no reason the rotation couldn't be float, except for determining the output file name
+    rotations = tuple(props.rotation_options.get_rotations()) if props.rotation_options.control_rotation else (None,)
+
+    pathlib.Path(output_dir).mkdir(parents = True, exist_ok = True)
+
+    return JobSpec(
+        animation_sets = animation_sets,
+        camera_control_mode = props.camera_options.camera_control_mode if props.camera_options.control_camera else None,
+        control_animations = props.animation_options.control_animations,
+        control_camera = props.camera_options.control_camera,
+        control_materials = props.material_options.control_materials,
+        control_rotation = props.rotation_options.control_rotation,
+        material_sets = material_sets,
+        output_base_path = os.path.join(output_dir, utils.blend_file_name(default_value = "spritesheet")),
+        rotations = rotations,
+        separate_files_per_animation = props.animation_options.control_animations and props.separate_files_per_animation,
+        separate_files_per_rotation = props.rotation_options.control_rotation and props.separate_files_per_rotation,
+        sprite_size = (props.sprite_size[0], props.sprite_size[1])
+    )
+
+def format_string_for_filename(string: str) -> str:
+    # TODO this should strip characters that aren't legal on the file system
+    return string.replace(' ', '_').replace('/', '_').replace('(', '').replace(')', '').lower()
+
+def _compile_animation_set(index: int, animation_set: AnimationSetPropertyGroup) -> AnimationSetSpec:
+    name = animation_set.name
+    frames = tuple(animation_set.get_frames_to_render())
+    num_digits = int(math.log10(frames[-1])) + 1 if len(frames) > 0 and frames[-1] > 0 else 1
+
+    return AnimationSetSpec(index, name, format_string_for_filename(name), animation_set.output_frame_rate, animation_set.frame_skip, frames,
+                            tuple(str(frame).zfill(num_digits) for frame in frames), animation_set)
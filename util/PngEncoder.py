@@ -0,0 +1,134 @@
+import concurrent.futures
+import math
+import os
+import struct
+import zlib
+from typing import List, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# zlib's modulus for Adler-32 checksums
+_ADLER_BASE = 65521
+
+# Rows are grouped into chunks of at least this many bytes; smaller chunks cost more in
+# lost compression (each chunk starts with an empty window) than they gain in parallelism
+_MIN_CHUNK_BYTES = 256 * 1024
+
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+def write_rgba_png(file_path: str, width: int, height: int, pixels: bytes, compression_level: int = 6, num_threads: int = 0):
+    """Writes 8-bit RGBA pixel data (row-major, top row first) to a standard PNG file.
+
+    The image is split into bands of rows which are deflated independently on a thread pool (zlib releases the GIL
+    while compressing), then stitched into a single zlib stream, in the same way as pigz. If num_threads is 0, one
+    thread per CPU core is used.
+
+    If NumPy is available, each row is filtered with whichever of the None, Sub and Up filters is likely to compress
+    best (see _filter_rows). Without it, every row is left unfiltered, which is faster but gives noticeably larger
+    files for images with gradients."""
+
+    stride = width * 4
+
+    if len(pixels) != stride * height:
+        raise ValueError(f"Expected {stride * height} bytes of RGBA data for a {width}x{height} image, but got {len(pixels)}")
+
+    if num_threads <= 0:
+        num_threads = os.cpu_count() or 1
+
+    row_ranges = _split_rows(height, stride, num_threads)
+    pixels_view = memoryview(pixels)
+
+    def compress_band(band_index: int) -> Tuple[bytes, int, int]:
+        start_row, end_row = row_ranges[band_index]
+        is_last_band = band_index == len(row_ranges) - 1
+
+        if np is not None:
+            band = _filter_rows(pixels, stride, start_row, end_row)
+        else:
+            # Every row is prefixed with its filter type; without NumPy we always use filter 0 (None)
+            band = b"".join(b"\x00" + pixels_view[row * stride : (row + 1) * stride] for row in range(start_row, end_row))
+
+        compressor = zlib.compressobj(compression_level, zlib.DEFLATED, -zlib.MAX_WBITS)
+        data = compressor.compress(band) + compressor.flush(zlib.Z_FINISH if is_last_band else zlib.Z_SYNC_FLUSH)
+
+        return (data, zlib.adler32(band), len(band))
+
+    if num_threads == 1 or len(row_ranges) == 1:
+        bands = [compress_band(i) for i in range(len(row_ranges))]
+    else:
+        with concurrent.futures.ThreadPoolExecutor(max_workers = num_threads) as executor:
+            bands = list(executor.map(compress_band, range(len(row_ranges))))
+
+    # Stitch the raw deflate bands together with a zlib header and the combined checksum of the uncompressed data
+    adler = 1
+    for _, band_adler, band_length in bands:
+        adler = _adler32_combine(adler, band_adler, band_length)
+
+    with open(file_path, "wb") as f:
+        f.write(_PNG_SIGNATURE)
+        f.write(_png_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0))) # 8 bits per channel, RGBA
+
+        # Each band gets its own IDAT chunk; decoders treat the concatenated IDAT contents as one stream
+        f.write(_png_chunk(b"IDAT", b"\x78\x9c" + bands[0][0]))
+
+        for data, _, _ in bands[1:]:
+            f.write(_png_chunk(b"IDAT", data))
+
+        f.write(_png_chunk(b"IDAT", struct.pack(">I", adler)))
+        f.write(_png_chunk(b"IEND", b""))
+
+def _adler32_combine(adler1: int, adler2: int, len2: int) -> int:
+    """Returns the Adler-32 checksum of two concatenated buffers, given each buffer's checksum. Ported from zlib's adler32_combine."""
+    remainder = len2 % _ADLER_BASE
+    sum1 = adler1 & 0xFFFF
+    sum2 = (remainder * sum1) % _ADLER_BASE
+    sum1 += (adler2 & 0xFFFF) + _ADLER_BASE - 1
+    sum2 += ((adler1 >> 16) & 0xFFFF) + ((adler2 >> 16) & 0xFFFF) + _ADLER_BASE - remainder
+
+    return (sum1 % _ADLER_BASE) | ((sum2 % _ADLER_BASE) << 16)
+
+def _filter_rows(pixels: bytes, stride: int, start_row: int, end_row: int) -> bytes:
+    """Returns rows [start_row, end_row) of the image, each prefixed with its filter type and filtered with it.
+
+    Each row uses whichever of None, Sub and Up gives the smallest sum of absolute differences (treating bytes as signed),
+    the heuristic recommended by the PNG specification. Average and Paeth usually compress slightly better still, but
+    each depends on the bytes to its left after filtering, so they can't be vectorised. Filtering only reads the unfiltered
+    pixels, including the row above the band, so bands can still be filtered independently."""
+    first_row = max(start_row - 1, 0)
+    image = np.frombuffer(pixels, dtype = np.uint8, count = (end_row - first_row) * stride, offset = first_row * stride).reshape(-1, stride)
+
+    if start_row > 0:
+        rows = image[1:]
+        above = image[:-1]
+    else:
+        rows = image
+        above = np.vstack((np.zeros((1, stride), dtype = np.uint8), image[:-1]))
+
+    # Sub predicts each byte from the same channel of the pixel to its left, so the first pixel of each row is unchanged
+    sub = rows.copy()
+    sub[:, 4:] -= rows[:, :-4]
+    up = rows - above
+
+    costs = np.stack([np.abs(candidate.view(np.int8).astype(np.int16)).sum(axis = 1) for candidate in (rows, sub, up)])
+    filter_types = np.argmin(costs, axis = 0).astype(np.uint8)
+
+    # Filter types 0, 1 and 2 are None, Sub and Up, in the same order as the candidates
+    selected = filter_types[:, None]
+    band = np.empty((len(rows), stride + 1), dtype = np.uint8)
+    band[:, 0] = filter_types
+    band[:, 1:] = np.where(selected == 1, sub, np.where(selected == 2, up, rows))
+
+    return band.tobytes()
+
+def _png_chunk(chunk_type: bytes, data: bytes) -> bytes:
+    return struct.pack(">I", len(data)) + chunk_type + data + struct.pack(">I", zlib.crc32(chunk_type + data))
+
+def _split_rows(height: int, stride: int, num_threads: int) -> List[Tuple[int, int]]:
+    # Aim for a few bands per thread so threads finishing early can pick up more work
+    min_rows = max(1, math.ceil(_MIN_CHUNK_BYTES / (stride + 1)))
+    rows_per_band = max(min_rows, math.ceil(height / (num_threads * 4)))
+
+    return [(start, min(start + rows_per_band, height)) for start in range(0, height, rows_per_band)]
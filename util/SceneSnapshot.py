@@ -1,128 +1,65 @@
 import bpy
-from mathutils import Vector
-from typing import Dict, Set
+from mathutils import Color, Euler, Matrix, Quaternion, Vector
+from typing import Any, Dict, List, Tuple
 
-class SceneSnapshot:
-
-    def __init__(self, context: bpy.types.Context, snapshot_types: Set[str] = None):
-        use_whitelist = snapshot_types is not None
-
-        if use_whitelist:
-            valid_opts = { 'ACTIONS', 'CAMERA', 'MATERIALS', 'ROTATIONS', 'SELECTIONS' }
-            invalid_opts = snapshot_types.difference(valid_opts)
-
-            if len(invalid_opts) > 0:
-                raise ValueError(f"Unrecognized options {invalid_opts}")
-
-        scene = context.scene
-        props = scene.SpritesheetPropertyGroup
-
-        # TODO expand the amount we snapshot
-
-        # Check which things we're going to snapshot first
-        self._should_snapshot_actions = props.animation_options.control_animations and (not use_whitelist or 'ACTIONS' in snapshot_types)
-        self._should_snapshot_camera = props.camera_options.control_camera and (not use_whitelist or 'CAMERA' in snapshot_types)
-        self._should_snapshot_materials = props.material_options.control_materials and (not use_whitelist or 'MATERIALS' in snapshot_types)
-        self._should_snapshot_rotations = props.rotation_options.control_rotation and (not use_whitelist or 'ROTATIONS' in snapshot_types)
-        self._should_snapshot_selections = (not use_whitelist or 'SELECTIONS' in snapshot_types)
-
-        self._frame: int = scene.frame_current
-
-        if self._should_snapshot_actions:
-            self._snapshot_actions(context)
-
-        if self._should_snapshot_camera:
-            self._snapshot_camera(context)
-
-        if self._should_snapshot_materials:
-            self._snapshot_materials(context)
-
-        if self._should_snapshot_rotations:
-            self._snapshot_rotations(context)
+# Snapshots which haven't been restored yet, oldest first. Changes made through record or set_value are journaled in all of them
+_active_snapshots: List["SceneSnapshot"] = []
 
-        if self._should_snapshot_selections:
-            self._snapshot_object_selections()
-
-    def restore_from_snapshot(self, context):
-        scene = context.scene
-
-        scene.frame_set(self._frame)
-
-        if self._should_snapshot_selections:
-            self._restore_object_selections()
-
-        if self._should_snapshot_camera:
-            self._restore_camera(context)
-
-        if self._should_snapshot_rotations:
-            self._restore_rotations()
-
-        if self._should_snapshot_actions:
-            self._restore_actions()
-
-        if self._should_snapshot_materials:
-            self._restore_materials()
-
-    def _restore_actions(self):
-        for obj, action in self._actions.items():
-            obj.animation_data.action = action
-
-    def _restore_camera(self, context):
-        props = context.scene.SpritesheetPropertyGroup
-
-        props.camera_options.render_camera_obj.location = self._camera_location
-        props.camera_options.render_camera.ortho_scale = self._camera_ortho_scale
-
-    def _restore_materials(self):
-        for obj, material in self._materials.items():
-            obj.material_slots[0].material = material
+class SceneSnapshot:
+    """A journal of the scene properties changed while a job runs, so that they can be put back exactly as they were.
 
-    def _restore_object_selections(self):
-        for obj, is_selected in self._object_selections.items():
-            obj.select_set(is_selected)
+    Nothing is copied up front. A snapshot is active from when it's created until it's restored, and the first time any property
+    is changed through record or set_value while it's active, the property's old value is added to the journal; restoring writes
+    the journaled values back in reverse order, then returns to the frame the scene was on. Objects which the job never touches
+    cost nothing, however many of them there are.
 
-    def _restore_rotations(self):
-        for obj, rotation in self._rotations.items():
-            obj.rotation_euler = rotation
+    Changes made while no snapshot is active (such as previewing a material set from the UI) aren't journaled, and are kept."""
 
-    def _snapshot_actions(self, context: bpy.types.Context):
-        props = context.scene.SpritesheetPropertyGroup
+    def __init__(self, context: bpy.types.Context):
+        self._frame: int = context.scene.frame_current
 
-        self._actions: Dict[bpy.types.Object, bpy.types.Action] = {}
+        # Keyed by (struct pointer, property name); dicts keep insertion order, so this is also the order of the changes
+        self._journal: Dict[Tuple[int, str], Tuple[bpy.types.bpy_struct, str, Any]] = {}
 
-        for animation_set in props.animation_options.animation_sets:
-            objects = [a.target for a in animation_set.actions if a.target]
+        _active_snapshots.append(self)
 
-            for obj in objects:
-                obj.animation_data_create()
-                self._actions[obj] = obj.animation_data.action
+    def restore_from_snapshot(self, context: bpy.types.Context, restore_frame: bool = True):
+        """Writes back every journaled value. If restore_frame is false, the scene stays on its current frame, for snapshots which
+        only cover part of a job which is stepping through frames."""
+        if self in _active_snapshots:
+            _active_snapshots.remove(self)
 
-    def _snapshot_camera(self, context: bpy.types.Context):
-        props = context.scene.SpritesheetPropertyGroup
+        for struct, attr, value in reversed(list(self._journal.values())):
+            setattr(struct, attr, value)
 
-        self._camera_location = Vector(props.camera_options.render_camera_obj.location)
-        self._camera_ortho_scale = props.camera_options.render_camera.ortho_scale
+        self._journal.clear()
 
-    def _snapshot_materials(self, context: bpy.types.Context):
-        props = context.scene.SpritesheetPropertyGroup
+        # Frame last, so that the scene is evaluated with everything else already restored
+        if restore_frame:
+            context.scene.frame_set(self._frame)
 
-        self._materials: Dict[bpy.types.Object, bpy.types.Material] = {}
+    def _record(self, struct: bpy.types.bpy_struct, attr: str):
+        key = (struct.as_pointer(), attr)
 
-        for material_set in props.material_options.material_sets:
-            for prop in material_set.materials:
-                self._materials[prop.target] = prop.target.material_slots[0].material if len(prop.target.material_slots) > 0 else None
+        if key not in self._journal:
+            self._journal[key] = (struct, attr, _copy_value(getattr(struct, attr)))
 
-    def _snapshot_object_selections(self):
-        self._object_selections: Dict[bpy.types.Object, bool] = {}
+def record(struct: bpy.types.bpy_struct, attr: str):
+    """Journals the current value of a property in every active snapshot which doesn't have it yet. Call this before changing the property
+    some other way than set_value, such as by assigning to one of its elements."""
+    for snapshot in _active_snapshots:
+        snapshot._record(struct, attr) #pylint: disable=protected-access
 
-        for obj in bpy.data.objects:
-            self._object_selections[obj] = obj.select_get()
+def set_value(struct: bpy.types.bpy_struct, attr: str, value: Any):
+    record(struct, attr)
+    setattr(struct, attr, value)
 
-    def _snapshot_rotations(self, context: bpy.types.Context):
-        props = context.scene.SpritesheetPropertyGroup
+def _copy_value(value: Any) -> Any:
+    # Math types and arrays are returned by reference, so they'd otherwise change along with the property
+    if isinstance(value, (Color, Euler, Matrix, Quaternion, Vector)):
+        return value.copy()
 
-        self._rotations: Dict[bpy.types.Object, Vector] = {}
+    if isinstance(value, bpy.types.bpy_prop_array):
+        return tuple(value)
 
-        for target in props.rotation_options.targets:
-            if target.target is not None:
-                self._rotations[target.target] = Vector(target.target.rotation_euler)
\ No newline at end of file
+    return value
@@ -0,0 +1,70 @@
+import math
+from typing import Any, Dict, List, Optional, Tuple
+
+def choose_layout(num_frames: int, cell_size: Tuple[int, int], pad_to_power_of_two: bool, force_square: bool,
+                  group_sizes: Optional[List[int]] = None, optimize: bool = True) -> Dict[str, Any]:
+    """Picks the number of columns and rows for a spritesheet.
+
+    cell_size is the size of one sprite including any gutter. If group_sizes is provided, each group of frames (e.g. each animation)
+    starts on a new row. When optimize is true, every column count is tried and the one giving the smallest final image, after
+    padding to power-of-two and/or forcing to square, is chosen. Layouts which would be wider or taller than the default layout are
+    never chosen, so optimizing never makes the image larger in either dimension."""
+
+    default_columns = _default_num_columns(num_frames)
+    default_rows = count_rows(default_columns, num_frames, group_sizes)
+    default_size = final_size(default_columns, default_rows, cell_size, pad_to_power_of_two, force_square)
+
+    best = (default_columns, default_rows, default_size)
+
+    if optimize:
+        for num_columns in range(1, num_frames + 1):
+            num_rows = count_rows(num_columns, num_frames, group_sizes)
+            size = final_size(num_columns, num_rows, cell_size, pad_to_power_of_two, force_square)
+
+            if size[0] > default_size[0] or size[1] > default_size[1]:
+                continue
+
+            if _layout_cost(num_columns, num_rows, size, cell_size) < _layout_cost(*best, cell_size):
+                best = (num_columns, num_rows, size)
+
+    num_columns, num_rows, size = best
+
+    return {
+        "defaultFinalSize": default_size,
+        "defaultNumColumns": default_columns,
+        "defaultNumRows": default_rows,
+        "finalSize": size,
+        "numColumns": num_columns,
+        "numRows": num_rows
+    }
+
+def count_rows(num_columns: int, num_frames: int, group_sizes: Optional[List[int]] = None) -> int:
+    if not group_sizes:
+        return math.ceil(num_frames / num_columns)
+
+    return sum(math.ceil(size / num_columns) for size in group_sizes)
+
+def final_size(num_columns: int, num_rows: int, cell_size: Tuple[int, int], pad_to_power_of_two: bool, force_square: bool) -> Tuple[int, int]:
+    """Returns the size of the output image after the same padding and squaring steps the render operator applies, in that order."""
+    size = (num_columns * cell_size[0], num_rows * cell_size[1])
+
+    if pad_to_power_of_two:
+        size = (next_power_of_two(size[0]), next_power_of_two(size[1]))
+
+    if force_square:
+        size = (max(size), max(size))
+
+    return size
+
+def next_power_of_two(val: int) -> int:
+    """Returns the smallest power of two which is equal to or greater than val"""
+    return 1 if val == 0 else 2 ** math.ceil(math.log2(val))
+
+def _default_num_columns(num_frames: int) -> int:
+    # The original layout: as close to square as possible in terms of sprite count
+    num_rows = max(1, math.floor(math.sqrt(num_frames)))
+    return math.ceil(num_frames / num_rows)
+
+def _layout_cost(num_columns: int, num_rows: int, size: Tuple[int, int], cell_size: Tuple[int, int]) -> Tuple[int, int, int]:
+    # Smallest final area first, then the grid closest to square (which is distorted the least when forcing to square), then fewest empty cells
+    return (size[0] * size[1], abs(num_columns * cell_size[0] - num_rows * cell_size[1]), num_columns * num_rows)
@@ -0,0 +1,212 @@
+import bpy
+import os
+import shutil
+import tempfile
+from mathutils import Matrix, Vector
+from typing import List, Optional, Tuple
+
+# NumPy ships with Blender, but guard the import so the rest of the addon still loads in unusual Python environments
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from . import SceneSnapshot
+from .Bounds import Bounds2D
+from .. import utils
+
+# How many times the frame may be doubled in size when the silhouette touches its edges, before giving up
+_MAX_EXPANSIONS = 8
+
+# How many times the frame is shrunk to fit the silhouette and rendered again, to measure it more precisely
+_NUM_REFINEMENTS = 2
+
+# When refining, this many empty pixels are left on each side, so the silhouette doesn't touch the edges again
+_REFINEMENT_PADDING_PIXELS = 2
+
+def is_available() -> bool:
+    return np is not None
+
+class SilhouetteRenderer:
+    """Finds the camera-space bounds of the targets by rendering their silhouette, instead of reading their geometry.
+
+    Each call to find_bounds renders the targets alone with Workbench, at a low resolution and without anti-aliasing, and bounds the
+    pixels with any alpha. The frame starts from the targets' bounding boxes, doubles in size while the silhouette touches its edges,
+    and is then shrunk to fit the silhouette and rendered again to tighten the bounds. This works for every object type which renders
+    (curves, metaballs, volumes, Grease Pencil, particles, ...), and costs the same no matter how many vertices the targets have.
+
+    The bounds are accurate to within a pixel of the final render, and details thinner than a pixel may be missed. Render settings, the
+    render camera and other objects' render visibility are changed between begin and end, which restores them."""
+
+    def __init__(self, context: bpy.types.Context, targets: List[bpy.types.Object], resolution: int):
+        self._context = context
+        self._resolution = resolution
+        self._targets = targets
+
+        self._snapshot: Optional[SceneSnapshot.SceneSnapshot] = None
+        self._temp_dir_path: Optional[str] = None
+
+    def __enter__(self):
+        self.begin()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.end()
+
+    def begin(self):
+        if not is_available():
+            raise RuntimeError("Finding bounds from rendered silhouettes requires NumPy, which could not be imported")
+
+        scene = self._context.scene
+        camera_obj = scene.SpritesheetPropertyGroup.camera_options.render_camera_obj
+        render = scene.render
+        shading = scene.display.shading
+
+        self._temp_dir_path = tempfile.mkdtemp(prefix = "spritesheet_silhouette_")
+        self._snapshot = SceneSnapshot.SceneSnapshot(self._context)
+
+        # Only the silhouette matters, so use the cheapest settings which still give exact coverage
+        SceneSnapshot.set_value(scene, "camera", camera_obj)
+        SceneSnapshot.set_value(render, "engine", 'BLENDER_WORKBENCH')
+        SceneSnapshot.set_value(render, "film_transparent", True)
+        SceneSnapshot.set_value(render, "resolution_x", self._resolution)
+        SceneSnapshot.set_value(render, "resolution_y", self._resolution)
+        SceneSnapshot.set_value(render, "resolution_percentage", 100)
+        SceneSnapshot.set_value(render, "pixel_aspect_x", 1)
+        SceneSnapshot.set_value(render, "pixel_aspect_y", 1)
+        SceneSnapshot.set_value(render, "use_border", False)
+        SceneSnapshot.set_value(render, "use_compositing", False)
+        SceneSnapshot.set_value(render, "use_freestyle", False)
+        SceneSnapshot.set_value(render, "use_sequencer", False)
+        SceneSnapshot.set_value(render, "filepath", os.path.join(self._temp_dir_path, "silhouette.png"))
+        SceneSnapshot.set_value(render.image_settings, "file_format", 'PNG')
+        SceneSnapshot.set_value(render.image_settings, "color_mode", 'RGBA')
+        SceneSnapshot.set_value(render.image_settings, "color_depth", '8')
+        SceneSnapshot.set_value(render.image_settings, "compression", 0)
+        SceneSnapshot.set_value(scene.display, "render_aa", 'OFF')
+        SceneSnapshot.set_value(shading, "light", 'FLAT')
+        SceneSnapshot.set_value(shading, "color_type", 'SINGLE')
+        SceneSnapshot.set_value(shading, "show_cavity", False)
+        SceneSnapshot.set_value(shading, "show_object_outline", False)
+        SceneSnapshot.set_value(shading, "show_shadows", False)
+        SceneSnapshot.set_value(shading, "use_dof", False)
+
+        SceneSnapshot.set_value(camera_obj.data, "shift_x", 0)
+        SceneSnapshot.set_value(camera_obj.data, "shift_y", 0)
+        SceneSnapshot.set_value(camera_obj.data, "sensor_fit", 'AUTO')
+
+        # These are changed for every render in find_bounds
+        for struct, attr in ((camera_obj.data, "clip_start"), (camera_obj.data, "clip_end"), (camera_obj.data, "ortho_scale"), (camera_obj, "location")):
+            SceneSnapshot.record(struct, attr)
+
+        target_names = { obj.name for obj in self._targets }
+
+        for obj in scene.objects:
+            if obj.name not in target_names and not obj.hide_render:
+                SceneSnapshot.set_value(obj, "hide_render", True)
+
+    def end(self):
+        if self._snapshot is not None:
+            self._snapshot.restore_from_snapshot(self._context, restore_frame = False)
+            self._snapshot = None
+
+        if self._temp_dir_path is not None:
+            shutil.rmtree(self._temp_dir_path, ignore_errors = True)
+            self._temp_dir_path = None
+
+    def find_bounds(self) -> Bounds2D:
+        m_cam_to_world = self._context.scene.SpritesheetPropertyGroup.camera_options.render_camera_obj.rotation_euler.to_matrix()
+        center, size, min_depth, max_depth = self._initial_frame(m_cam_to_world.inverted())
+
+        # Objects such as particles can reach well outside of the bounding boxes, so leave plenty of room in front and behind
+        depth_margin = 10 * max(size, max_depth - min_depth, 1)
+        num_expansions = 0
+        num_refinements = 0
+
+        while True:
+            occupied = self._render_occupied_pixels(m_cam_to_world, center, size, max_depth + depth_margin, max_depth - min_depth + 2 * depth_margin)
+
+            if occupied is None or _touches_edges(occupied, self._resolution):
+                num_expansions += 1
+
+                if num_expansions > _MAX_EXPANSIONS:
+                    raise RuntimeError("Couldn't fit the camera targets' silhouette into the frame; check that they are visible in renders")
+
+                if occupied is not None:
+                    center = self._pixels_to_bounds(occupied, center, size).center
+
+                size *= 2
+                continue
+
+            bounds = self._pixels_to_bounds(occupied, center, size)
+
+            if num_refinements == _NUM_REFINEMENTS:
+                return bounds
+
+            num_refinements += 1
+            center = bounds.center
+            size = max(bounds.size) * self._resolution / (self._resolution - 2 * _REFINEMENT_PADDING_PIXELS)
+
+    def _initial_frame(self, m_world_to_cam: Matrix) -> Tuple[Vector, float, float, float]:
+        """Returns the camera-space center, size, and depth range of the targets' bounding boxes."""
+        depsgraph = self._context.evaluated_depsgraph_get()
+        corners = []
+
+        for obj in self._targets:
+            eval_obj = obj.evaluated_get(depsgraph)
+            corners.extend(m_world_to_cam @ (eval_obj.matrix_world @ Vector(corner)) for corner in eval_obj.bound_box)
+
+        mins = Vector((min(c[0] for c in corners), min(c[1] for c in corners)))
+        maxs = Vector((max(c[0] for c in corners), max(c[1] for c in corners)))
+        size = max(maxs - mins)
+
+        # Start a little larger than the boxes, so that most silhouettes fit first time; boxes with no size (e.g. empties) start at 1 unit
+        return (0.5 * (mins + maxs), 1.25 * size if size > 0 else 1, min(c[2] for c in corners), max(c[2] for c in corners))
+
+    def _pixels_to_bounds(self, occupied: Tuple[int, int, int, int], center: Vector, size: float) -> Bounds2D:
+        """Converts a range of occupied pixels to camera space.
+
+        Without anti-aliasing, a pixel is only filled when the silhouette covers its center, so the silhouette may reach up to the center
+        of the empty pixels on either side; those centers are used as the bounds."""
+        min_col, min_row, max_col, max_row = occupied
+        pixel_size = size / self._resolution
+        origin = center - Vector((size / 2, size / 2))
+
+        return Bounds2D.from_min_and_max_points(origin + pixel_size * Vector((min_col - 0.5, min_row - 0.5)),
+                                                origin + pixel_size * Vector((max_col + 1.5, max_row + 1.5)))
+
+    def _render_occupied_pixels(self, m_cam_to_world: Matrix, center: Vector, size: float, depth: float, clip_end: float) -> Optional[Tuple[int, int, int, int]]:
+        """Renders the targets with the frame centered on center and size wide, returning (min column, min row, max column, max row) of the
+        pixels with any alpha, or None if there are none. Rows are counted from the bottom, matching camera space."""
+        camera_obj = self._context.scene.SpritesheetPropertyGroup.camera_options.render_camera_obj
+
+        camera_obj.location = m_cam_to_world @ Vector((center[0], center[1], depth))
+        camera_obj.data.ortho_scale = size
+        camera_obj.data.clip_start = 0.001
+        camera_obj.data.clip_end = clip_end
+
+        with utils.close_stdout():
+            bpy.ops.render.render(write_still = True)
+
+        image = bpy.data.images.load(self._context.scene.render.filepath, check_existing = False)
+
+        try:
+            width, height = image.size
+            pixels = np.empty(width * height * 4, dtype = np.float32)
+            image.pixels.foreach_get(pixels)
+        finally:
+            bpy.data.images.remove(image)
+
+        # Image pixels start from the bottom row
+        alpha = pixels[3::4].reshape(height, width) > 0
+        rows = np.flatnonzero(alpha.any(axis = 1))
+        cols = np.flatnonzero(alpha.any(axis = 0))
+
+        if len(rows) == 0:
+            return None
+
+        return (int(cols[0]), int(rows[0]), int(cols[-1]), int(rows[-1]))
+
+def _touches_edges(occupied: Tuple[int, int, int, int], resolution: int) -> bool:
+    min_col, min_row, max_col, max_row = occupied
+    return min_col == 0 or min_row == 0 or max_col == resolution - 1 or max_row == resolution - 1
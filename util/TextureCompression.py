@@ -0,0 +1,497 @@
+import math
+import os
+import struct
+from typing import Callable, Dict, List, Tuple
+
+#pylint: disable=invalid-name
+
+# NumPy ships with Blender, but guard the import so the rest of the addon still loads in unusual Python environments
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Blocks are encoded in batches to keep the size of the intermediate error arrays bounded
+_BATCH_SIZE = 4096
+
+# Format identifier -> (container extension, bytes per 4x4 block)
+FORMATS: Dict[str, Tuple[str, int]] = {
+    "bc1": ("dds", 8),
+    "bc3": ("dds", 16),
+    "bc7": ("dds", 16),
+    "etc2": ("ktx2", 16)
+}
+
+# BC7 4-bit index interpolation weights
+_BC7_WEIGHTS = (0, 4, 9, 13, 17, 21, 26, 30, 34, 38, 43, 47, 51, 55, 60, 64)
+
+# ETC1/ETC2 color modifier tables, ordered by pixel index value: +a, +b, -a, -b
+_ETC_MODIFIERS = ((2, 8), (5, 17), (9, 29), (13, 42), (18, 60), (24, 80), (33, 106), (47, 183))
+
+# EAC alpha modifier tables
+_EAC_MODIFIERS = (
+    (-3, -6, -9, -15, 2, 5, 8, 14), (-3, -7, -10, -13, 2, 6, 9, 12), (-2, -5, -8, -13, 1, 4, 7, 12), (-2, -4, -6, -13, 1, 3, 5, 12),
+    (-3, -6, -8, -12, 2, 5, 7, 11), (-3, -7, -9, -11, 2, 6, 8, 10), (-4, -7, -8, -11, 3, 6, 7, 10), (-3, -5, -8, -11, 2, 4, 7, 10),
+    (-2, -6, -8, -10, 1, 5, 7, 9), (-2, -5, -8, -10, 1, 4, 7, 9), (-2, -4, -8, -10, 1, 3, 7, 9), (-2, -5, -7, -10, 1, 4, 6, 9),
+    (-3, -4, -7, -10, 2, 3, 6, 9), (-1, -2, -3, -10, 0, 1, 2, 9), (-4, -6, -8, -9, 3, 5, 7, 8), (-3, -5, -7, -9, 2, 4, 6, 8)
+)
+
+# ETC pixel indices are stored column-major; this maps each column-major position to our row-major pixel index
+_ETC_PIXEL_ORDER = [(k % 4) * 4 + k // 4 for k in range(16)]
+
+def container_file_path(image_path: str, texture_format: str) -> str:
+    """Returns the path of the block-compressed texture which accompanies the PNG at image_path."""
+    base, _ = os.path.splitext(image_path)
+    return f"{base}_{texture_format}.{FORMATS[texture_format][0]}"
+
+def is_available() -> bool:
+    return np is not None
+
+def write_compressed_texture(file_path: str, levels: List[Tuple[int, int, bytes]], texture_format: str) -> Dict[str, float]:
+    """Block-compresses one or more mip levels of 8-bit RGBA pixel data and writes them to a DDS or KTX2 container, depending on format.
+
+    Each level is given as (width, height, pixels), with pixels stored top row first; the first level is the full size image.
+    Returns error metrics comparing the decoded first level to the original pixels."""
+
+    if not is_available():
+        raise RuntimeError("Block-compressed texture output requires NumPy, which could not be imported")
+
+    if texture_format not in FORMATS:
+        raise ValueError(f"Unrecognized texture format {texture_format}")
+
+    encoded_levels = []
+    metrics = None
+
+    for width, height, pixels in levels:
+        image = np.frombuffer(pixels, dtype = np.uint8).reshape(height, width, 4)
+        encoded, decoded = encode_image(image, texture_format)
+        encoded_levels.append(encoded)
+
+        if metrics is None:
+            metrics = _error_metrics(image, decoded)
+
+    width, height, _ = levels[0]
+
+    if FORMATS[texture_format][0] == "dds":
+        _write_dds(file_path, width, height, texture_format, encoded_levels)
+    else:
+        _write_ktx2(file_path, width, height, encoded_levels)
+
+    return metrics
+
+def encode_image(image: "np.ndarray", texture_format: str) -> Tuple[bytes, "np.ndarray"]:
+    """Encodes an (height, width, 4) uint8 image, returning the encoded blocks and the image as a GPU would decode them."""
+    height, width = image.shape[:2]
+    blocks = _image_to_blocks(image)
+
+    encoders: Dict[str, Callable] = {
+        "bc1": _encode_bc1,
+        "bc3": _encode_bc3,
+        "bc7": _encode_bc7,
+        "etc2": _encode_etc2
+    }
+
+    encoded_batches = []
+    decoded_batches = []
+
+    for start in range(0, len(blocks), _BATCH_SIZE):
+        encoded, decoded = encoders[texture_format](blocks[start : start + _BATCH_SIZE].astype(np.float32))
+        encoded_batches.append(encoded)
+        decoded_batches.append(decoded)
+
+    decoded_blocks = np.clip(np.rint(np.concatenate(decoded_batches)), 0, 255).astype(np.uint8)
+
+    return (np.concatenate(encoded_batches).tobytes(), _blocks_to_image(decoded_blocks, width, height))
+
+####################################################################################
+# Block layout
+####################################################################################
+
+def _image_to_blocks(image: "np.ndarray") -> "np.ndarray":
+    """Splits an image into 4x4 blocks, padding with transparent black. Returns an (N, 16, 4) array with pixels in row-major order."""
+    height, width = image.shape[:2]
+    padded_height, padded_width = math.ceil(height / 4) * 4, math.ceil(width / 4) * 4
+
+    padded = np.zeros((padded_height, padded_width, 4), dtype = np.uint8)
+    padded[:height, :width] = image
+
+    return padded.reshape(padded_height // 4, 4, padded_width // 4, 4, 4).transpose(0, 2, 1, 3, 4).reshape(-1, 16, 4)
+
+def _blocks_to_image(blocks: "np.ndarray", width: int, height: int) -> "np.ndarray":
+    blocks_tall, blocks_wide = math.ceil(height / 4), math.ceil(width / 4)
+    image = blocks.reshape(blocks_tall, blocks_wide, 4, 4, 4).transpose(0, 2, 1, 3, 4).reshape(blocks_tall * 4, blocks_wide * 4, 4)
+
+    return image[:height, :width]
+
+def _error_metrics(original: "np.ndarray", decoded: "np.ndarray") -> Dict[str, float]:
+    # Compare premultiplied values, so that differences in the color of fully transparent pixels (which are never seen) don't count
+    def premultiply(image: "np.ndarray") -> "np.ndarray":
+        image = image.astype(np.float64)
+        image[..., :3] *= image[..., 3:] / 255
+        return image
+
+    diff = premultiply(original) - premultiply(decoded)
+    mse = float(np.mean(diff * diff))
+    rmse = math.sqrt(mse)
+    psnr = math.inf if mse == 0 else 10 * math.log10(255 * 255 / mse)
+
+    return { "rmse": rmse, "psnr": psnr, "maxError": float(np.max(np.abs(diff))) if diff.size > 0 else 0.0 }
+
+####################################################################################
+# Shared endpoint fitting
+####################################################################################
+
+def _principal_axis_endpoints(values: "np.ndarray", weights: "np.ndarray") -> Tuple["np.ndarray", "np.ndarray"]:
+    """Fits a line through each block's weighted values (N, 16, C), returning the extreme points along it as two (N, C) arrays."""
+    weight_sums = np.maximum(weights.sum(axis = 1, keepdims = True), 1)
+    mean = (values * weights[..., None]).sum(axis = 1) / weight_sums
+    centered = values - mean[:, None, :]
+    weighted = centered * weights[..., None]
+    covariance = np.einsum("npi,npj->nij", weighted, weighted)
+
+    # Power iteration, starting from the row of the covariance matrix for the channel with the largest variance
+    largest_channel = np.argmax(np.diagonal(covariance, axis1 = 1, axis2 = 2), axis = 1)
+    axis = covariance[np.arange(len(values)), largest_channel]
+
+    for _ in range(8):
+        norm = np.linalg.norm(axis, axis = 1, keepdims = True)
+        axis = np.where(norm > 1e-6, axis / np.maximum(norm, 1e-6), 0)
+        axis = np.einsum("nij,nj->ni", covariance, axis)
+
+    norm = np.linalg.norm(axis, axis = 1, keepdims = True)
+    axis = np.where(norm > 1e-6, axis / np.maximum(norm, 1e-6), 0)
+
+    projections = np.einsum("npc,nc->np", centered, axis)
+    has_weight = weights > 0
+    t_min = np.where(has_weight, projections, np.inf).min(axis = 1)
+    t_max = np.where(has_weight, projections, -np.inf).max(axis = 1)
+    t_min = np.where(np.isfinite(t_min), t_min, 0)
+    t_max = np.where(np.isfinite(t_max), t_max, 0)
+
+    low = np.clip(mean + t_min[:, None] * axis, 0, 255)
+    high = np.clip(mean + t_max[:, None] * axis, 0, 255)
+
+    return (low, high)
+
+def _nearest_palette_entry(values: "np.ndarray", palette: "np.ndarray") -> Tuple["np.ndarray", "np.ndarray"]:
+    """For values (N, 16, C) and palette (N, P, C), returns the index of the closest palette entry per value and its squared error."""
+    errors = np.sum((values[:, :, None, :] - palette[:, None, :, :]) ** 2, axis = -1)
+    indices = np.argmin(errors, axis = -1)
+
+    return (indices, np.take_along_axis(errors, indices[..., None], axis = -1)[..., 0])
+
+def _pack_indices(indices: "np.ndarray", bits_per_index: int, order = None) -> "np.ndarray":
+    if order is not None:
+        indices = indices[:, order]
+
+    shifts = np.arange(indices.shape[1], dtype = np.uint64) * np.uint64(bits_per_index)
+    return np.bitwise_or.reduce(indices.astype(np.uint64) << shifts, axis = 1)
+
+####################################################################################
+# BC1/BC3
+####################################################################################
+
+def _quantize_565(colors: "np.ndarray") -> "np.ndarray":
+    r = np.rint(colors[:, 0] * 31 / 255).astype(np.uint16)
+    g = np.rint(colors[:, 1] * 63 / 255).astype(np.uint16)
+    b = np.rint(colors[:, 2] * 31 / 255).astype(np.uint16)
+
+    return (r << 11) | (g << 5) | b
+
+def _expand_565(packed: "np.ndarray") -> "np.ndarray":
+    r = (packed >> 11) & 31
+    g = (packed >> 5) & 63
+    b = packed & 31
+
+    return np.stack(((r << 3) | (r >> 2), (g << 2) | (g >> 4), (b << 3) | (b >> 2)), axis = -1).astype(np.float32)
+
+def _encode_color_block(colors: "np.ndarray", weights: "np.ndarray", three_color: "np.ndarray") -> Tuple["np.ndarray", "np.ndarray", "np.ndarray"]:
+    """Encodes the color half of BC1/BC3 blocks. Blocks flagged in three_color use BC1's punch-through mode, where index 3 is transparent.
+
+    Returns the packed endpoints and indices, the decoded colors, and which pixels decode as transparent."""
+    low, high = _principal_axis_endpoints(colors, weights)
+    packed_low, packed_high = _quantize_565(low), _quantize_565(high)
+
+    # Four-color mode is selected by color0 > color1, and three-color mode by color0 <= color1
+    larger, smaller = np.maximum(packed_low, packed_high), np.minimum(packed_low, packed_high)
+    color0 = np.where(three_color, smaller, larger)
+    color1 = np.where(three_color, larger, smaller)
+
+    endpoint0, endpoint1 = _expand_565(color0), _expand_565(color1)
+    three_color_palette = np.stack((endpoint0, endpoint1, (endpoint0 + endpoint1) / 2, np.zeros_like(endpoint0)), axis = 1)
+    four_color_palette = np.stack((endpoint0, endpoint1, (2 * endpoint0 + endpoint1) / 3, (endpoint0 + 2 * endpoint1) / 3), axis = 1)
+    palette = np.where(three_color[:, None, None], three_color_palette, four_color_palette)
+
+    # Transparent black is only available to pixels which are actually transparent
+    reserved = np.zeros((len(colors), 1, 4), dtype = np.float32)
+    reserved[:, 0, 3] = np.where(three_color, np.inf, 0)
+    errors = np.sum((colors[:, :, None, :] - palette[:, None, :, :]) ** 2, axis = -1) + reserved
+    indices = np.argmin(errors, axis = -1)
+
+    transparent = three_color[:, None] & (weights == 0)
+    indices = np.where(transparent, 3, indices)
+
+    # Equal endpoints make the decoder fall back to three-color mode, so stick to index 0 which is safe in both modes
+    indices = np.where(((color0 == color1) & ~three_color)[:, None], 0, indices)
+
+    block = np.empty(len(colors), dtype = [("color0", "<u2"), ("color1", "<u2"), ("indices", "<u4")])
+    block["color0"] = color0
+    block["color1"] = color1
+    block["indices"] = _pack_indices(indices, 2).astype(np.uint32)
+
+    decoded = np.take_along_axis(palette, indices[..., None], axis = 1)
+
+    return (block.view(np.uint8).reshape(-1, 8), decoded, transparent)
+
+def _encode_alpha_block(alpha: "np.ndarray") -> Tuple["np.ndarray", "np.ndarray"]:
+    """Encodes BC3's alpha half, always using the eight-value interpolation mode."""
+    alpha0 = np.max(alpha, axis = 1)
+    alpha1 = np.min(alpha, axis = 1)
+
+    # Index 0 and 1 are the endpoints, then six values interpolated from alpha0 to alpha1
+    palette = np.stack([alpha0, alpha1] + [((7 - i) * alpha0 + i * alpha1) / 7 for i in range(1, 7)], axis = 1)
+    indices, _ = _nearest_palette_entry(alpha[..., None], palette[..., None])
+
+    packed_indices = _pack_indices(indices, 3)
+    index_bytes = ((packed_indices[:, None] >> (np.arange(6, dtype = np.uint64) * np.uint64(8))) & np.uint64(0xFF)).astype(np.uint8)
+    encoded = np.concatenate((alpha0[:, None].astype(np.uint8), alpha1[:, None].astype(np.uint8), index_bytes), axis = 1)
+
+    return (encoded, np.take_along_axis(palette, indices, axis = 1))
+
+def _encode_bc1(blocks: "np.ndarray") -> Tuple["np.ndarray", "np.ndarray"]:
+    opaque = blocks[..., 3] >= 128
+    three_color = ~np.all(opaque, axis = 1)
+
+    encoded, decoded_colors, transparent = _encode_color_block(blocks[..., :3], opaque.astype(np.float32), three_color)
+    decoded_alpha = np.where(transparent, 0, 255)
+
+    return (encoded, np.concatenate((decoded_colors, decoded_alpha[..., None]), axis = -1))
+
+def _encode_bc3(blocks: "np.ndarray") -> Tuple["np.ndarray", "np.ndarray"]:
+    # Fully transparent pixels don't contribute to the color fit, since their color is never seen
+    visible = (blocks[..., 3] > 0).astype(np.float32)
+
+    encoded_alpha, decoded_alpha = _encode_alpha_block(blocks[..., 3])
+    encoded_colors, decoded_colors, _ = _encode_color_block(blocks[..., :3], visible, np.zeros(len(blocks), dtype = bool))
+
+    return (np.concatenate((encoded_alpha, encoded_colors), axis = 1), np.concatenate((decoded_colors, decoded_alpha[..., None]), axis = -1))
+
+####################################################################################
+# BC7
+####################################################################################
+
+def _encode_bc7(blocks: "np.ndarray") -> Tuple["np.ndarray", "np.ndarray"]:
+    """Encodes blocks using BC7 mode 6 only: one subset, RGBA endpoints with 7 bits per channel plus a p-bit, and 4-bit indices."""
+    low, high = _principal_axis_endpoints(blocks, np.ones(blocks.shape[:2], dtype = np.float32))
+
+    def quantize(endpoint: "np.ndarray") -> Tuple["np.ndarray", "np.ndarray"]:
+        # Pick whichever p-bit reproduces the endpoint more closely
+        candidates = [np.clip(np.rint((endpoint - p_bit) / 2), 0, 127) for p_bit in (0, 1)]
+        errors = [np.sum((2 * c + p_bit - endpoint) ** 2, axis = 1) for p_bit, c in enumerate(candidates)]
+        p_bits = (errors[1] < errors[0]).astype(np.int64)
+
+        return (np.where(p_bits[:, None] == 1, candidates[1], candidates[0]).astype(np.int64), p_bits)
+
+    quantized0, p_bit0 = quantize(low)
+    quantized1, p_bit1 = quantize(high)
+
+    endpoint0 = (quantized0 << 1) | p_bit0[:, None]
+    endpoint1 = (quantized1 << 1) | p_bit1[:, None]
+
+    weights = np.array(_BC7_WEIGHTS, dtype = np.int64)
+    palette = ((64 - weights)[None, :, None] * endpoint0[:, None, :] + weights[None, :, None] * endpoint1[:, None, :] + 32) >> 6
+    indices, _ = _nearest_palette_entry(blocks, palette.astype(np.float32))
+    decoded = np.take_along_axis(palette, indices[..., None], axis = 1)
+
+    # The first pixel's index is stored with an implicit 0 high bit; if it's set, swap the endpoints and invert every index.
+    # The weight table is symmetric, so this decodes to exactly the same colors.
+    swap = indices[:, 0] >= 8
+    quantized0, quantized1 = np.where(swap[:, None], quantized1, quantized0), np.where(swap[:, None], quantized0, quantized1)
+    p_bit0, p_bit1 = np.where(swap, p_bit1, p_bit0), np.where(swap, p_bit0, p_bit1)
+    indices = np.where(swap[:, None], 15 - indices, indices).astype(np.uint64)
+
+    low_bits = np.full(len(blocks), 1 << 6, dtype = np.uint64) # mode 6
+    shift = 7
+
+    for channel in range(4):
+        low_bits |= quantized0[:, channel].astype(np.uint64) << np.uint64(shift)
+        low_bits |= quantized1[:, channel].astype(np.uint64) << np.uint64(shift + 7)
+        shift += 14
+
+    low_bits |= p_bit0.astype(np.uint64) << np.uint64(63)
+
+    high_bits = p_bit1.astype(np.uint64) | (indices[:, 0] << np.uint64(1))
+    high_bits |= _pack_indices(indices[:, 1:], 4) << np.uint64(4)
+
+    encoded = np.stack((low_bits, high_bits), axis = 1).astype("<u8").view(np.uint8).reshape(-1, 16)
+
+    return (encoded, decoded)
+
+####################################################################################
+# ETC2
+####################################################################################
+
+def _encode_eac_alpha(alpha: "np.ndarray") -> Tuple["np.ndarray", "np.ndarray"]:
+    """Encodes the EAC alpha half of ETC2 RGBA8 blocks, trying every modifier table."""
+    tables = np.array(_EAC_MODIFIERS, dtype = np.float32) # (16, 8)
+    alpha_min, alpha_max = np.min(alpha, axis = 1), np.max(alpha, axis = 1)
+
+    base = np.clip(np.rint((alpha_min + alpha_max) / 2), 0, 255)
+    table_spans = tables.max(axis = 1) - tables.min(axis = 1)
+    multipliers = np.clip(np.rint((alpha_max - alpha_min)[:, None] / table_spans[None, :]), 1, 15) # (N, 16)
+
+    palette = np.clip(base[:, None, None] + tables[None, :, :] * multipliers[:, :, None], 0, 255) # (N, 16 tables, 8)
+    errors = (alpha[:, None, :, None] - palette[:, :, None, :]) ** 2 # (N, 16 tables, 16 pixels, 8)
+    indices = np.argmin(errors, axis = -1)
+    table_errors = np.take_along_axis(errors, indices[..., None], axis = -1)[..., 0].sum(axis = -1)
+
+    best_table = np.argmin(table_errors, axis = 1)
+    block_range = np.arange(len(alpha))
+    indices = indices[block_range, best_table]
+    multiplier = multipliers[block_range, best_table]
+    decoded = np.take_along_axis(palette[block_range, best_table], indices, axis = 1)
+
+    packed = (base.astype(np.uint64) << np.uint64(56)) | (multiplier.astype(np.uint64) << np.uint64(52)) | (best_table.astype(np.uint64) << np.uint64(48))
+
+    # Indices are stored most significant first, in column-major pixel order
+    shifts = np.uint64(45) - np.arange(16, dtype = np.uint64) * np.uint64(3)
+    packed |= np.bitwise_or.reduce(indices[:, _ETC_PIXEL_ORDER].astype(np.uint64) << shifts, axis = 1)
+
+    return (packed, decoded)
+
+def _encode_etc1_color(colors: "np.ndarray", weights: "np.ndarray") -> Tuple["np.ndarray", "np.ndarray"]:
+    """Encodes colors using ETC1's individual and differential modes, which are also valid ETC2 blocks. Both flip orientations are tried."""
+    num_blocks = len(colors)
+    block_range = np.arange(num_blocks)
+    modifiers = np.array([(a, b, -a, -b) for a, b in _ETC_MODIFIERS], dtype = np.float32) # (8 tables, 4)
+    pixel_x, pixel_y = np.arange(16) % 4, np.arange(16) // 4
+
+    results = []
+
+    for flip in (0, 1):
+        subblock_of_pixel = (pixel_y >= 2) if flip else (pixel_x >= 2)
+        subblock_masks = np.stack((~subblock_of_pixel, subblock_of_pixel)).astype(np.float32) # (2, 16)
+
+        subblock_weights = weights[:, None, :] * subblock_masks[None, :, :] # (N, 2, 16)
+        average = np.einsum("nsp,npc->nsc", subblock_weights, colors) / np.maximum(subblock_weights.sum(axis = -1), 1)[..., None]
+
+        # Differential mode gives 5-bit precision, but the second color must be within [-4, 3] of the first
+        quantized5 = np.rint(average * 31 / 255).astype(np.int64)
+        deltas = quantized5[:, 1] - quantized5[:, 0]
+        use_differential = np.all((deltas >= -4) & (deltas <= 3), axis = 1)
+        quantized4 = np.rint(average * 15 / 255).astype(np.int64)
+
+        base_colors = np.where(use_differential[:, None, None], (quantized5 << 3) | (quantized5 >> 2), (quantized4 << 4) | quantized4).astype(np.float32)
+
+        # Try every table for every pixel using its subblock's base color
+        pixel_base = base_colors[:, subblock_of_pixel.astype(np.int64)] # (N, 16, 3)
+        candidates = np.clip(pixel_base[:, :, None, None, :] + modifiers[None, None, :, :, None], 0, 255) # (N, 16, 8, 4, 3)
+        errors = np.sum((colors[:, :, None, None, :] - candidates) ** 2, axis = -1) * weights[:, :, None, None]
+        indices = np.argmin(errors, axis = -1) # (N, 16, 8)
+        pixel_errors = np.take_along_axis(errors, indices[..., None], axis = -1)[..., 0]
+
+        table_errors = np.einsum("sp,npt->nst", subblock_masks, pixel_errors) # (N, 2, 8)
+        best_tables = np.argmin(table_errors, axis = -1) # (N, 2)
+        total_error = np.take_along_axis(table_errors, best_tables[..., None], axis = -1)[..., 0].sum(axis = -1)
+
+        pixel_tables = best_tables[:, subblock_of_pixel.astype(np.int64)] # (N, 16)
+        pixel_indices = np.take_along_axis(indices, pixel_tables[..., None], axis = -1)[..., 0]
+        decoded = candidates[block_range[:, None], np.arange(16)[None, :], pixel_tables, pixel_indices]
+
+        packed = np.zeros(num_blocks, dtype = np.uint64)
+
+        for channel, shift in enumerate((59, 51, 43)):
+            delta_bits = (deltas[:, channel] & 7).astype(np.uint64)
+            differential_bits = (quantized5[:, 0, channel].astype(np.uint64) << np.uint64(shift)) | (delta_bits << np.uint64(shift - 3))
+            individual_bits = (quantized4[:, 0, channel].astype(np.uint64) << np.uint64(shift + 1)) | (quantized4[:, 1, channel].astype(np.uint64) << np.uint64(shift - 3))
+            packed |= np.where(use_differential, differential_bits, individual_bits)
+
+        packed |= best_tables[:, 0].astype(np.uint64) << np.uint64(37)
+        packed |= best_tables[:, 1].astype(np.uint64) << np.uint64(34)
+        packed |= use_differential.astype(np.uint64) << np.uint64(33)
+        packed |= np.uint64(flip) << np.uint64(32)
+
+        # Each pixel's 2-bit index is split: least significant bits in bits 0-15, most significant in bits 16-31
+        ordered_indices = pixel_indices[:, _ETC_PIXEL_ORDER].astype(np.uint64)
+        packed |= _pack_indices(ordered_indices & np.uint64(1), 1)
+        packed |= _pack_indices(ordered_indices >> np.uint64(1), 1) << np.uint64(16)
+
+        results.append((total_error, packed, decoded))
+
+    use_flip = results[1][0] < results[0][0]
+    packed = np.where(use_flip, results[1][1], results[0][1])
+    decoded = np.where(use_flip[:, None, None], results[1][2], results[0][2])
+
+    return (packed, decoded)
+
+def _encode_etc2(blocks: "np.ndarray") -> Tuple["np.ndarray", "np.ndarray"]:
+    visible = (blocks[..., 3] > 0).astype(np.float32)
+
+    alpha_bits, decoded_alpha = _encode_eac_alpha(blocks[..., 3])
+    color_bits, decoded_colors = _encode_etc1_color(blocks[..., :3], visible)
+
+    # ETC blocks are big-endian, alpha first
+    encoded = np.stack((alpha_bits, color_bits), axis = 1).astype(">u8").view(np.uint8).reshape(-1, 16)
+
+    return (encoded, np.concatenate((decoded_colors, decoded_alpha[..., None]), axis = -1))
+
+####################################################################################
+# Containers
+####################################################################################
+
+def _write_dds(file_path: str, width: int, height: int, texture_format: str, levels: List[bytes]):
+    # DDSD_CAPS | DDSD_HEIGHT | DDSD_WIDTH | DDSD_PIXELFORMAT | DDSD_LINEARSIZE
+    flags = 0x1 | 0x2 | 0x4 | 0x1000 | 0x80000
+    caps = 0x1000 # DDSCAPS_TEXTURE
+    four_cc = { "bc1": b"DXT1", "bc3": b"DXT5", "bc7": b"DX10" }[texture_format]
+
+    if len(levels) > 1:
+        flags |= 0x20000 # DDSD_MIPMAPCOUNT
+        caps |= 0x8 | 0x400000 # DDSCAPS_COMPLEX | DDSCAPS_MIPMAP
+
+    pixel_format = struct.pack("<II4sIIIII", 32, 0x4, four_cc, 0, 0, 0, 0, 0) # DDPF_FOURCC
+    header = struct.pack("<IIIIIII", 124, flags, height, width, len(levels[0]), 0, len(levels)) + b"\x00" * 44 + pixel_format + struct.pack("<IIII", caps, 0, 0, 0) + b"\x00" * 4
+
+    with open(file_path, "wb") as f:
+        f.write(b"DDS ")
+        f.write(header)
+
+        if four_cc == b"DX10":
+            # DXGI_FORMAT_BC7_UNORM, D3D10_RESOURCE_DIMENSION_TEXTURE2D, no flags, array size 1
+            f.write(struct.pack("<IIIII", 98, 3, 0, 1, 0))
+
+        # Mip levels are stored largest first
+        for data in levels:
+            f.write(data)
+
+def _write_ktx2(file_path: str, width: int, height: int, levels: List[bytes]):
+    identifier = b"\xabKTX 20\xbb\r\n\x1a\n"
+    vk_format = 151 # VK_FORMAT_ETC2_R8G8B8A8_UNORM_BLOCK
+    level_count = len(levels)
+
+    # Data format descriptor: one basic block describing a 4x4, 16 byte ETC2 block with alpha in the first 64 bits
+    samples = struct.pack("<HBB4sII", 0, 63, 15, b"\x00" * 4, 0, 0xFFFFFFFF) + struct.pack("<HBB4sII", 64, 63, 2, b"\x00" * 4, 0, 0xFFFFFFFF)
+    basic_block = struct.pack("<IHHBBBB4B8B", 0, 2, 24 + len(samples), 161, 1, 1, 0, 3, 3, 0, 0, 16, 0, 0, 0, 0, 0, 0, 0) + samples
+    dfd = struct.pack("<I", 4 + len(basic_block)) + basic_block
+
+    dfd_offset = len(identifier) + 36 + 32 + 24 * level_count
+    data_offset = math.ceil((dfd_offset + len(dfd)) / 16) * 16
+
+    # Mip levels are stored smallest first, but indexed largest first. Every level is a multiple of the 16 byte block size, so they stay aligned.
+    level_offsets = {}
+    offset = data_offset
+
+    for level in reversed(range(level_count)):
+        level_offsets[level] = offset
+        offset += len(levels[level])
+
+    header = struct.pack("<9I", vk_format, 1, width, height, 0, 0, 1, level_count, 0)
+    index = struct.pack("<IIIIQQ", dfd_offset, len(dfd), 0, 0, 0, 0)
+    level_index = b"".join(struct.pack("<QQQ", level_offsets[level], len(levels[level]), len(levels[level])) for level in range(level_count))
+
+    with open(file_path, "wb") as f:
+        f.write(identifier + header + index + level_index + dfd)
+        f.write(b"\x00" * (data_offset - dfd_offset - len(dfd)))
+
+        for data in reversed(levels):
+            f.write(data)
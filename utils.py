@@ -1,8 +1,10 @@
 import bpy
+import importlib.util
 import math
 import os
 import sys
-from typing import Any, Iterable, Optional
+import types
+from typing import Any, Dict, Iterable, List, Optional
 
 def blend_file_name(default_value: Optional[str] = None) -> Optional[str]:
     """Returns the .blend file name without its extension if the file has been saved, or default_value if not."""
@@ -63,6 +65,44 @@ def find_object_data_for_mesh(mesh: bpy.types.Mesh) -> bpy.types.Object:
 
     return next(iter(objects_by_mesh[mesh]))
 
+def find_dependencies(objects: Iterable[bpy.types.Object]) -> List[bpy.types.Object]:
+    """Finds every object which can affect where the given objects' geometry ends up: the objects themselves, their parents and the
+    objects used by their modifiers, constraints (including bone constraints) and drivers (including drivers on their data and shape
+    keys), recursively. The result is sorted by name."""
+    found: Dict[str, bpy.types.Object] = {}
+    pending = list(objects)
+
+    while len(pending) > 0:
+        obj = pending.pop()
+
+        if not isinstance(obj, bpy.types.Object) or obj.name in found:
+            continue
+
+        found[obj.name] = obj
+        pending.append(obj.parent)
+
+        constraints = list(obj.constraints)
+        if obj.pose is not None:
+            constraints.extend(constraint for pose_bone in obj.pose.bones for constraint in pose_bone.constraints)
+
+        # Modifiers and constraints can reference objects through several properties (e.g. an IK constraint's pole target, or an
+        # array modifier's offset object), so every object pointer is followed rather than just the usual "object" and "target"
+        for struct in [*obj.modifiers, *constraints]:
+            pending.extend(_object_pointers(struct))
+
+        # The Armature constraint keeps its targets in a collection instead
+        for constraint in constraints:
+            pending.extend(target.target for target in getattr(constraint, "targets", []))
+
+        # Drivers can be on the object, its data (e.g. an armature), or a mesh's shape keys
+        for id_block in (obj, obj.data, getattr(obj.data, "shape_keys", None)):
+            animation_data = getattr(id_block, "animation_data", None)
+
+            if animation_data is not None:
+                pending.extend(target.id for driver in animation_data.drivers for variable in driver.driver.variables for target in variable.targets)
+
+    return [found[name] for name in sorted(found)]
+
 def force_redraw_ui():
     # Frustratingly, this seems to be the only way to actually get Blender to redraw our panels -
     # tagging the areas/regions for redraw doesn't do it. So, even though this is bad practice,
@@ -72,6 +112,30 @@ def force_redraw_ui():
     with close_stdout():
         bpy.ops.wm.redraw_timer(type='DRAW_WIN_SWAP', iterations=1)
 
+def lazy_import(name: str, package: str) -> types.ModuleType:
+    """Imports a module without running it until one of its attributes is first used, like "from . import name" otherwise would.
+
+    Use this for modules which are slow to import (e.g. because they import NumPy) and are only needed once a job starts, so that
+    they don't slow down Blender's startup. Because the module's attributes are what trigger the import, only use them inside
+    functions, not in signatures, which are evaluated when the function is defined."""
+    full_name = importlib.util.resolve_name(name, package)
+
+    if full_name in sys.modules:
+        return sys.modules[full_name]
+
+    spec = importlib.util.find_spec(full_name)
+    spec.loader = importlib.util.LazyLoader(spec.loader)
+
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[full_name] = module
+    spec.loader.exec_module(module)
+
+    # The import system would normally do this, so that other modules importing it with "from package import module" get the same one
+    parent_name, _, child_name = full_name.rpartition(".")
+    setattr(sys.modules[parent_name], child_name, module)
+
+    return module
+
 def repeated_entries(iterable: Iterable[Any]) -> Iterable[Any]:
     seen = []
     repeats = []
@@ -99,4 +163,8 @@ def rotate_objects(objects: Iterable[bpy.types.Object], x_rot_degrees: Optional[
 def tag_redraw_area(context: bpy.types.Context, area_type: str):
     for area in context.window.screen.areas:
         if area.type == area_type:
-            area.tag_redraw()
\ No newline at end of file
+            area.tag_redraw()
+
+def _object_pointers(struct: bpy.types.bpy_struct) -> List[bpy.types.Object]:
+    return [value for value in (getattr(struct, prop.identifier, None) for prop in struct.bl_rna.properties if prop.type == 'POINTER')
+            if isinstance(value, bpy.types.Object)]